@@ -0,0 +1,68 @@
+import pandas as pd
+
+from curriculum import curriculum_of, target_ayat
+from juz_amma_data import JUZ_AMMA, surah_counts, unpack_status
+
+# =============================
+# LAPORAN TAHUNAN (YEAR-TO-DATE)
+# =============================
+
+ANNUAL_COLUMNS = [
+    "NIS",
+    "Nama",
+    "Kelas",
+    "Jumlah Setoran Tahun Ini",
+    "Jumlah Lulus",
+    "Jumlah Mengulang",
+    "% Hafalan Juz Amma",
+    "Surah Lulus",
+]
+
+
+def surah_lulus_penuh(status_value, kurikulum=JUZ_AMMA) -> str:
+    """Daftar surah yang seluruh ayatnya sudah Lulus, dipisah koma ("-" jika belum ada)."""
+    lulus = surah_counts(unpack_status(status_value, kurikulum), kurikulum)[1]
+    surah_lulus = [s for s, n in zip(kurikulum.surah_names, lulus) if n == kurikulum.surah_map[s]]
+    return ", ".join(surah_lulus) if surah_lulus else "-"
+
+
+def build_annual_report(df_data: pd.DataFrame, df_log: pd.DataFrame, tahun: int) -> pd.DataFrame:
+    """
+    Rekap setoran tahun `tahun` per murid yang punya setoran di tahun tersebut:
+    jumlah setoran, jumlah Lulus/Mengulang, persentase ayat Lulus (dari log)
+    dan surah yang sudah lulus penuh (dari Status_Hafalan).
+    """
+    log_tahun = df_log[df_log["Timestamp"].dt.year == tahun]
+    if log_tahun.empty:
+        return pd.DataFrame(columns=ANNUAL_COLUMNS)
+
+    is_lulus = log_tahun["Status"] == "Lulus"
+    agg = pd.DataFrame(
+        {
+            "ID_Murid": log_tahun["ID_Murid"],
+            "Setoran": 1,
+            "Lulus": is_lulus.astype(int),
+            "Mengulang": (log_tahun["Status"] == "Mengulang").astype(int),
+            "Ayat_Lulus": log_tahun["Jumlah_Ayat"].where(is_lulus, 0),
+        }
+    ).groupby("ID_Murid").sum()
+
+    murid = df_data[df_data["ID_Murid"].isin(agg.index)]
+    per_murid = agg.reindex(murid["ID_Murid"])
+
+    return pd.DataFrame(
+        {
+            "NIS": murid["NIS"].to_numpy() if "NIS" in murid.columns else "",
+            "Nama": murid["Nama_Murid"].to_numpy(),
+            "Kelas": murid["Kelas"].to_numpy(),
+            "Jumlah Setoran Tahun Ini": per_murid["Setoran"].to_numpy(),
+            "Jumlah Lulus": per_murid["Lulus"].to_numpy(),
+            "Jumlah Mengulang": per_murid["Mengulang"].to_numpy(),
+            # nama kolom dipertahankan; persentase dihitung terhadap target kurikulum masing-masing murid
+            "% Hafalan Juz Amma": (per_murid["Ayat_Lulus"].to_numpy() / target_ayat(murid).to_numpy() * 100).round(2),
+            "Surah Lulus": [
+                surah_lulus_penuh(row["Status_Hafalan"], curriculum_of(row)) for _, row in murid.iterrows()
+            ],
+        },
+        columns=ANNUAL_COLUMNS,
+    )
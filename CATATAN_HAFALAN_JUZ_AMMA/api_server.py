@@ -0,0 +1,279 @@
+"""
+Server API JSON lokal untuk mencatat setoran tanpa antarmuka Streamlit
+(tablet, aplikasi seluler). Memakai HafalanService dan kunci berkas yang
+sama dengan app.py, sehingga keduanya boleh berjalan bersamaan pada folder
+data yang sama.
+
+Contoh:
+    python api_server.py
+    HAFALAN_API_TOKEN=rahasia python api_server.py --host 0.0.0.0 --port 8502
+
+Endpoint (semua JSON; jika HAFALAN_API_TOKEN diisi, kirim header X-API-Token):
+    GET  /api/murid[?kelas=VII A]         daftar murid
+    POST /api/murid                       {"Nama_Murid", "Kelas", "NIS"}
+    GET  /api/murid/<id>                  profil murid
+    POST /api/setoran                     {"ID_Murid", "Surah", "Ayat_Dari", "Ayat_Sampai",
+                                           "Status", "Guru_Pencatat", "Nilai"?}
+    POST /api/setoran/batch               {"setoran": [ ... ]}  (maks. MAKS_BATCH)
+    GET  /api/kelas/<kelas>               papan peringkat kelas
+    GET  /api/peringkat[?cakupan=VII&k=10]
+    GET  /api/laporan/bulanan?tahun=2025&bulan=10
+    GET  /api/guru                        ringkasan aktivitas guru
+"""
+import argparse
+import hmac
+import json
+import os
+import re
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pandas as pd
+
+from convert_storage import BACKEND_STANDARD, BACKENDS
+from curriculum import CURRICULUM_COLUMN
+from hafalan_service import HafalanService, NotFound
+from leaderboard import SCOPE_SCHOOL
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PORT = 8502
+MAKS_BATCH = 1000
+MAKS_BODY = 5 * 1024 * 1024
+TOKEN_HEADER = "X-API-Token"
+
+MURID_COLUMNS = ["ID_Murid", "Nama_Murid", "NIS", "Kelas", CURRICULUM_COLUMN, "Total_Ayat_Lulus", "Update_Terakhir"]
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, pesan: str):
+        super().__init__(pesan)
+        self.status = status
+
+
+def _json_default(obj):
+    # nilai numpy / Timestamp dari DataFrame
+    if hasattr(obj, "item"):
+        return obj.item()
+    return str(obj)
+
+
+def _records(df: pd.DataFrame) -> list:
+    """DataFrame -> list dict siap JSON (NaN/NaT menjadi null)."""
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def _int_param(query: dict, name: str, default=None) -> int:
+    value = query.get(name, [default])[0]
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"Parameter {name} harus bilangan bulat.") from None
+
+
+# ---------- endpoint ----------
+
+def list_students(service, query, body):
+    df = service.students()
+    if "kelas" in query:
+        df = df[df["Kelas"].astype(str) == query["kelas"][0]]
+    return 200, {"murid": _records(df[MURID_COLUMNS])}
+
+
+def add_student(service, query, body):
+    student_id = service.add_student(body.get("Nama_Murid"), body.get("Kelas"), body.get("NIS", ""))
+    return 201, {"ID_Murid": student_id}
+
+
+def student_profile(service, query, body, student_id):
+    return 200, service.student_report(service.students(), int(student_id))
+
+
+def record_setoran(service, query, body):
+    row = service.record_setoran(
+        service.students(), body.get("ID_Murid"), body.get("Surah"), body.get("Ayat_Dari"),
+        body.get("Ayat_Sampai"), body.get("Status"), body.get("Guru_Pencatat"), body.get("Nilai"),
+    )
+    return 201, row
+
+
+def record_batch(service, query, body):
+    setoran = body.get("setoran")
+    if not isinstance(setoran, list):
+        raise ApiError(400, 'Body harus berisi {"setoran": [...]}.')
+    if len(setoran) > MAKS_BATCH:
+        raise ApiError(413, f"Maksimal {MAKS_BATCH} setoran per permintaan.")
+    berhasil, gagal = service.submit(setoran)
+    return 200, {"berhasil": len(berhasil), "hasil": berhasil, "gagal": gagal}
+
+
+def class_leaderboard(service, query, body, kelas):
+    return 200, {"kelas": kelas, "murid": _records(service.class_report(service.students(), kelas))}
+
+
+def school_ranking(service, query, body):
+    cakupan = query.get("cakupan", [SCOPE_SCHOOL])[0]
+    teratas = service.top(service.students(), _int_param(query, "k", 10), cakupan)
+    return 200, {"cakupan": cakupan, "peringkat": _records(teratas)}
+
+
+def monthly_report(service, query, body):
+    tahun, bulan = _int_param(query, "tahun"), _int_param(query, "bulan")
+    if not 1 <= bulan <= 12:
+        raise ApiError(400, "Parameter bulan harus 1-12.")
+    return 200, {"tahun": tahun, "bulan": bulan, "laporan": _records(service.monthly_report(service.students(), tahun, bulan))}
+
+
+def teacher_report(service, query, body):
+    return 200, {"guru": _records(service.teacher_report())}
+
+
+ROUTES = [
+    ("GET", re.compile(r"^/api/murid$"), list_students),
+    ("POST", re.compile(r"^/api/murid$"), add_student),
+    ("GET", re.compile(r"^/api/murid/(\d+)$"), student_profile),
+    ("POST", re.compile(r"^/api/setoran$"), record_setoran),
+    ("POST", re.compile(r"^/api/setoran/batch$"), record_batch),
+    ("GET", re.compile(r"^/api/kelas/(.+)$"), class_leaderboard),
+    ("GET", re.compile(r"^/api/peringkat$"), school_ranking),
+    ("GET", re.compile(r"^/api/laporan/bulanan$"), monthly_report),
+    ("GET", re.compile(r"^/api/guru$"), teacher_report),
+]
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """Satu permintaan = satu panggilan HafalanService di dalam kunci penyimpanan."""
+
+    protocol_version = "HTTP/1.1"  # koneksi keep-alive untuk klien yang mengirim banyak setoran
+    # header dan body dikirim terpisah; tanpa TCP_NODELAY respons kecil tertahan
+    # ~40 ms menunggu delayed ACK klien
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _read_body(self) -> dict:
+        try:
+            panjang = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            raise ApiError(400, "Content-Length tidak valid.") from None
+        if panjang < 0:
+            raise ApiError(400, "Content-Length tidak valid.")
+        if panjang > MAKS_BODY:
+            raise ApiError(413, "Body terlalu besar.")
+        if not panjang:
+            return {}
+        data = self.rfile.read(panjang)
+        self._body_consumed = True
+        try:
+            body = json.loads(data.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise ApiError(400, "Body bukan JSON yang valid.") from None
+        if not isinstance(body, dict):
+            raise ApiError(400, "Body harus berupa objek JSON.")
+        return body
+
+    def _body_pending(self) -> bool:
+        """Body belum dibaca (permintaan ditolak lebih dulu); koneksi harus ditutup agar tidak terbaca sebagai permintaan berikutnya."""
+        if self._body_consumed:
+            return False
+        panjang = (self.headers.get("Content-Length") or "").strip()
+        return panjang not in ("", "0") or "Transfer-Encoding" in self.headers
+
+    def _dispatch(self, method: str):
+        self._body_consumed = False
+        try:
+            token = self.server.token
+            if token and not hmac.compare_digest(self.headers.get(TOKEN_HEADER, ""), token):
+                raise ApiError(401, "Token API tidak valid.")
+            url = urlsplit(self.path)
+            path = unquote(url.path).rstrip("/")
+            query = parse_qs(url.query)
+            body = self._read_body() if method == "POST" else {}
+            for route_method, pattern, handler in ROUTES:
+                match = pattern.match(path)
+                if match and route_method == method:
+                    service = self.server.service
+                    with service.lock:
+                        status, payload = handler(service, query, body, *match.groups())
+                    break
+            else:
+                raise ApiError(404, f"Endpoint {method} {path} tidak ada.")
+        except ApiError as e:
+            status, payload = e.status, {"error": e.args[0]}
+        except NotFound as e:
+            status, payload = 404, {"error": e.args[0]}
+        except ValueError as e:
+            status, payload = 400, {"error": e.args[0] if e.args else "Permintaan tidak valid."}
+        except Exception as e:  # jangan sampai satu permintaan mematikan server
+            self.log_error("Kesalahan tak terduga: %r", e)
+            status, payload = 500, {"error": f"Kesalahan server: {e}"}
+        self._send(status, payload)
+
+    def _send(self, status: int, payload):
+        data = json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        if self._body_pending():
+            self.send_header("Connection", "close")  # juga menyetel close_connection
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(service: HafalanService, host: str = "127.0.0.1", port: int = DEFAULT_PORT, token: str = "", quiet: bool = False):
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.token = token
+    server.quiet = quiet
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Server API JSON untuk pencatatan setoran hafalan.")
+    parser.add_argument("--host", default="127.0.0.1", help="Alamat yang didengarkan (0.0.0.0 = semua jaringan).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT}).")
+    parser.add_argument("--data-dir", default=BASE_DIR, help="Folder data (default: folder aplikasi).")
+    parser.add_argument(
+        "--storage",
+        choices=BACKENDS,
+        default=os.environ.get("HAFALAN_STORAGE", BACKEND_STANDARD),
+        help="Backend penyimpanan, sama dengan HAFALAN_STORAGE pada app.py.",
+    )
+    parser.add_argument("--quiet", action="store_true", help="Jangan cetak log per permintaan.")
+    args = parser.parse_args(argv)
+
+    service = HafalanService(args.data_dir, args.storage)
+    # migrasi/konversi/rotasi log seperti saat app.py dibuka, sebelum permintaan pertama dilayani
+    persiapan = service.prepare_storage()
+    if not os.path.exists(service.db_file):
+        parser.error(f"Database '{service.db_file}' tidak ditemukan. Jalankan app.py sekali terlebih dahulu.")
+    if persiapan["migrasi"]:
+        print(f"{persiapan['migrasi']} baris log setoran dipindah ke format kompak.")
+    if persiapan["konversi"]:
+        print(f"{persiapan['konversi']['murid']} murid dan {persiapan['konversi']['setoran']} setoran disalin ke format {args.storage}.")
+    if persiapan["rotasi"] and persiapan["rotasi"]["baris_diarsipkan"]:
+        print(f"{persiapan['rotasi']['baris_diarsipkan']} baris log lama dipindah ke arsip.")
+    jumlah = len(service.students())
+
+    server = make_server(service, args.host, args.port, os.environ.get("HAFALAN_API_TOKEN", ""), args.quiet)
+    print(f"API hafalan ({jumlah} murid) berjalan di http://{args.host}:{args.port}/api")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,72 @@
 import streamlit as st
 import pandas as pd
-import json
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
 import plotly.express as px
 
 # Import data master dan fungsi pembantu dari file juz_amma_data.py
 from juz_amma_data import (
-    JUZ_AMMA_MAP,
-    SURAH_NAMES,
-    TOTAL_AYAT_JUZ_AMMA,
+    JUZ_AMMA,
     initialize_database,
-    create_initial_data_structure,
-    calculate_lulus_count,
+    build_rekap_per_surah,
+    surah_status,
+    surah_summary,
+)
+from monthly_report import SNAPSHOT_DIRNAME, load_monthly_report, recent_months
+from export_jobs import (
+    CACHE_DIRNAME,
+    JOB_FAILED,
+    JOB_IDLE,
+    JOB_PENDING,
+    JOB_RUNNING,
+    ExportJobManager,
+    data_version,
+)
+from excel_export import build_annual_excel, build_school_workbook, build_sheets_workbook
+from annual_report import build_annual_report
+from log_engine import read_log
+from convert_storage import BACKEND_STANDARD, storage_paths
+from status_matrix import MATRIX_FILENAME, NILAI_MAX, NILAI_MIN, NILAI_SUFFIX, matrix_path_for
+from ayat_analytics import ayat_difficulty, class_surah_rates, surah_difficulty
+from completion_forecast import JENDELA_MINGGU
+from leaderboard import SCOPE_SCHOOL, Leaderboard
+from daily_rollup import ROLLUP_DIRNAME
+from hafalan_service import HafalanService, NotFound, ensure_columns
+from cohort_analytics import MINGGU_KURVA, CohortCache, assign_cohorts, compare_at_week
+from teacher_analytics import JENDELA_HARI, class_teacher_counts, teacher_classes, teacher_summary, teacher_timeline
+from murajaah import INTERVAL_HARI, MAKS_AYAT_HARIAN, MurajaahQueue, class_murajaah
+from curriculum import CURRICULUM_COLUMN, CURRICULUM_DIRNAME, get_curriculum
+from log_archive import (
+    ARCHIVE_DIRNAME,
+    academic_year,
+    academic_year_start,
+    load_manifest,
+)
+from student_import import import_students, iter_upload_chunks
+from class_operations import (
+    ACTION_STAY,
+    ALUMNI_FILENAME,
+    GRADUATED,
+    UNDO_DIRNAME,
+    affected_classes,
+    apply_plan,
+    archive_graduates,
+    default_promotion_map,
+    list_undo_snapshots,
+    plan_graduation,
+    plan_move,
+    plan_promotion,
+    restore_undo_snapshot,
+    save_undo_snapshot,
+    summarize_plan,
+)
+from pdf_report import (
+    BATCH_PROFIL_MURID,
+    BATCH_REKAP_KELAS,
+    render_annual_pdf,
+    render_batch_zip,
+    render_rekap_surah_pdf,
+    render_student_profile_pdf,
 )
 
 # =============================
@@ -23,17 +77,26 @@ from juz_amma_data import (
 #LOG_FILE = "log_hafalan.csv"         # riwayat transaksi setoran hafalan
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_FILE = os.path.join(BASE_DIR, "data_hafalan.csv")
+# Backend penyimpanan: "standar" (CSV + log kompak), "per_kelas" (satu CSV per kelas
+# + log kompak) atau "parquet" (lihat convert_storage.py)
+STORAGE_BACKEND = os.environ.get("HAFALAN_STORAGE", BACKEND_STANDARD)
+DB_FILE, LOG_FILE = storage_paths(BASE_DIR, STORAGE_BACKEND)
 GURU_FILE = os.path.join(BASE_DIR, "guru_list.csv")
-LOG_FILE = os.path.join(BASE_DIR, "log_hafalan.csv")
 logo_path = os.path.join(BASE_DIR, "logo.png")
+SNAPSHOT_DIR = os.path.join(BASE_DIR, SNAPSHOT_DIRNAME)  # snapshot laporan bulanan yang sudah dibekukan
+EXPORT_CACHE_DIR = os.path.join(BASE_DIR, CACHE_DIRNAME)  # artefak ekspor (xlsx/pdf) yang sudah jadi
+ALUMNI_FILE = os.path.join(BASE_DIR, ALUMNI_FILENAME)  # arsip murid yang sudah lulus
+UNDO_DIR = os.path.join(BASE_DIR, UNDO_DIRNAME)  # snapshot sebelum operasi kelas massal
+ARCHIVE_DIR = os.path.join(BASE_DIR, ARCHIVE_DIRNAME)  # partisi log setoran tahun ajaran lalu
+MATRIX_FILE = os.path.join(BASE_DIR, MATRIX_FILENAME)  # status per ayat, diperbarui di tempat via memmap
+CURRICULUM_DIR = os.path.join(BASE_DIR, CURRICULUM_DIRNAME)  # daftar kurikulum + penetapan per kelas/murid
+ROLLUP_DIR = os.path.join(BASE_DIR, ROLLUP_DIRNAME)  # ringkasan setoran harian per murid/kelas
 
 
 # Pastikan file CSV penting tersedia
 for filename, header in [
     ("data_hafalan.csv", "ID_Murid,Nama_Murid,Kelas,Status_Hafalan,Total_Ayat_Lulus,Update_Terakhir,Guru_Pencatat"),
     ("guru_list.csv", "Nama_Guru"),
-    ("log_hafalan.csv", "Timestamp,ID_Murid,Nama_Murid,Kelas,Surah,Ayat_Dari,Ayat_Sampai,Status,Guru_Pencatat"),
 ]:
     if not os.path.exists(filename):
         with open(filename, "w", encoding="utf-8") as f:
@@ -46,9 +109,92 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-# Load database awal ke session_state jika belum ada
-if "df" not in st.session_state:
-    st.session_state.df = initialize_database(DB_FILE)
+
+@st.cache_resource
+def get_service():
+    """
+    Jalur tulis bersama (matriks status, log, rollup, peringkat) untuk seluruh
+    sesi di proses ini; server API memakai kelas yang sama dan kunci berkas yang sama.
+    """
+    return HafalanService(BASE_DIR, STORAGE_BACKEND)
+
+
+# Migrasi log CSV lama ke format kompak, konversi pertama kali ke backend
+# non-standar, dan rotasi log ke arsip; dijalankan di dalam kunci penyimpanan
+# agar tidak bertabrakan dengan setoran dari server API
+persiapan = get_service().prepare_storage()
+if persiapan["migrasi"]:
+    st.toast(f"📦 {persiapan['migrasi']} baris log setoran dipindah ke format kompak.")
+if persiapan["konversi"]:
+    st.toast(
+        f"📦 {persiapan['konversi']['murid']} murid dan {persiapan['konversi']['setoran']} setoran "
+        f"disalin ke format {STORAGE_BACKEND}."
+    )
+if persiapan["rotasi"] and persiapan["rotasi"]["baris_diarsipkan"]:
+    st.toast(
+        f"🗄️ {persiapan['rotasi']['baris_diarsipkan']} baris log lama dipindah ke arsip "
+        f"({', '.join(persiapan['rotasi']['partisi_baru'])})."
+    )
+
+
+def get_rollups():
+    """Rollup harian per murid/kelas; dibangun dari log sekali jika belum ada atau log berubah dari luar."""
+    return get_service().daily_rollups()
+
+
+def completion_forecasts(df: pd.DataFrame) -> pd.DataFrame:
+    """Perkiraan selesai seluruh murid `df` (satu baris per murid, urutan sama dengan `df`)."""
+    return get_service().completion_forecasts(df)
+
+
+def school_leaderboard(df: pd.DataFrame) -> Leaderboard:
+    """Papan peringkat yang sudah disamakan dengan `df` (hanya murid yang berubah disentuh)."""
+    return get_service().school_leaderboard(df)
+
+
+@st.cache_resource
+def get_cohort_cache():
+    """Kurva angkatan yang sudah tertutup disimpan di sini selama proses berjalan."""
+    return CohortCache()
+
+
+def get_status_matrices():
+    """Satu pemetaan memmap matriks status per kurikulum untuk seluruh sesi di proses ini."""
+    return get_service().matrices
+
+
+def with_curricula(df: pd.DataFrame) -> pd.DataFrame:
+    """Isi kolom Kurikulum (kurikulum aktif tiap murid) dari file di folder kurikulum/."""
+    return get_service().with_curricula(df)
+
+
+def load_database():
+    """Membaca database murid dan menerapkan status terbaru dari matriks status."""
+    return get_service().load_students(initialize_database(DB_FILE))
+
+
+def mark_data_written():
+    """Perubahan dari sesi ini sendiri tidak perlu memicu baca ulang database."""
+    st.session_state.versi_data = get_service().data_version()
+
+
+def current_students() -> pd.DataFrame:
+    """
+    Database sesi, dibaca ulang jika proses lain menulis sejak rerun dimulai.
+    Dipakai di dalam kunci penyimpanan sebelum operasi baca-ubah-tulis seluruh
+    database (impor, operasi kelas) agar murid yang baru ditambahkan lewat API tidak tertimpa.
+    """
+    if st.session_state.get("versi_data") != get_service().data_version():
+        st.session_state.df = load_database()
+        mark_data_written()
+    return st.session_state.df
+
+
+# Load database awal ke session_state; dibaca ulang jika database/log diubah
+# proses lain (mis. setoran lewat server API) sejak sesi ini terakhir menulis
+if "df" not in st.session_state or st.session_state.get("versi_data") != get_service().data_version():
+    st.session_state.df = load_database()
+    mark_data_written()
 
 # =============================
 # FUNGSI UTILITAS / DATA
@@ -93,117 +239,77 @@ def load_guru_list(csv_path: str = GURU_FILE):
         return ["Pilih Guru"] + default_guru
 
 
-def ensure_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Pastikan kolom penting selalu ada di dataframe meski file lama.
-    """
-    if "Guru_Pencatat" not in df.columns:
-        df["Guru_Pencatat"] = ""
-    if "NIS" not in df.columns:
-        df["NIS"] = ""
-    if "Total_Ayat_Lulus" not in df.columns:
-        df["Total_Ayat_Lulus"] = 0
-    if "Update_Terakhir" not in df.columns:
-        df["Update_Terakhir"] = ""
-    return df
-
-
-def save_data(df: pd.DataFrame):
+def save_data(df: pd.DataFrame, kelas=None):
     """
-    Simpan df terbaru ke CSV utama dan update session_state.
+    Simpan df terbaru ke database utama (CSV/Parquet/per kelas) dan update session_state.
+    `kelas` = kelas yang berubah; pada backend per kelas hanya shard itu yang ditulis ulang.
     """
-    df = ensure_columns(df)
-    df.to_csv(DB_FILE, index=False)
-    st.session_state.df = df
+    st.session_state.df = get_service().save_students(df, kelas=kelas)
+    mark_data_written()
 
 
 def add_new_student(name, kelas, nis=""):
     """
     Tambah murid baru manual via sidebar.
     """
-    df = ensure_columns(st.session_state.df.copy())
-    next_id = df["ID_Murid"].max() + 1 if not df.empty else 1001
-
-    new_data = {
-        "ID_Murid": next_id,
-        "Nama_Murid": name,
-        "NIS": nis,
-        "Kelas": kelas,
-        "Status_Hafalan": create_initial_data_structure(),
-        "Total_Ayat_Lulus": 0,
-        "Update_Terakhir": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "Guru_Pencatat": "",
-    }
-
-    new_df = pd.concat([df, pd.DataFrame([new_data])], ignore_index=True)
-    save_data(new_df)
+    try:
+        next_id = get_service().add_student(name, kelas, nis)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    # database dibaca ulang: bisa saja ada murid yang baru ditambahkan lewat API
+    st.session_state.df = load_database()
+    mark_data_written()
     st.success(f"Murid **{name}** (ID: {next_id}) berhasil ditambahkan ke kelas **{kelas}**.")
 
 
-def import_students_from_csv(uploaded_file):
+def import_students_from_file(uploaded_file):
     """
-    Impor massal murid dari CSV (pemisah ;). Wajib kolom: Nama_Murid, Kelas. Opsional: NIS.
+    Impor massal murid dari CSV (pemisah ;) atau Excel (.xlsx, mis. ekspor Dapodik).
+    Wajib kolom: Nama_Murid, Kelas. Opsional: NIS.
+    Dibaca per potongan, di-upsert berdasarkan NIS, lalu database ditulis satu kali.
     """
-    try:
-        new_students_df = pd.read_csv(uploaded_file, sep=';')
-
-        REQUIRED_COLS = ['Nama_Murid', 'Kelas']
-        if not all(col in new_students_df.columns for col in REQUIRED_COLS):
-            st.error("File CSV harus memiliki kolom wajib: Nama_Murid, Kelas")
-            st.info("Pastikan CSV menggunakan pemisah ';'")
+    with get_service().lock:
+        try:
+            df = ensure_columns(current_students().copy())
+            new_df, laporan = import_students(df, iter_upload_chunks(uploaded_file))
+        except ValueError as e:
+            st.error(f"{e}. File harus memiliki kolom wajib: Nama_Murid, Kelas")
+            st.info("Untuk CSV, pastikan menggunakan pemisah ';'")
             return
-
-        new_students_df = new_students_df.dropna(subset=REQUIRED_COLS)
-        if new_students_df.empty:
-            st.warning("Tidak ada baris murid valid di CSV.")
+        except Exception as e:
+            st.error(f"Terjadi kesalahan saat memproses file: {e}")
+            st.warning("Pastikan file CSV/Excel valid (CSV menggunakan ';' sebagai pemisah kolom).")
             return
 
-        df = ensure_columns(st.session_state.df.copy())
-        current_max_id = df['ID_Murid'].max() if not df.empty else 1000
-        num_new = len(new_students_df)
-        new_ids = range(int(current_max_id) + 1, int(current_max_id) + 1 + num_new)
-        new_students_df['ID_Murid'] = new_ids
-
-        new_students_df['Status_Hafalan'] = [create_initial_data_structure() for _ in range(num_new)]
-        new_students_df['Total_Ayat_Lulus'] = 0
-        new_students_df['Update_Terakhir'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        new_students_df['Guru_Pencatat'] = ""
-        if 'NIS' not in new_students_df.columns:
-            new_students_df['NIS'] = ""
-
-        combined_df = pd.concat([df, new_students_df], ignore_index=True)
-        save_data(combined_df)
-
-        st.success(f"{num_new} murid berhasil diimpor!")
-        st.info("Cek menu lain untuk melihat data baru.")
-
-    except Exception as e:
-        st.error(f"Terjadi kesalahan saat memproses file: {e}")
-        st.warning("Pastikan file CSV valid dan menggunakan ';' sebagai pemisah kolom.")
-
+        if laporan["inserted"] or laporan["updated"]:
+            save_data(new_df)
+    # disimpan di session_state agar tetap tampil setelah st.rerun()
+    st.session_state.import_report = laporan
 
-def log_setoran(student_row, surah, start_ayat, end_ayat, status_code, guru_pencatat):
-    """
-    Mencatat transaksi setoran hafalan ke file LOG_FILE.
-    Tiap klik Simpan Catatan -> 1 baris baru masuk log.
-    """
-    status_label = "Lulus" if status_code == 1 else "Mengulang"
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    log_data = {
-        "Timestamp": now,
-        "ID_Murid": student_row["ID_Murid"],
-        "Nama_Murid": student_row["Nama_Murid"],
-        "Kelas": student_row["Kelas"],
-        "Surah": surah,
-        "Ayat_Dari": start_ayat,
-        "Ayat_Sampai": end_ayat,
-        "Status": status_label,
-        "Guru_Pencatat": guru_pencatat,
-    }
 
-    write_header = not os.path.exists(LOG_FILE)
-    pd.DataFrame([log_data]).to_csv(LOG_FILE, mode="a", index=False, header=write_header)
+def show_import_report():
+    """Ringkasan hasil impor terakhir: baru, diperbarui, tidak berubah, duplikat, ditolak."""
+    laporan = st.session_state.get("import_report")
+    if not laporan:
+        return
+    rejected = laporan["rejected"]
+    st.sidebar.success(
+        f"Impor selesai: {laporan['inserted']} murid baru, {laporan['updated']} diperbarui, "
+        f"{laporan['unchanged']} tidak berubah, {laporan['duplicates']} duplikat di file, "
+        f"{len(rejected)} ditolak."
+    )
+    if len(rejected):
+        st.sidebar.dataframe(rejected, use_container_width=True, hide_index=True)
+        st.sidebar.download_button(
+            "📥 Unduh Baris yang Ditolak",
+            data=rejected.to_csv(index=False, sep=";").encode("utf-8"),
+            file_name="impor_ditolak.csv",
+            mime="text/csv",
+        )
+    if st.sidebar.button("Tutup Ringkasan Impor"):
+        del st.session_state.import_report
+        st.rerun()
 
 
 def update_hafalan_status(
@@ -214,53 +320,23 @@ def update_hafalan_status(
     end_ayat: int,
     status_code: int,
     guru_pencatat: str,
+    nilai: int = None,
 ):
     """
     Update status hafalan ayat tertentu untuk murid.
-    Sekaligus catat log transaksi setoran guru ke LOG_FILE.
+    `nilai` (1-5, opsional) disimpan per ayat beserta tanggal penilaian.
+    Sekaligus catat log transaksi setoran guru ke LOG_FILE (lihat HafalanService.record_setoran).
     """
-    max_ayat = JUZ_AMMA_MAP.get(surah)
-    if not max_ayat:
-        st.error("Nama surah tidak valid.")
-        return df
-
-    if not (1 <= start_ayat <= max_ayat and 1 <= end_ayat <= max_ayat and start_ayat <= end_ayat):
-        st.error(f"Rentang ayat tidak valid. Surah {surah} hanya punya ayat 1 sampai {max_ayat}.")
-        return df
-
-    idx_list = df[df['ID_Murid'] == student_id].index
-    if idx_list.empty:
-        st.error("Murid tidak ditemukan.")
-        return df
-    idx = idx_list[0]
-
-    # Ambil dan parse status hafalan (JSON → dict)
     try:
-        status_dict = json.loads(df.loc[idx, 'Status_Hafalan'])
-    except Exception:
-        st.error("Format Status_Hafalan rusak untuk murid ini.")
+        get_service().record_setoran(
+            df, student_id, surah, start_ayat, end_ayat, status_code, guru_pencatat, nilai
+        )
+    except (NotFound, ValueError) as e:
+        st.error(e.args[0])
         return df
 
-    # Update per ayat
-    ayat_list = status_dict.get(surah, [])
-    for i in range(start_ayat - 1, end_ayat):  # 0-index
-        if i < len(ayat_list):
-            ayat_list[i] = status_code
-    status_dict[surah] = ayat_list
-
-    # Simpan balik (dict → JSON string)
-    new_status_json = json.dumps(status_dict)
-    df.loc[idx, 'Status_Hafalan'] = new_status_json
-    df.loc[idx, 'Total_Ayat_Lulus'] = calculate_lulus_count(new_status_json)
-    df.loc[idx, 'Update_Terakhir'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    df.loc[idx, 'Guru_Pencatat'] = guru_pencatat
-
-    # Catat log transaksi setoran
-    student_row = df.loc[df['ID_Murid'] == student_id].iloc[0]
-    log_setoran(student_row, surah, start_ayat, end_ayat, status_code, guru_pencatat)
-
-    # Simpan database utama
-    save_data(df)
+    st.session_state.df = df
+    mark_data_written()
 
     st.success(
         f"Berhasil mencatat setoran {surah} ayat {start_ayat}-{end_ayat} sebagai "
@@ -271,18 +347,22 @@ def update_hafalan_status(
     return df
 
 
-def delete_student(df, student_id, student_name):
+def delete_student(student_id, student_name):
     """
-    Hapus murid dari database utama.
+    Hapus murid dari database utama. Database dibaca ulang di dalam kunci
+    (lihat current_students) agar murid yang baru ditambahkan lewat API tidak ikut terhapus.
     """
-    initial_len = len(df)
-    new_df = df[df['ID_Murid'] != student_id].copy()
-
-    if len(new_df) < initial_len:
-        save_data(new_df)
-        st.success(f"Murid **{student_name}** (ID: {student_id}) berhasil dihapus dari database.")
-    else:
-        st.error(f"Gagal menghapus. Murid dengan ID {student_id} tidak ditemukan.")
+    with get_service().lock:
+        df = ensure_columns(current_students().copy())
+        initial_len = len(df)
+        kelas_murid = df.loc[df['ID_Murid'] == student_id, 'Kelas'].astype(str).unique().tolist()
+        new_df = df[df['ID_Murid'] != student_id].copy()
+
+        if len(new_df) < initial_len:
+            save_data(new_df, kelas=kelas_murid)
+            st.success(f"Murid **{student_name}** (ID: {student_id}) berhasil dihapus dari database.")
+        else:
+            st.error(f"Gagal menghapus. Murid dengan ID {student_id} tidak ditemukan.")
     return new_df
 
 # =============================
@@ -313,13 +393,15 @@ def page_pencatatan_hafalan(df, selected_class, selected_guru):
     student_row = df[df['ID_Murid'] == selected_student_id].iloc[0]
 
     st.subheader(f"Murid: {student_row['Nama_Murid']}")
+    kurikulum = get_curriculum(student_row[CURRICULUM_COLUMN])
 
     progress_percent = int(
-        (student_row['Total_Ayat_Lulus'] / TOTAL_AYAT_JUZ_AMMA) * 100
-        if TOTAL_AYAT_JUZ_AMMA > 0 else 0
+        (student_row['Total_Ayat_Lulus'] / kurikulum.total_ayat) * 100
+        if kurikulum.total_ayat > 0 else 0
     )
     st.info(
-        f"Total Ayat Lulus: {student_row['Total_Ayat_Lulus']} dari {TOTAL_AYAT_JUZ_AMMA} ayat.\n"
+        f"Kurikulum: {kurikulum.nama}.\n"
+        f"Total Ayat Lulus: {student_row['Total_Ayat_Lulus']} dari {kurikulum.total_ayat} ayat.\n"
         f"Progres: {progress_percent}%.\n"
         f"Terakhir Diperbarui: {student_row['Update_Terakhir']}\n"
         f"Dicatat oleh: {student_row.get('Guru_Pencatat', '')}"
@@ -328,13 +410,12 @@ def page_pencatatan_hafalan(df, selected_class, selected_guru):
     st.markdown("---")
     st.subheader("Riwayat Status Ayat per Surah")
 
-    surah_to_setor = st.selectbox("Surah", SURAH_NAMES)
-    max_ayat_current = JUZ_AMMA_MAP.get(surah_to_setor, 1)
+    surah_to_setor = st.selectbox("Surah", kurikulum.surah_names)
+    max_ayat_current = kurikulum.surah_map.get(surah_to_setor, 1)
 
     # tampilkan status per ayat surah yg dipilih
     try:
-        status_dict_full = json.loads(student_row['Status_Hafalan'])
-        ayat_list = status_dict_full.get(surah_to_setor, [])
+        ayat_list = surah_status(student_row['Status_Hafalan'], surah_to_setor, kurikulum)
 
         STATUS_LABELS = {
             0: "⚫ Belum",
@@ -383,6 +464,13 @@ def page_pencatatan_hafalan(df, selected_class, selected_guru):
     )
     status_code = 1 if setoran_status == "Lulus" else 2
 
+    nilai_label = st.select_slider(
+        "Nilai Kelancaran/Tajwid (opsional):",
+        options=["-"] + [str(n) for n in range(NILAI_MIN, NILAI_MAX + 1)],
+        value="-",
+    )
+    nilai = None if nilai_label == "-" else int(nilai_label)
+
     simpan_clicked = st.button("✅ Simpan Catatan")
     if simpan_clicked:
         if selected_guru == "Pilih Guru":
@@ -396,6 +484,7 @@ def page_pencatatan_hafalan(df, selected_class, selected_guru):
                 end_ayat,
                 status_code,
                 selected_guru,
+                nilai,
             )
             st.rerun()
 
@@ -403,36 +492,6 @@ def page_pencatatan_hafalan(df, selected_class, selected_guru):
 # HALAMAN: REKAP PER SURAH PER KELAS
 # =============================
 
-def build_rekap_per_surah(df, selected_class):
-    class_df = df[df['Kelas'] == selected_class]
-    hasil = []
-
-    for surah, total_ayat in JUZ_AMMA_MAP.items():
-        lulus_total = 0
-        mengulang_total = 0
-        belum_total = 0
-
-        for _, row in class_df.iterrows():
-            status_dict = json.loads(row['Status_Hafalan'])
-            ayat_list = status_dict.get(surah, [])
-            lulus_total += ayat_list.count(1)
-            mengulang_total += ayat_list.count(2)
-            belum_total += ayat_list.count(0)
-
-        denom = len(class_df) * total_ayat if len(class_df) > 0 else 1
-        persen = round((lulus_total / denom) * 100, 2) if denom > 0 else 0
-
-        hasil.append({
-            'Surah': surah,
-            'Lulus': lulus_total,
-            'Mengulang': mengulang_total,
-            'Belum': belum_total,
-            'Persentase Lulus (%)': persen,
-        })
-
-    return pd.DataFrame(hasil)
-
-
 def page_rekap_per_surah(df, selected_class):
     st.header("📘 Rekap Hafalan per Surah (per Kelas)")
 
@@ -440,9 +499,18 @@ def page_rekap_per_surah(df, selected_class):
         st.info("Pilih kelas di sidebar untuk melihat rekap per surah.")
         return
 
-    rekap_df = build_rekap_per_surah(df, selected_class)
+    # kelas bisa berisi murid dengan kurikulum berbeda; rekap dibuat per kurikulum
+    kode_kelas = sorted(df.loc[df['Kelas'] == selected_class, CURRICULUM_COLUMN].unique())
+    if len(kode_kelas) > 1:
+        kode = st.selectbox(
+            "Kurikulum", kode_kelas, format_func=lambda k: get_curriculum(k).nama, key="rekap_kurikulum"
+        )
+    else:
+        kode = kode_kelas[0] if kode_kelas else JUZ_AMMA.kode
+    kurikulum = get_curriculum(kode)
+    rekap_df = build_rekap_per_surah(df, selected_class, kurikulum)
 
-    st.subheader(f"Rekap Kelas {selected_class}")
+    st.subheader(f"Rekap Kelas {selected_class} - {kurikulum.nama}")
     st.dataframe(rekap_df, use_container_width=True)
 
     fig = px.bar(
@@ -465,11 +533,16 @@ def page_rekap_per_surah(df, selected_class):
         mime="text/csv",
     )
 
-    pdf_like_text = rekap_df.to_string(index=False)
-    st.download_button(
-        "📄 Unduh PDF Sederhana",
-        data=pdf_like_text.encode('utf-8'),
-        file_name=f"Rekap_{selected_class}.pdf",
+    # matriks kurikulum yang ditampilkan (bukan hanya Juz Amma) menentukan isi rekap
+    matrix_file = matrix_path_for(MATRIX_FILE, kurikulum.kode)
+    export_button(
+        "rekap_surah_pdf",
+        {"kelas": selected_class, "kurikulum": kurikulum.kode},
+        data_version(DB_FILE, matrix_file, matrix_file + NILAI_SUFFIX),
+        f"Rekap_{selected_class}.pdf",
+        lambda progress: render_rekap_surah_pdf(rekap_df, selected_class, logo_path),
+        "⚙️ Siapkan PDF Rekap",
+        "📄 Unduh PDF Rekap",
         mime="application/pdf",
     )
 
@@ -480,8 +553,25 @@ def page_rekap_per_surah(df, selected_class):
 def page_dashboard(df, selected_class):
     st.header("📊 Dashboard & Laporan Progres Kelas")
 
+    leaderboard = school_leaderboard(df)
+    st.subheader("🏆 Peringkat Sekolah")
+    col1, col2 = st.columns(2)
+    cakupan = col1.selectbox("Cakupan", leaderboard.scopes(), key="peringkat_cakupan")
+    top_k = col2.number_input("Tampilkan", min_value=1, max_value=500, value=10, key="peringkat_k")
+    teratas = leaderboard.top(int(top_k), cakupan).join(
+        df.set_index("ID_Murid")[["Nama_Murid", "Kelas"]], on="ID_Murid"
+    )
+    st.dataframe(
+        teratas[["Peringkat", "Peringkat_Padat", "Nama_Murid", "Kelas", "Skor", "Persentil"]].rename(
+            columns={"Peringkat_Padat": "Peringkat Padat", "Nama_Murid": "Murid", "Skor": "Total Ayat Lulus"}
+        ),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    st.markdown("---")
     if selected_class == "Pilih Kelas":
-        st.info("Pilih kelas di sidebar untuk melihat dashboard.")
+        st.info("Pilih kelas di sidebar untuk melihat dashboard kelas.")
         return
 
     st.subheader(f"Papan Peringkat Kelas {selected_class}")
@@ -493,12 +583,24 @@ def page_dashboard(df, selected_class):
         .reset_index(drop=True)
     )
     leaderboard_df.index = leaderboard_df.index + 1
+    leaderboard_df['Target_Ayat'] = leaderboard_df[CURRICULUM_COLUMN].map(lambda k: get_curriculum(k).total_ayat)
+    perkiraan = completion_forecasts(df_current).set_index('ID_Murid')
+    peringkat = leaderboard.ranks(leaderboard_df['ID_Murid'].tolist()).set_index('ID_Murid')
+    leaderboard_df['Peringkat_Sekolah'] = leaderboard_df['ID_Murid'].map(peringkat['Peringkat'])
+    leaderboard_df['Persentil_Sekolah'] = leaderboard_df['ID_Murid'].map(peringkat['Persentil'])
+    leaderboard_df['Laju_Ayat_per_Minggu'] = leaderboard_df['ID_Murid'].map(perkiraan['Laju_Ayat_per_Minggu'])
+    leaderboard_df['Perkiraan_Selesai'] = leaderboard_df['ID_Murid'].map(perkiraan['Perkiraan_Selesai']).dt.date
 
     display_cols = [
         'Nama_Murid',
         'NIS',
         'Kelas',
         'Total_Ayat_Lulus',
+        'Target_Ayat',
+        'Peringkat_Sekolah',
+        'Persentil_Sekolah',
+        'Laju_Ayat_per_Minggu',
+        'Perkiraan_Selesai',
         'Update_Terakhir',
         'Guru_Pencatat',
         'ID_Murid',
@@ -509,6 +611,11 @@ def page_dashboard(df, selected_class):
         'NIS': 'NIS',
         'Kelas': 'Kelas',
         'Total_Ayat_Lulus': 'Total Ayat Lulus',
+        'Target_Ayat': 'Target Ayat',
+        'Peringkat_Sekolah': 'Peringkat Sekolah',
+        'Persentil_Sekolah': 'Persentil Sekolah',
+        'Laju_Ayat_per_Minggu': 'Ayat/Minggu',
+        'Perkiraan_Selesai': 'Perkiraan Selesai',
         'Update_Terakhir': 'Update Terakhir',
         'Guru_Pencatat': 'Dicatat Oleh',
         'ID_Murid': 'ID',
@@ -538,13 +645,8 @@ def page_dashboard(df, selected_class):
         with st.expander(
             f"⭐ {row['Nama_Murid']} - Total Lulus: {row['Total_Ayat_Lulus']} Ayat (Dicatat oleh {row.get('Guru_Pencatat','')})"
         ):
-            status_dict = json.loads(row['Status_Hafalan'])
-            for surah, ayat_list in status_dict.items():
-                total_ayat_surah = JUZ_AMMA_MAP[surah]
-                lulus_count = ayat_list.count(1)
-                mengulang_count = ayat_list.count(2)
-                belum_count = ayat_list.count(0)
-
+            ringkasan = surah_summary(row['Status_Hafalan'], get_curriculum(row[CURRICULUM_COLUMN]))
+            for surah, total_ayat_surah, lulus_count, mengulang_count, belum_count in ringkasan.itertuples(index=False):
                 progress_ratio = (lulus_count / total_ayat_surah) if total_ayat_surah > 0 else 0
                 st.progress(
                     progress_ratio,
@@ -565,10 +667,20 @@ def page_riwayat_setoran():
         st.info("Belum ada data log setoran.")
         return
 
-    df_log = pd.read_csv(LOG_FILE)
+    # Tahun ajaran berjalan dibaca dari log panas; tahun sebelumnya dari arsip
+    tahun_ajaran_ini = academic_year(datetime.now())
+    periode_arsip = sorted({p["period"] for p in load_manifest(ARCHIVE_DIR)["partitions"]}, reverse=True)
+    periode_opsi = [tahun_ajaran_ini] + [p for p in periode_arsip if p != tahun_ajaran_ini]
+    if periode_arsip:
+        periode_opsi.append("Semua Tahun Ajaran")
+    selected_periode = st.selectbox("Tahun Ajaran", periode_opsi, key="riwayat_periode")
 
-    # Tambahkan kolom Tanggal (date-only) utk filter harian
-    df_log['Tanggal'] = pd.to_datetime(df_log['Timestamp']).dt.date
+    if selected_periode == "Semua Tahun Ajaran":
+        df_log = read_log(LOG_FILE)
+    else:
+        awal = academic_year_start(pd.Timestamp(year=int(selected_periode[:4]), month=12, day=1))
+        df_log = read_log(LOG_FILE, start=awal, end=awal + pd.DateOffset(years=1))
+    df_log = df_log.drop(columns=["Jumlah_Ayat"], errors="ignore")
 
     tanggal_unik = sorted(df_log['Tanggal'].unique(), reverse=True)
     guru_unik = ["Semua Guru"] + sorted(df_log['Guru_Pencatat'].dropna().unique())
@@ -597,54 +709,64 @@ def page_riwayat_setoran():
 # HALAMAN BARU: 📅 LAPORAN BULANAN
 # =============================
 
-def page_laporan_bulanan():
+def page_laporan_bulanan(df):
     st.header("📅 Laporan Bulanan Hafalan Juz Amma")
 
-    if not os.path.exists(DB_FILE):
-        st.info("Belum ada data hafalan yang tersimpan.")
-        return
-
-    df = pd.read_csv(DB_FILE)
-
     if df.empty:
         st.warning("Database masih kosong.")
         return
 
-    # --- Dapatkan bulan & tahun laporan sekarang ---
+    # --- Pilih bulan laporan (default: bulan berjalan) ---
     import calendar
-    today = datetime.now()
-    bulan_text = calendar.month_name[today.month]
-    tahun_text = today.year
-    judul_laporan = f"Laporan Hafalan Juz Amma Bulan {bulan_text} {tahun_text}"
+    bulan_opsi = recent_months()
+    selected_month = st.selectbox(
+        "Bulan Laporan",
+        bulan_opsi,
+        format_func=lambda ym: f"{calendar.month_name[ym[1]]} {ym[0]}",
+        key="laporan_bulan",
+    )
+    tahun, bulan = selected_month
+    judul_laporan = f"Laporan Hafalan Juz Amma Bulan {calendar.month_name[bulan]} {tahun}"
+    st.subheader(judul_laporan)
 
-    st.info("Laporan ini menampilkan rekap per siswa, surah yang sudah dinyatakan *lulus*, dan persentase hafalan terhadap seluruh Juz Amma.")
+    st.info(
+        "Laporan dihitung dari log setoran bulan terpilih: ayat yang menjadi *lulus* bulan ini, "
+        "surah yang selesai bulan ini, dan selisihnya dibanding bulan sebelumnya. "
+        "Laporan bulan yang sudah lewat disimpan sebagai snapshot dan tidak dihitung ulang."
+    )
 
-    hasil_data = []
-    for _, row in df.iterrows():
-        try:
-            status_dict = json.loads(row["Status_Hafalan"])
-        except Exception:
-            continue
-
-        surah_lulus = []
-        total_ayat_lulus = 0
-        for surah, ayat_list in status_dict.items():
-            total_ayat_lulus += ayat_list.count(1)
-            if all(a == 1 for a in ayat_list) and len(ayat_list) > 0:
-                surah_lulus.append(surah)
-
-        persen = round((total_ayat_lulus / TOTAL_AYAT_JUZ_AMMA) * 100, 2)
-
-        hasil_data.append({
-            "NIS": row.get("NIS", ""),
-            "Nama": row["Nama_Murid"],
-            "Kelas": row["Kelas"],
-            "Surah Lulus": ", ".join(surah_lulus) if surah_lulus else "-",
-            "% Hafalan Juz Amma": persen
-        })
-
-    laporan_df = pd.DataFrame(hasil_data)
-    st.dataframe(laporan_df, use_container_width=True)
+    laporan_df, dari_snapshot = load_monthly_report(df, LOG_FILE, tahun, bulan, SNAPSHOT_DIR)
+    if dari_snapshot:
+        st.caption("📌 Dibaca dari snapshot laporan yang sudah dibekukan.")
+
+    kelas_opsi = ["Semua Kelas"] + sorted(laporan_df["Kelas"].astype(str).unique().tolist())
+    selected_kelas = st.selectbox("Filter Kelas", kelas_opsi, key="laporan_bulan_kelas")
+    if selected_kelas != "Semua Kelas":
+        laporan_df = laporan_df[laporan_df["Kelas"].astype(str) == selected_kelas]
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric(
+        "Setoran",
+        int(laporan_df["Setoran Bulan Ini"].sum()),
+        delta=int(laporan_df["Selisih Setoran vs Bulan Lalu"].sum()),
+    )
+    col2.metric(
+        "Ayat Lulus",
+        int(laporan_df["Ayat Lulus Bulan Ini"].sum()),
+        delta=int(laporan_df["Selisih Ayat Lulus vs Bulan Lalu"].sum()),
+    )
+    col3.metric("Mengulang", int(laporan_df["Mengulang Bulan Ini"].sum()))
+    col4.metric("Murid Aktif", int((laporan_df["Setoran Bulan Ini"] > 0).sum()))
+
+    st.dataframe(laporan_df.drop(columns=["ID_Murid"]), use_container_width=True)
+
+    csv_bytes = laporan_df.to_csv(index=False).encode("utf-8")
+    st.download_button(
+        "📥 Unduh Laporan Bulanan (CSV)",
+        data=csv_bytes,
+        file_name=f"Laporan_Bulanan_{tahun}-{bulan:02d}.csv",
+        mime="text/csv",
+    )
 
     # LAPORAN TAHUNAN YTD
 
@@ -655,146 +777,144 @@ def page_laporan_tahunan():
         st.warning("Data hafalan belum lengkap (log atau database tidak ditemukan).")
         return
 
-    df_log = pd.read_csv(LOG_FILE)
-    df_data = pd.read_csv(DB_FILE)
+    tahun_ini = datetime.now().year
+    df_log = read_log(
+        LOG_FILE,
+        start=pd.Timestamp(year=tahun_ini, month=1, day=1),
+        columns=["ID_Murid", "Ayat_Dari", "Ayat_Sampai", "Status"],
+    )
+    df_data = ensure_columns(load_database())
 
     if df_log.empty or df_data.empty:
         st.warning("Belum ada data untuk ditampilkan.")
         return
 
-    df_log["Timestamp"] = pd.to_datetime(df_log["Timestamp"], errors="coerce")
-    df_log = df_log.dropna(subset=["Timestamp"])
-    df_log["Tahun"] = df_log["Timestamp"].dt.year
-    tahun_ini = datetime.now().year
-
-    df_log_tahun = df_log[df_log["Tahun"] == tahun_ini].copy()
-    if df_log_tahun.empty:
+    laporan_df = build_annual_report(df_data, df_log, tahun_ini)
+    if laporan_df.empty:
         st.info(f"Belum ada data setoran untuk tahun {tahun_ini}.")
         return
 
-    hasil = []
-    for _, murid in df_data.iterrows():
-        murid_log = df_log_tahun[df_log_tahun["ID_Murid"] == murid["ID_Murid"]]
-        if murid_log.empty:
-            continue
-
-        jumlah_setoran = len(murid_log)
-        jumlah_lulus = (murid_log["Status"] == "Lulus").sum()
-        jumlah_mengulang = (murid_log["Status"] == "Mengulang").sum()
-
-        # total ayat lulus kumulatif
-        df_lulus = murid_log[murid_log["Status"] == "Lulus"].copy()
-        df_lulus["Jumlah_Ayat"] = df_lulus["Ayat_Sampai"] - df_lulus["Ayat_Dari"] + 1
-        total_ayat_lulus = df_lulus["Jumlah_Ayat"].sum()
-        persen = round((total_ayat_lulus / TOTAL_AYAT_JUZ_AMMA) * 100, 2)
-
-        # ambil surah yang sudah lulus penuh dari data utama
-        try:
-            status_dict = json.loads(murid["Status_Hafalan"])
-            surah_lulus = [
-                s for s, a in status_dict.items() if all(x == 1 for x in a) and len(a) > 0
-            ]
-        except Exception:
-            surah_lulus = []
-
-        hasil.append({
-            "NIS": murid.get("NIS", ""),
-            "Nama": murid["Nama_Murid"],
-            "Kelas": murid["Kelas"],
-            "Jumlah Setoran Tahun Ini": jumlah_setoran,
-            "Jumlah Lulus": jumlah_lulus,
-            "Jumlah Mengulang": jumlah_mengulang,
-            "% Hafalan Juz Amma": persen,
-            "Surah Lulus": ", ".join(surah_lulus) if surah_lulus else "-",
-        })
-
-    laporan_df = pd.DataFrame(hasil)
     st.dataframe(laporan_df, use_container_width=True)
 
-    # === Simpan Excel ===
-    from io import BytesIO
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, Alignment
-    from openpyxl.cell.cell import MergedCell
-
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        sheet_name = f"Laporan {tahun_ini}"
-        laporan_df.to_excel(writer, sheet_name=sheet_name, index=False, startrow=2)
-        sheet = writer.sheets[sheet_name]
-
-        sheet["A1"] = f"Laporan Tahunan Hafalan Juz Amma - Tahun {tahun_ini}"
-        sheet["A1"].font = Font(size=14, bold=True)
-        sheet["A1"].alignment = Alignment(horizontal="center")
-
-        max_col = len(laporan_df.columns)
-        sheet.merge_cells(start_row=1, start_column=1, end_row=1, end_column=max_col)
-
-        # format header tabel
-        for col_cells in sheet.iter_cols(min_row=3, max_row=3):
-            for cell in col_cells:
-                cell.font = Font(bold=True)
-                cell.alignment = Alignment(horizontal="center")
-
-        # lebar kolom otomatis
-        for column_cells in sheet.columns:
-            first_real_cell = next((cell for cell in column_cells if not isinstance(cell, MergedCell)), None)
-            if first_real_cell is None:
-                continue
-            column_letter = first_real_cell.column_letter
-            length = max(len(str(cell.value)) if cell.value is not None else 0 for cell in column_cells)
-            sheet.column_dimensions[column_letter].width = length + 3
-
-    file_name = f"Laporan_Hafalan_Tahunan_{tahun_ini}.xlsx"
-    st.download_button(
-        label="📥 Unduh Laporan Tahunan (Excel)",
-        data=output.getvalue(),
-        file_name=file_name,
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
-
-    # --------------------------
-    # SIMPAN SEBAGAI EXCEL (XLSX)
-    # --------------------------
-    from io import BytesIO
-    from openpyxl import Workbook
-    from openpyxl.styles import Alignment, Font
-
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        laporan_df.to_excel(writer, sheet_name="Laporan Bulanan", index=False, startrow=2)
-
-        sheet = writer.sheets["Laporan Bulanan"]
+    # === Ekspor Excel lewat antrian background ===
+    # File hanya dibangun saat diminta, di thread pool, dan disimpan di cache
+    # dengan kunci (jenis laporan, tahun, versi data).
+    versi = data_version(DB_FILE, MATRIX_FILE, LOG_FILE)
+    col_a, col_b = st.columns(2)
+    with col_a:
+        export_button(
+            "laporan_tahunan",
+            {"tahun": tahun_ini},
+            versi,
+            f"Laporan_Hafalan_Tahunan_{tahun_ini}.xlsx",
+            lambda progress: build_annual_excel(laporan_df, tahun_ini, progress),
+            "⚙️ Siapkan File Excel Laporan Tahunan",
+            "📥 Unduh Laporan Tahunan (Excel)",
+        )
+    with col_b:
+        export_button(
+            "laporan_tahunan_per_kelas",
+            {"tahun": tahun_ini},
+            versi,
+            f"Laporan_Hafalan_Tahunan_{tahun_ini}_per_Kelas.xlsx",
+            lambda progress: build_school_workbook(
+                laporan_df, f"Laporan Tahunan Hafalan Juz Amma {tahun_ini}", "Kelas", progress
+            ),
+            "⚙️ Siapkan Excel Satu Sekolah (Sheet per Kelas)",
+            "📥 Unduh Excel Satu Sekolah (Sheet per Kelas)",
+        )
 
-        # Tulis judul besar di baris 1
-        sheet["A1"] = f"Laporan Tahunan Hafalan Juz Amma - Tahun {tahun_ini}"
-        sheet["A1"].font = Font(size=14, bold=True)
-        sheet["A1"].alignment = Alignment(horizontal="center")
+    export_button(
+        "laporan_tahunan_pdf",
+        {"tahun": tahun_ini},
+        versi,
+        f"Laporan_Hafalan_Tahunan_{tahun_ini}.pdf",
+        lambda progress: render_annual_pdf(laporan_df, tahun_ini, logo_path),
+        "⚙️ Siapkan PDF Laporan Tahunan",
+        "📄 Unduh Laporan Tahunan (PDF)",
+        mime="application/pdf",
+    )
 
-        # Merge sel judul agar lebar seperti tabel
-        max_col = len(laporan_df.columns)
-        sheet.merge_cells(start_row=1, start_column=1, end_row=1, end_column=max_col)
+    # === Cetak massal: semua kelas / semua murid dalam satu ZIP ===
+    with st.expander("🖨️ Cetak Massal PDF (ZIP)"):
+        mode_label = {
+            BATCH_REKAP_KELAS: "Rekap per surah untuk setiap kelas",
+            BATCH_PROFIL_MURID: "Kartu progres untuk setiap murid",
+        }
+        mode = st.radio(
+            "Jenis Dokumen",
+            list(mode_label.keys()),
+            format_func=mode_label.get,
+            key="batch_pdf_mode",
+        )
+        kelas_batch = st.multiselect(
+            "Kelas (kosongkan untuk seluruh sekolah)",
+            sorted(df_data["Kelas"].astype(str).unique().tolist()),
+            key="batch_pdf_kelas",
+        )
+        st.caption("PDF dirender paralel di beberapa proses; hasilnya dikemas per folder kelas.")
+        export_button(
+            f"batch_pdf_{mode}",
+            {"mode": mode, "kelas": sorted(kelas_batch)},
+            versi,
+            f"PDF_{mode}_{tahun_ini}.zip",
+            lambda progress: render_batch_zip(
+                df_data, read_log(LOG_FILE), mode, logo_path, kelas=kelas_batch or None, progress=progress
+            ),
+            "⚙️ Siapkan ZIP PDF",
+            "📦 Unduh ZIP PDF",
+            mime="application/zip",
+        )
 
-    # Lebarkan kolom otomatis — skip sel merge agar tidak error
-    from openpyxl.cell.cell import MergedCell
 
-    for column_cells in sheet.columns:
-        # ambil huruf kolom dari sel pertama yang BUKAN merged
-        first_real_cell = next((cell for cell in column_cells if not isinstance(cell, MergedCell)), None)
-        if first_real_cell is None:
-            continue
-        column_letter = first_real_cell.column_letter
-        length = max(len(str(cell.value)) if cell.value is not None else 0 for cell in column_cells)
-        sheet.column_dimensions[column_letter].width = length + 3
+@st.cache_resource
+def get_export_manager():
+    """Satu antrian ekspor untuk seluruh sesi aplikasi."""
+    return ExportJobManager(EXPORT_CACHE_DIR)
 
-    file_name = f"Laporan_Hafalan_Tahunan_{tahun_ini}.xlsx"
 
-    st.download_button(
-        label="📥 Unduh Laporan Bulanan (Excel)",
-        data=output.getvalue(),
-        file_name=file_name,
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
+@st.fragment(run_every=1)
+def _poll_export_job(job):
+    """Memantau progres job; rerun halaman begitu file siap diunduh."""
+    if job.status in (JOB_PENDING, JOB_RUNNING):
+        st.progress(job.progress, text=f"Menyiapkan {job.filename} ({job.status})...")
+    else:
+        st.rerun()
+
+
+def export_button(
+    report_type,
+    params,
+    version,
+    file_name,
+    builder,
+    prepare_label,
+    download_label,
+    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+):
+    """
+    Tombol ekspor berbasis antrian: "Siapkan" mengantrikan job, lalu progres
+    dipantau, dan setelah selesai tombol unduh membaca bytes dari cache.
+    """
+    manager = get_export_manager()
+    job = manager.get(report_type, params, version, file_name)
+
+    if job.status in (JOB_IDLE, JOB_FAILED):
+        if job.status == JOB_FAILED:
+            st.error(f"Gagal membuat {file_name}: {job.error.splitlines()[0] if job.error else ''}")
+        if st.button(prepare_label, key=f"export_{report_type}"):
+            manager.submit(report_type, params, version, file_name, builder)
+            st.rerun()
+    elif job.done:
+        st.download_button(
+            label=download_label,
+            data=job.read_bytes(),
+            file_name=job.filename,
+            mime=mime,
+            key=f"download_{report_type}",
+        )
+    else:
+        _poll_export_job(job)
 
 # =============================
 # SIDEBAR (NAVIGASI + ADMINISTRASI)
@@ -822,6 +942,11 @@ def sidebar_controls(df):
             "📆 Laporan Tahunan (YTD)",
             "👤 Profil Murid",
             "🏫 Pantauan Kelas",
+            "🔁 Murajaah Hari Ini",
+            "🧩 Ayat Tersulit",
+            "👩‍🏫 Aktivitas Guru",
+            "📈 Perbandingan Angkatan",
+            "🎓 Administrasi Kelas",
         ],
     )
 
@@ -863,20 +988,23 @@ def sidebar_controls(df):
                 else:
                     st.error("Nama dan Kelas tidak boleh kosong.")
 
-    # Impor massal CSV
-    with st.sidebar.expander("⬆️ Impor Massal (CSV)"):
+    # Impor massal CSV / Excel
+    with st.sidebar.expander("⬆️ Impor Massal (CSV / Excel)"):
         st.markdown(
             "**Kolom wajib:** `Nama_Murid`, `Kelas`.\n\n"
             "**Opsional:** `NIS`.\n\n"
-            "Gunakan pemisah `;` (titik koma)."
+            "CSV gunakan pemisah `;` (titik koma). File Excel ekspor Dapodik "
+            "(kolom `Nama`, `NIPD`, `Rombel Saat Ini`) dikenali otomatis. "
+            "Murid dengan NIS yang sudah ada akan diperbarui (nama/kelas), progres hafalannya tetap."
         )
         uploaded_file = st.file_uploader(
-            "Pilih file CSV", type=["csv"], key="csv_uploader"
+            "Pilih file CSV / Excel", type=["csv", "xlsx"], key="csv_uploader"
         )
         if uploaded_file is not None:
             if st.button("Proses Impor Data"):
-                import_students_from_csv(uploaded_file)
+                import_students_from_file(uploaded_file)
                 st.rerun()
+    show_import_report()
 
     # Hapus murid permanen
     with st.sidebar.expander("🗑️ Hapus Murid"):
@@ -932,7 +1060,7 @@ def sidebar_controls(df):
                     f"✅ KONFIRMASI HAPUS {student_name_to_delete}",
                     key="confirm_delete_button",
                 ):
-                    delete_student(st.session_state.df.copy(), student_id_to_delete, student_name_to_delete)
+                    delete_student(student_id_to_delete, student_name_to_delete)
                     st.rerun()
             else:
                 st.warning("Murid yang dipilih tidak dapat diidentifikasi. Coba filter ulang.")
@@ -972,7 +1100,7 @@ def main_app():
         page_riwayat_setoran()
 
     elif menu == "📅 Laporan Bulanan":
-        page_laporan_bulanan()
+        page_laporan_bulanan(df)
         
     elif menu == "📆 Laporan Tahunan (YTD)":
         page_laporan_tahunan()
@@ -983,6 +1111,21 @@ def main_app():
     elif menu == "🏫 Pantauan Kelas":
         page_pantauan_kelas(df)
 
+    elif menu == "🔁 Murajaah Hari Ini":
+        page_murajaah(df)
+
+    elif menu == "🧩 Ayat Tersulit":
+        page_ayat_tersulit(df)
+
+    elif menu == "👩‍🏫 Aktivitas Guru":
+        page_aktivitas_guru()
+
+    elif menu == "📈 Perbandingan Angkatan":
+        page_perbandingan_angkatan(df)
+
+    elif menu == "🎓 Administrasi Kelas":
+        page_administrasi_kelas(df)
+
 # =============================
 # HALAMAN BARU: 👤 PROFIL MURID
 # =============================
@@ -1005,28 +1148,48 @@ def page_profil_murid(df):
         return
 
     murid_id = murid_map[selected_murid]
-    df_log = pd.read_csv(LOG_FILE)
-    df_log["Timestamp"] = pd.to_datetime(df_log["Timestamp"])
-    df_log["Tanggal"] = df_log["Timestamp"].dt.date
-    df_murid = df_log[df_log["ID_Murid"] == murid_id]
+    rollups = get_rollups()
+    harian = rollups.student_series(murid_id)
 
-    if df_murid.empty:
+    if harian.empty:
         st.info("Belum ada histori setoran untuk murid ini.")
         return
 
-    total_setoran = len(df_murid)
-    total_lulus = (df_murid["Status"] == "Lulus").sum()
-    total_mengulang = (df_murid["Status"] == "Mengulang").sum()
+    total_setoran = int(harian["Setoran"].sum())
+    total_mengulang = int(harian["Mengulang"].sum())
     col1, col2, col3 = st.columns(3)
     col1.metric("Total Setoran", total_setoran)
-    col2.metric("Lulus", total_lulus)
+    col2.metric("Lulus", total_setoran - total_mengulang)
     col3.metric("Mengulang", total_mengulang)
 
-    # Hanya ayat Lulus (kumulatif)
-    df_lulus = df_murid[df_murid["Status"] == "Lulus"].copy()
-    df_lulus["Jumlah_Ayat"] = df_lulus["Ayat_Sampai"] - df_lulus["Ayat_Dari"] + 1
-    progres = df_lulus.groupby("Tanggal")["Jumlah_Ayat"].sum().reset_index()
-    progres["Kumulatif"] = progres["Jumlah_Ayat"].cumsum()
+    murid_row = df[df["ID_Murid"] == murid_id]
+    leaderboard = school_leaderboard(df)
+    tingkat = leaderboard.scope_of[murid_id]
+    col1, col2 = st.columns(2)
+    for col, cakupan, label in ((col1, SCOPE_SCHOOL, "Peringkat Sekolah"), (col2, tingkat, f"Peringkat Tingkat {tingkat}")):
+        posisi = leaderboard.rank(murid_id, cakupan)
+        col.metric(
+            label,
+            f"{posisi['Peringkat']} / {len(leaderboard.indexes[cakupan])}",
+            f"persentil {posisi['Persentil']}",
+            delta_color="off",
+        )
+
+    perkiraan = completion_forecasts(df).set_index("ID_Murid").loc[murid_id]
+    target_nama = get_curriculum(murid_row[CURRICULUM_COLUMN].iloc[0]).nama
+    if perkiraan["Sisa_Ayat"] == 0:
+        st.success(f"🎉 Target {target_nama} sudah selesai.")
+    elif pd.isna(perkiraan["Perkiraan_Selesai"]):
+        st.info(f"Perkiraan selesai {target_nama} belum bisa dihitung (belum ada ayat Lulus dalam {JENDELA_MINGGU} minggu terakhir).")
+    else:
+        st.info(
+            f"📅 Perkiraan selesai {target_nama}: **{perkiraan['Perkiraan_Selesai']:%Y-%m-%d}** "
+            f"(sisa {perkiraan['Sisa_Ayat']} ayat, laju {perkiraan['Laju_Ayat_per_Minggu']} ayat/minggu)"
+        )
+
+    # Hanya ayat Lulus (kumulatif), langsung dari rollup harian
+    progres = harian[harian["Ayat_Lulus"] > 0].copy()
+    progres["Kumulatif"] = progres["Ayat_Lulus"].cumsum()
 
     st.subheader("📈 Grafik Perkembangan Hafalan (Ayat Lulus Kumulatif)")
     if not progres.empty:
@@ -1036,10 +1199,36 @@ def page_profil_murid(df):
         st.info("Belum ada data 'Lulus' untuk murid ini.")
 
     st.subheader("📚 Surah yang Paling Sering Disetorkan")
+    # hanya baris murid ini yang didekode (termasuk arsip), bukan seluruh histori sekolah
+    df_murid = read_log(LOG_FILE, students=murid_row[["ID_Murid", "Nama_Murid", "Kelas"]], student_ids=[murid_id])
     surah_count = df_murid.groupby(["Surah", "Status"]).size().reset_index(name="Jumlah_Setoran")
     fig2 = px.bar(surah_count, x="Surah", y="Jumlah_Setoran", color="Status", barmode="group")
     st.plotly_chart(fig2, use_container_width=True)
 
+    st.subheader("🔁 Antrian Murajaah")
+    murid_df = df[df["ID_Murid"] == murid_id]
+    antrian = MurajaahQueue(
+        class_murajaah(murid_df, df_murid, maks_ayat=None), get_curriculum(murid_df[CURRICULUM_COLUMN].iloc[0])
+    )
+    if len(antrian):
+        st.caption(f"{len(antrian)} rentang ayat jatuh tempo; 5 teratas (paling terlambat dulu):")
+        st.dataframe(pd.DataFrame(antrian.take(5)).drop(columns=["ID_Murid"]), use_container_width=True, hide_index=True)
+    else:
+        st.caption("Tidak ada ayat yang perlu dimurajaah hari ini.")
+
+    st.markdown("---")
+    student = df[df["ID_Murid"] == murid_id].iloc[0].to_dict()
+    export_button(
+        "profil_murid_pdf",
+        {"id_murid": int(murid_id)},
+        data_version(DB_FILE, MATRIX_FILE, LOG_FILE),
+        f"Profil_{student['Nama_Murid']}.pdf",
+        lambda progress: render_student_profile_pdf(student, df_murid, logo_path),
+        "⚙️ Siapkan Kartu Progres (PDF)",
+        "📄 Unduh Kartu Progres (PDF)",
+        mime="application/pdf",
+    )
+
 
 # =============================
 # HALAMAN BARU: 🏫 PANTAUAN KELAS
@@ -1052,37 +1241,358 @@ def page_pantauan_kelas(df):
         st.info("Belum ada data log setoran.")
         return
 
-    df_log = pd.read_csv(LOG_FILE)
-    df_log["Timestamp"] = pd.to_datetime(df_log["Timestamp"])
-    df_log["Tanggal"] = df_log["Timestamp"].dt.date
-    df_log["Jumlah_Ayat"] = df_log["Ayat_Sampai"] - df_log["Ayat_Dari"] + 1
-    df_lulus = df_log[df_log["Status"] == "Lulus"]
-
     kelas_list = sorted(df["Kelas"].unique().tolist())
     selected_class = st.selectbox("Pilih Kelas", kelas_list, key="pantau_kelas")
-    df_kelas = df_lulus[df_lulus["Kelas"] == selected_class]
 
-    if df_kelas.empty:
+    st.subheader("🔎 Ayat dengan Nilai Rendah")
+    col_n, col_h = st.columns(2)
+    batas_nilai = col_n.slider("Nilai di bawah", NILAI_MIN + 1, NILAI_MAX, 3, key="pantau_nilai")
+    hari = col_h.number_input("Dinilai dalam (hari) terakhir", min_value=1, value=30, key="pantau_hari")
+    murid_kelas = df[df["Kelas"] == selected_class]
+    nilai_rendah = get_status_matrices().low_grades(
+        murid_kelas, batas_nilai, datetime.now() - timedelta(days=int(hari))
+    )
+    if nilai_rendah.empty:
+        st.caption("Tidak ada ayat dengan nilai rendah pada rentang ini.")
+    else:
+        nama = murid_kelas.set_index("ID_Murid")["Nama_Murid"]
+        nilai_rendah.insert(1, "Nama_Murid", nilai_rendah["ID_Murid"].map(nama))
+        st.dataframe(
+            nilai_rendah.sort_values(["Nama_Murid", "Tanggal_Nilai"]), use_container_width=True, hide_index=True
+        )
+
+    rollups = get_rollups()
+    progres = rollups.class_series(selected_class)
+    progres = progres[progres["Ayat_Lulus"] > 0]
+    if progres.empty:
         st.info("Belum ada data 'Lulus' untuk kelas ini.")
         return
 
-    progres = df_kelas.groupby("Tanggal")["Jumlah_Ayat"].sum().reset_index()
-    progres["Kumulatif"] = progres["Jumlah_Ayat"].cumsum()
+    progres["Kumulatif"] = progres["Ayat_Lulus"].cumsum()
     st.subheader(f"📈 Perkembangan Kelas {selected_class}")
     fig = px.line(progres, x="Tanggal", y="Kumulatif", markers=True, title=f"Total Ayat Lulus Kelas {selected_class}")
     st.plotly_chart(fig, use_container_width=True)
 
     st.subheader("👩‍🏫 Guru Pencatat Teraktif")
-    guru_rank = (
-        df_kelas.groupby("Guru_Pencatat")
-        .size()
-        .reset_index(name="Jumlah_Setoran_Lulus")
-        .sort_values("Jumlah_Setoran_Lulus", ascending=False)
-    )
+    guru_rank = class_teacher_counts(rollups.teacher_daily(), selected_class)
     st.dataframe(guru_rank, use_container_width=True)
     fig2 = px.bar(guru_rank, x="Guru_Pencatat", y="Jumlah_Setoran_Lulus", title=f"Aktivitas Guru di {selected_class}")
     st.plotly_chart(fig2, use_container_width=True)
 
+# =============================
+# HALAMAN BARU: 🔁 MURAJAAH HARI INI
+# =============================
+
+def page_murajaah(df):
+    st.header("🔁 Murajaah Hari Ini")
+    st.caption(
+        "Ayat yang sudah Lulus dijadwalkan ulang dengan jarak "
+        + ", ".join(str(h) for h in INTERVAL_HARI)
+        + " hari setelah setiap setoran Lulus. Catat murajaah lewat halaman Pencatatan Hafalan."
+    )
+
+    kelas_list = sorted(df["Kelas"].unique().tolist())
+    col1, col2 = st.columns(2)
+    selected_class = col1.selectbox("Pilih Kelas", kelas_list, key="murajaah_kelas")
+    maks_ayat = col2.number_input("Maksimal ayat per murid", min_value=1, value=MAKS_AYAT_HARIAN, key="murajaah_maks")
+
+    murid_kelas = df[df["Kelas"] == selected_class]
+    df_log = read_log(LOG_FILE, columns=["ID_Murid", "Surah", "Ayat_Dari", "Ayat_Sampai", "Status"])
+    daftar = class_murajaah(murid_kelas, df_log, maks_ayat=int(maks_ayat))
+    if daftar.empty:
+        st.info("Tidak ada ayat yang perlu dimurajaah hari ini.")
+        return
+
+    daftar.insert(1, "Nama_Murid", daftar["ID_Murid"].map(murid_kelas.set_index("ID_Murid")["Nama_Murid"]))
+    col1, col2 = st.columns(2)
+    col1.metric("Murid dengan Murajaah", daftar["ID_Murid"].nunique())
+    col2.metric("Total Ayat", int(daftar["Jumlah_Ayat"].sum()))
+    st.dataframe(daftar, use_container_width=True, hide_index=True)
+
+    st.download_button(
+        "📥 Unduh CSV Murajaah",
+        data=daftar.to_csv(index=False).encode("utf-8"),
+        file_name=f"murajaah_{selected_class}_{datetime.now():%Y-%m-%d}.csv",
+        mime="text/csv",
+    )
+
+# =============================
+# HALAMAN BARU: 🧩 AYAT TERSULIT
+# =============================
+
+def page_ayat_tersulit(df):
+    st.header("🧩 Ayat & Surah Tersulit")
+
+    if not os.path.exists(LOG_FILE):
+        st.info("Belum ada data log setoran.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    cakupan = col1.selectbox(
+        "Cakupan", ["Seluruh Sekolah"] + sorted(df["Kelas"].unique().tolist()), key="sulit_cakupan"
+    )
+    kode_list = sorted(df[CURRICULUM_COLUMN].unique())
+    kode = col2.selectbox(
+        "Kurikulum", kode_list, format_func=lambda k: get_curriculum(k).nama, key="sulit_kurikulum"
+    )
+    min_percobaan = col3.number_input("Minimal percobaan per ayat", min_value=1, value=5, key="sulit_min")
+    kurikulum = get_curriculum(kode)
+
+    df_log = read_log(LOG_FILE, columns=["ID_Murid", "Surah", "Ayat_Dari", "Ayat_Sampai", "Status"])
+    murid = df[df[CURRICULUM_COLUMN] == kode]
+    if cakupan != "Seluruh Sekolah":
+        murid = murid[murid["Kelas"] == cakupan]
+    per_ayat = ayat_difficulty(df_log, kurikulum, murid["ID_Murid"])
+    per_surah = surah_difficulty(per_ayat)
+
+    st.subheader("📉 Persen Mengulang per Surah")
+    fig = px.bar(
+        per_surah.dropna(subset=["Persen_Mengulang"]),
+        x="Surah",
+        y="Persen_Mengulang",
+        color="Rata_Hari_ke_Lulus",
+        title=f"Persen Setoran Mengulang per Surah - {cakupan}",
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    st.dataframe(per_surah, use_container_width=True, hide_index=True)
+
+    st.subheader("🔥 Ayat Paling Sering Mengulang")
+    tersulit = per_ayat[per_ayat["Percobaan"] >= min_percobaan].sort_values(
+        ["Persen_Mengulang", "Percobaan"], ascending=False
+    )
+    st.dataframe(tersulit.head(50), use_container_width=True, hide_index=True)
+
+    sheets = {"Per Surah": per_surah, "Per Ayat": per_ayat}
+    if cakupan == "Seluruh Sekolah":
+        st.subheader("🏫 Persen Mengulang per Kelas")
+        per_kelas = class_surah_rates(df_log, murid, kurikulum)
+        if not per_kelas.empty:
+            fig2 = px.imshow(per_kelas, aspect="auto", color_continuous_scale="Reds", labels={"color": "% Mengulang"})
+            st.plotly_chart(fig2, use_container_width=True)
+        sheets["Per Kelas"] = per_kelas.reset_index(names="Kelas")
+
+    st.download_button(
+        "📥 Unduh CSV Per Ayat",
+        data=per_ayat.to_csv(index=False).encode("utf-8"),
+        file_name=f"ayat_tersulit_{cakupan}.csv",
+        mime="text/csv",
+    )
+    export_button(
+        "ayat_tersulit_xlsx",
+        {"cakupan": cakupan, "kurikulum": kode},
+        data_version(DB_FILE, LOG_FILE),
+        f"Ayat_Tersulit_{cakupan}.xlsx",
+        lambda progress: build_sheets_workbook(sheets, f"Ayat Tersulit {cakupan}", progress),
+        "⚙️ Siapkan Excel",
+        "📊 Unduh Excel",
+    )
+
+# =============================
+# HALAMAN BARU: 👩‍🏫 AKTIVITAS GURU
+# =============================
+
+def page_aktivitas_guru():
+    st.header("👩‍🏫 Aktivitas Guru Pencatat")
+
+    if not os.path.exists(LOG_FILE):
+        st.info("Belum ada data log setoran.")
+        return
+
+    rollups = get_rollups()
+    daily = rollups.teacher_daily()
+    if daily.empty:
+        st.info("Belum ada setoran yang tercatat.")
+        return
+
+    ringkasan = teacher_summary(daily)
+    st.subheader("📋 Ringkasan per Guru")
+    st.caption(f"Jendela berjalan {' dan '.join(str(h) for h in JENDELA_HARI)} hari terakhir, termasuk hari ini.")
+    st.dataframe(ringkasan, use_container_width=True, hide_index=True)
+
+    jendela = max(JENDELA_HARI)
+    fig = px.bar(
+        ringkasan,
+        x="Guru_Pencatat",
+        y=f"Setoran_{jendela}_Hari",
+        color=f"Kelas_{jendela}_Hari",
+        title=f"Setoran per Guru ({jendela} hari terakhir)",
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.markdown("---")
+    col1, col2 = st.columns(2)
+    guru = col1.selectbox("Pilih Guru", ringkasan["Guru_Pencatat"].tolist(), key="aktivitas_guru")
+    periode = col2.radio("Periode", ["Harian", "Mingguan"], horizontal=True, key="aktivitas_periode")
+
+    if periode == "Harian":
+        deret = teacher_timeline(daily, guru, "D")
+        kolom = ["Setoran"] + [f"Setoran_{h}_Hari" for h in JENDELA_HARI]
+        fig2 = px.line(deret, x="Tanggal", y=kolom, title=f"Setoran Harian {guru} dan Jumlah Berjalan")
+    else:
+        deret = teacher_timeline(daily, guru, "W")
+        fig2 = px.bar(deret, x="Tanggal", y=["Ayat_Lulus", "Mengulang"], title=f"Ayat Lulus dan Mengulang per Minggu - {guru}")
+    st.plotly_chart(fig2, use_container_width=True)
+
+    st.subheader(f"🏫 Kelas yang Dilayani ({jendela} hari terakhir)")
+    st.dataframe(teacher_classes(daily, guru), use_container_width=True, hide_index=True)
+
+# =============================
+# HALAMAN BARU: 📈 PERBANDINGAN ANGKATAN
+# =============================
+
+def page_perbandingan_angkatan(df):
+    st.header("📈 Perbandingan Angkatan")
+    st.caption(
+        "Kemajuan tiap angkatan (ayat berbeda yang sudah pernah Lulus) disejajarkan menurut minggu sejak "
+        "awal tahun ajaran masuk. Angkatan dibaca dari NIS; murid yang sudah lulus ikut dari arsip alumni."
+    )
+
+    if not os.path.exists(LOG_FILE):
+        st.info("Belum ada data log setoran.")
+        return
+
+    kolom = ["ID_Murid", "NIS", "Kelas"]
+    murid = df[kolom + [CURRICULUM_COLUMN]]
+    if os.path.exists(ALUMNI_FILE):
+        alumni = pd.read_csv(ALUMNI_FILE, usecols=lambda c: c in kolom, dtype={"NIS": str})
+        murid = pd.concat([murid, with_curricula(alumni)], ignore_index=True).drop_duplicates("ID_Murid")
+
+    rollups = get_rollups()
+    rec = rollups.murid.records
+    pertama = pd.Series(rec["hari"].astype("datetime64[D]")).groupby(rec["kunci"].astype("int64")).min()
+    cohorts = assign_cohorts(murid, pertama)
+    if cohorts.empty:
+        st.info("Belum ada murid dengan angkatan yang dikenali.")
+        return
+
+    kurva = get_cohort_cache().curves(
+        cohorts,
+        murid,
+        lambda start: read_log(LOG_FILE, start=start, columns=["ID_Murid", "Surah", "Ayat_Dari", "Ayat_Sampai", "Status"]),
+    )
+    daftar = sorted(kurva["Angkatan"].unique(), reverse=True)
+    pilih = st.multiselect("Angkatan", daftar, default=daftar[:2], key="angkatan_pilih")
+    kurva = kurva[kurva["Angkatan"].isin(pilih)]
+    if kurva.empty:
+        st.info("Pilih minimal satu angkatan yang sudah berjalan.")
+        return
+
+    fig = px.line(kurva, x="Minggu", y="Median", color="Angkatan", title="Median Ayat Lulus per Minggu sejak Masuk")
+    for angkatan, grup in kurva.groupby("Angkatan"):
+        fig.add_scatter(x=grup["Minggu"], y=grup["P25"], mode="lines", line={"dash": "dot", "width": 1}, name=f"{angkatan} P25")
+        fig.add_scatter(x=grup["Minggu"], y=grup["P75"], mode="lines", line={"dash": "dot", "width": 1}, name=f"{angkatan} P75")
+    st.plotly_chart(fig, use_container_width=True)
+
+    # titik yang sama: minggu berjalan angkatan terbaru yang dipilih
+    minggu_ini = int(kurva[kurva["Angkatan"] == max(pilih)]["Minggu"].max())
+    minggu = st.number_input(
+        "Bandingkan pada minggu ke-", min_value=1, max_value=MINGGU_KURVA, value=minggu_ini, key="angkatan_minggu"
+    )
+    st.dataframe(compare_at_week(kurva, int(minggu)), use_container_width=True, hide_index=True)
+
+# =============================
+# HALAMAN BARU: 🎓 ADMINISTRASI KELAS
+# =============================
+
+def _preview_and_apply(df, plan, description, key):
+    """Pratinjau (dry-run) rencana operasi kelas, lalu terapkan dengan satu kali tulis + snapshot undo."""
+    changes = plan[plan["Aksi"] != ACTION_STAY]
+    if changes.empty:
+        st.info("Tidak ada perubahan dalam rencana ini.")
+        return
+
+    st.markdown("**Pratinjau (belum disimpan):**")
+    st.dataframe(summarize_plan(changes), use_container_width=True, hide_index=True)
+    with st.expander(f"Lihat detail {len(changes)} murid"):
+        st.dataframe(changes, use_container_width=True, hide_index=True)
+
+    if st.button(f"✅ Terapkan ({len(changes)} murid)", key=f"apply_{key}"):
+        with get_service().lock:
+            df_terkini = ensure_columns(current_students().copy())
+            # Status_Hafalan di database bisa tertinggal dari matriks status: tulis dulu status
+            # terbaru kelas terdampak agar undo mengembalikan progres murid yang dipindah/diarsipkan
+            save_data(df_terkini, kelas=affected_classes(changes))
+            save_undo_snapshot(UNDO_DIR, [DB_FILE, ALUMNI_FILE], description)
+            new_df, lulusan = apply_plan(df_terkini, changes)
+            archive_graduates(lulusan, ALUMNI_FILE)
+            # kelas asal + tujuan ditulis dalam satu pergantian katalog (atomik antar shard)
+            save_data(new_df, kelas=affected_classes(changes))
+        st.session_state.class_op_message = (
+            f"{description}: {len(changes) - len(lulusan)} murid dipindah, {len(lulusan)} diarsipkan sebagai lulusan."
+        )
+        st.rerun()
+
+
+def page_administrasi_kelas(df):
+    st.header("🎓 Administrasi Kelas")
+    st.caption(
+        "Semua operasi dipratinjau dulu, diterapkan sekaligus dalam satu kali simpan, "
+        "dan dapat dibatalkan lewat snapshot undo."
+    )
+
+    if "class_op_message" in st.session_state:
+        st.success(st.session_state.pop("class_op_message"))
+
+    kelas_list = sorted(df["Kelas"].astype(str).unique().tolist())
+    tab_naik, tab_pindah, tab_lulus = st.tabs(["⬆️ Kenaikan Kelas", "🔀 Pindah Kelas", "🎓 Arsip Lulusan"])
+
+    with tab_naik:
+        st.markdown(f"Isi `{GRADUATED}` pada kolom Kelas_Baru untuk kelas yang lulus (diarsipkan).")
+        mapping_df = pd.DataFrame(
+            list(default_promotion_map(kelas_list).items()), columns=["Kelas_Lama", "Kelas_Baru"]
+        )
+        edited = st.data_editor(
+            mapping_df,
+            disabled=["Kelas_Lama"],
+            hide_index=True,
+            use_container_width=True,
+            key="promotion_map_editor",
+        )
+        mapping = dict(zip(edited["Kelas_Lama"], edited["Kelas_Baru"].fillna("").astype(str).str.strip()))
+        mapping = {k: v for k, v in mapping.items() if v}
+        _preview_and_apply(df, plan_promotion(df, mapping), "Kenaikan kelas", "promotion")
+
+    with tab_pindah:
+        asal = st.selectbox("Kelas Asal", kelas_list, key="move_from")
+        class_df = df[df["Kelas"].astype(str) == asal]
+        murid_map = {f"{r['Nama_Murid']} (ID:{r['ID_Murid']})": r["ID_Murid"] for _, r in class_df.iterrows()}
+        dipilih = st.multiselect("Murid yang Dipindah", list(murid_map.keys()), key="move_students")
+        tujuan = st.text_input("Kelas Tujuan", key="move_to").strip()
+        if dipilih and tujuan:
+            ids = [murid_map[m] for m in dipilih]
+            _preview_and_apply(df, plan_move(df, ids, tujuan), f"Pindah kelas ke {tujuan}", "move")
+
+    with tab_lulus:
+        kelas_lulus = st.selectbox("Kelas", kelas_list, key="graduate_class")
+        class_df = df[df["Kelas"].astype(str) == kelas_lulus]
+        murid_map = {f"{r['Nama_Murid']} (ID:{r['ID_Murid']})": r["ID_Murid"] for _, r in class_df.iterrows()}
+        dipilih = st.multiselect(
+            "Murid yang Diarsipkan",
+            list(murid_map.keys()),
+            default=list(murid_map.keys()),
+            key=f"graduate_students_{kelas_lulus}",
+        )
+        if dipilih:
+            ids = [murid_map[m] for m in dipilih]
+            _preview_and_apply(df, plan_graduation(df, ids), f"Arsip lulusan {kelas_lulus}", "graduate")
+
+    st.markdown("---")
+    st.subheader("↩️ Batalkan Operasi")
+    snapshots = list_undo_snapshots(UNDO_DIR)
+    if not snapshots:
+        st.info("Belum ada snapshot operasi kelas.")
+        return
+    folder, manifest = snapshots[0]
+    st.write(f"Operasi terakhir: **{manifest['description']}** ({manifest['created']})")
+    if st.button("↩️ Batalkan Operasi Terakhir", key="undo_class_op"):
+        with get_service().lock:
+            restore_undo_snapshot(folder)
+            st.session_state.df = ensure_columns(load_database())
+        mark_data_written()
+        st.session_state.class_op_message = f"Operasi '{manifest['description']}' dibatalkan."
+        st.rerun()
+
+
 # =============================
 # ENTRY POINT
 # =============================
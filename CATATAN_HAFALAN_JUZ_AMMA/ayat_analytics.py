@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+
+from juz_amma_data import JUZ_AMMA
+from log_engine import ayat_index
+
+# =============================
+# ANALISIS AYAT TERSULIT (SELURUH SEKOLAH / PER KELAS)
+# =============================
+# Setiap ayat yang dicakup log setoran dipetakan ke indeks datar kurikulum
+# (lihat log_engine.ayat_index), lalu semua agregasi dikerjakan dengan
+# np.bincount / ufunc.at di atas indeks itu, tanpa groupby per ayat.
+#   Percobaan                 berapa kali ayat ikut disetorkan
+#   Persen_Mengulang          porsi setoran yang berakhir Mengulang
+#   Rata_Ulang_Sebelum_Lulus  rata-rata Mengulang per murid sebelum Lulus pertama
+#   Rata_Hari_ke_Lulus        rata-rata hari dari setoran pertama sampai Lulus pertama
+
+AYAT_COLUMNS = [
+    "Surah",
+    "Ayat",
+    "Percobaan",
+    "Mengulang",
+    "Persen_Mengulang",
+    "Murid_Lulus",
+    "Rata_Ulang_Sebelum_Lulus",
+    "Rata_Hari_ke_Lulus",
+]
+
+_BELUM_LULUS = np.iinfo(np.int64).max
+
+
+def _ratio(pembilang, penyebut) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(penyebut > 0, pembilang / np.maximum(penyebut, 1), np.nan)
+
+
+def ayat_difficulty(df_log: pd.DataFrame, kurikulum=JUZ_AMMA, student_ids=None) -> pd.DataFrame:
+    """
+    Statistik kesulitan setiap ayat `kurikulum` (satu baris per ayat, urut
+    mushaf) dari log setoran. `student_ids` membatasi murid yang dihitung
+    (mis. satu kelas); None = seluruh sekolah.
+    """
+    if student_ids is not None:
+        df_log = df_log[df_log["ID_Murid"].isin(student_ids)]
+    total = kurikulum.total_ayat
+    baris, posisi = ayat_index(df_log, kurikulum)
+
+    waktu = df_log["Timestamp"].to_numpy(dtype="datetime64[s]").astype(np.int64)[baris]
+    murid = df_log["ID_Murid"].to_numpy(dtype=np.int64)[baris]
+    mengulang = (df_log["Status"] == "Mengulang").to_numpy()[baris]
+    lulus = (df_log["Status"] == "Lulus").to_numpy()[baris]
+
+    percobaan = np.bincount(posisi, minlength=total)
+    jumlah_mengulang = np.bincount(posisi, weights=mengulang, minlength=total).astype(np.int64)
+
+    # pasangan (murid, ayat): setoran pertama, Lulus pertama, Mengulang sebelum Lulus
+    pasangan, kunci = pd.factorize(murid * total + posisi)
+    n_pasangan = len(kunci)
+    pertama = np.full(n_pasangan, _BELUM_LULUS, dtype=np.int64)
+    np.minimum.at(pertama, pasangan, waktu)
+    lulus_pertama = np.full(n_pasangan, _BELUM_LULUS, dtype=np.int64)
+    np.minimum.at(lulus_pertama, pasangan[lulus], waktu[lulus])
+    ulang_sebelum = np.bincount(
+        pasangan, weights=mengulang & (waktu < lulus_pertama[pasangan]), minlength=n_pasangan
+    )
+
+    sampai = lulus_pertama < _BELUM_LULUS
+    ayat_pasangan = (np.asarray(kunci, dtype=np.int64) % total)[sampai]
+    murid_lulus = np.bincount(ayat_pasangan, minlength=total)
+    total_ulang = np.bincount(ayat_pasangan, weights=ulang_sebelum[sampai], minlength=total)
+    total_hari = np.bincount(
+        ayat_pasangan, weights=(lulus_pertama[sampai] - pertama[sampai]) / 86400, minlength=total
+    )
+
+    ayat = np.arange(total)
+    surah_idx = np.searchsorted(kurikulum.starts, ayat, side="right") - 1
+    return pd.DataFrame(
+        {
+            "Surah": np.asarray(kurikulum.surah_names, dtype=object)[surah_idx],
+            "Ayat": ayat - kurikulum.starts[surah_idx] + 1,
+            "Percobaan": percobaan,
+            "Mengulang": jumlah_mengulang,
+            "Persen_Mengulang": np.round(_ratio(jumlah_mengulang, percobaan) * 100, 1),
+            "Murid_Lulus": murid_lulus,
+            "Rata_Ulang_Sebelum_Lulus": np.round(_ratio(total_ulang, murid_lulus), 2),
+            "Rata_Hari_ke_Lulus": np.round(_ratio(total_hari, murid_lulus), 1),
+        },
+        columns=AYAT_COLUMNS,
+    )
+
+
+def surah_difficulty(per_ayat: pd.DataFrame) -> pd.DataFrame:
+    """Ringkasan per surah dari hasil ayat_difficulty (rata-rata ditimbang jumlah murid Lulus)."""
+    bobot = per_ayat["Murid_Lulus"]
+    tmp = per_ayat.assign(
+        _ulang=per_ayat["Rata_Ulang_Sebelum_Lulus"].fillna(0) * bobot,
+        _hari=per_ayat["Rata_Hari_ke_Lulus"].fillna(0) * bobot,
+    )
+    agg = tmp.groupby("Surah", sort=False)[["Percobaan", "Mengulang", "Murid_Lulus", "_ulang", "_hari"]].sum()
+    return pd.DataFrame(
+        {
+            "Surah": agg.index,
+            "Percobaan": agg["Percobaan"].to_numpy(),
+            "Mengulang": agg["Mengulang"].to_numpy(),
+            "Persen_Mengulang": np.round(_ratio(agg["Mengulang"].to_numpy(), agg["Percobaan"].to_numpy()) * 100, 1),
+            "Rata_Ulang_Sebelum_Lulus": np.round(_ratio(agg["_ulang"].to_numpy(), agg["Murid_Lulus"].to_numpy()), 2),
+            "Rata_Hari_ke_Lulus": np.round(_ratio(agg["_hari"].to_numpy(), agg["Murid_Lulus"].to_numpy()), 1),
+        }
+    )
+
+
+def class_surah_rates(df_log: pd.DataFrame, df_students: pd.DataFrame, kurikulum=JUZ_AMMA) -> pd.DataFrame:
+    """
+    Persen Mengulang per (Kelas x Surah) dalam satu bincount. Kelas diambil
+    dari database murid saat ini; setoran alumni tidak ikut.
+    """
+    kelas_murid = df_students.set_index("ID_Murid")["Kelas"].astype(str)
+    kelas_kode, kelas_nama = pd.factorize(df_log["ID_Murid"].map(kelas_murid), sort=True)
+    baris, posisi = ayat_index(df_log, kurikulum)
+    kelas_kode = kelas_kode[baris]
+    ada = kelas_kode >= 0
+
+    n_surah = len(kurikulum.surah_names)
+    surah_idx = np.searchsorted(kurikulum.starts, posisi[ada], side="right") - 1
+    sel = kelas_kode[ada] * n_surah + surah_idx
+    mengulang = (df_log["Status"] == "Mengulang").to_numpy()[baris][ada]
+    n_sel = len(kelas_nama) * n_surah
+    persen = _ratio(
+        np.bincount(sel, weights=mengulang, minlength=n_sel), np.bincount(sel, minlength=n_sel)
+    ) * 100
+    return pd.DataFrame(
+        np.round(persen.reshape(len(kelas_nama), n_surah), 1), index=kelas_nama, columns=kurikulum.surah_names
+    )
@@ -0,0 +1,140 @@
+"""
+Uji beban server API (api_server.py): setoran tunggal, batch setoran dan
+pembacaan profil murid lewat satu koneksi keep-alive. Server dijalankan
+sebagai proses terpisah pada salinan sementara folder data, sehingga data
+asli tidak ikut berubah.
+
+Contoh:
+    python bench_api.py
+    python bench_api.py --permintaan 2000 --batch 200
+    taskset -c 0 python bench_api.py    # server + klien di satu core
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from daily_rollup import ROLLUP_DIRNAME
+from juz_amma_data import JUZ_AMMA_MAP
+from store_lock import LOCK_FILENAME
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _request(conn, method: str, path: str, payload=None):
+    body = None if payload is None else json.dumps(payload).encode("utf-8")
+    headers = {"Content-Type": "application/json"} if body else {}
+    conn.request(method, path, body=body, headers=headers)
+    response = conn.getresponse()
+    data = json.loads(response.read())
+    if response.status >= 400:
+        raise RuntimeError(f"{method} {path} -> {response.status}: {data.get('error')}")
+    return data
+
+
+def _wait_ready(port: int, proses, batas: float = 60.0):
+    mulai = time.perf_counter()
+    while time.perf_counter() - mulai < batas:
+        if proses.poll() is not None:
+            raise RuntimeError("Server API berhenti sebelum siap.")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            _request(conn, "GET", "/api/peringkat?k=1")
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Server API tidak merespons.")
+
+
+def _random_setoran(murid: list, surah_map: dict, rng: random.Random) -> dict:
+    m = rng.choice(murid)
+    surah = rng.choice(list(surah_map))
+    dari = rng.randint(1, surah_map[surah])
+    return {
+        "ID_Murid": m["ID_Murid"],
+        "Surah": surah,
+        "Ayat_Dari": dari,
+        "Ayat_Sampai": min(dari + rng.randint(0, 4), surah_map[surah]),
+        "Status": rng.choice(["Lulus", "Lulus", "Mengulang"]),
+        "Guru_Pencatat": "Uji Beban",
+    }
+
+
+def run_benchmarks(port: int, permintaan: int, batch: int) -> list:
+    """Daftar (nama kasus, permintaan/detik, setoran/detik)."""
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    murid = [m for m in _request(conn, "GET", "/api/murid")["murid"] if m.get("Kurikulum") in (None, "juz_amma")]
+    if not murid:
+        raise RuntimeError("Tidak ada murid berkurikulum Juz Amma di database.")
+    rng = random.Random(0)
+    hasil = []
+
+    mulai = time.perf_counter()
+    for _ in range(permintaan):
+        _request(conn, "POST", "/api/setoran", _random_setoran(murid, JUZ_AMMA_MAP, rng))
+    detik = time.perf_counter() - mulai
+    hasil.append(("POST /api/setoran", permintaan / detik, permintaan / detik))
+
+    n_batch = max(1, permintaan // batch)
+    payloads = [{"setoran": [_random_setoran(murid, JUZ_AMMA_MAP, rng) for _ in range(batch)]} for _ in range(n_batch)]
+    mulai = time.perf_counter()
+    for payload in payloads:
+        _request(conn, "POST", "/api/setoran/batch", payload)
+    detik = time.perf_counter() - mulai
+    hasil.append((f"POST /api/setoran/batch ({batch}/permintaan)", n_batch / detik, n_batch * batch / detik))
+
+    mulai = time.perf_counter()
+    for _ in range(permintaan):
+        _request(conn, "GET", f"/api/murid/{rng.choice(murid)['ID_Murid']}")
+    detik = time.perf_counter() - mulai
+    hasil.append(("GET /api/murid/<id>", permintaan / detik, None))
+
+    conn.close()
+    return hasil
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Uji beban server API hafalan pada salinan data sementara.")
+    parser.add_argument("--data-dir", default=BASE_DIR, help="Folder data sumber (default: folder aplikasi).")
+    parser.add_argument("--permintaan", type=int, default=1000, help="Jumlah permintaan per kasus (default: 1000).")
+    parser.add_argument("--batch", type=int, default=100, help="Setoran per permintaan batch (default: 100).")
+    args = parser.parse_args(argv)
+
+    salinan = tempfile.mkdtemp(prefix="bench_api_")
+    shutil.copytree(
+        args.data_dir, salinan, dirs_exist_ok=True,
+        ignore=shutil.ignore_patterns("*.py", "*.png", "__pycache__", ROLLUP_DIRNAME, LOCK_FILENAME),
+    )
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(BASE_DIR, "api_server.py"), "--data-dir", salinan, "--port", str(port), "--quiet"],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        _wait_ready(port, server)
+        print(f"{'kasus':<42} {'permintaan/s':>12} {'setoran/s':>10}")
+        for nama, per_detik, setoran in run_benchmarks(port, args.permintaan, args.batch):
+            print(f"{nama:<42} {per_detik:12.1f} {'-' if setoran is None else f'{setoran:.1f}':>10}")
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(salinan, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
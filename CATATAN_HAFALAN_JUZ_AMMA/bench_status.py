@@ -0,0 +1,66 @@
+"""
+Micro-benchmark akses Status_Hafalan: format JSON lama vs format v1
+(akses utuh dan akses per surah lewat surah_status / patch_surah).
+
+Contoh:
+    python bench_status.py
+    python bench_status.py --ulang 20000 --surah "Al-Fajr"
+"""
+import argparse
+import json
+import sys
+import timeit
+
+import numpy as np
+
+from juz_amma_data import (
+    JUZ_AMMA_MAP,
+    SURAH_NAMES,
+    SURAH_OFFSETS,
+    pack_status,
+    patch_surah,
+    surah_status,
+    unpack_status,
+)
+
+
+def _json_status(arr) -> str:
+    return json.dumps({s: arr[SURAH_OFFSETS[s]:SURAH_OFFSETS[s] + n].tolist() for s, n in JUZ_AMMA_MAP.items()})
+
+
+def _json_patch(status_json, surah, start_ayat, end_ayat, status_code) -> str:
+    status_dict = json.loads(status_json)
+    for i in range(start_ayat - 1, end_ayat):
+        status_dict[surah][i] = status_code
+    return json.dumps(status_dict)
+
+
+def run_benchmarks(surah: str, ulang: int) -> list:
+    """Daftar (nama kasus, mikrodetik per panggilan)."""
+    arr = np.random.default_rng(0).integers(0, 3, sum(JUZ_AMMA_MAP.values())).astype(np.uint8)
+    as_json, as_v1 = _json_status(arr), pack_status(arr)
+    akhir = min(5, JUZ_AMMA_MAP[surah])
+
+    cases = [
+        ("baca 1 surah  - json.loads", lambda: json.loads(as_json)[surah]),
+        ("baca 1 surah  - unpack_status (utuh)", lambda: unpack_status(as_v1)[SURAH_OFFSETS[surah]:]),
+        ("baca 1 surah  - surah_status", lambda: surah_status(as_v1, surah)),
+        ("ubah 5 ayat   - json.loads + json.dumps", lambda: _json_patch(as_json, surah, 1, akhir, 1)),
+        ("ubah 5 ayat   - patch_surah", lambda: patch_surah(as_v1, surah, 1, akhir, 1)),
+    ]
+    return [(nama, timeit.timeit(fn, number=ulang) / ulang * 1e6) for nama, fn in cases]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmark format Status_Hafalan (JSON vs v1).")
+    parser.add_argument("--surah", default="Al-Fajr", choices=SURAH_NAMES, help="Surah yang dibaca/diubah.")
+    parser.add_argument("--ulang", type=int, default=5000, help="Jumlah pengulangan per kasus.")
+    args = parser.parse_args(argv)
+
+    for nama, mikrodetik in run_benchmarks(args.surah, args.ulang):
+        print(f"{nama:<42} {mikrodetik:8.1f} µs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
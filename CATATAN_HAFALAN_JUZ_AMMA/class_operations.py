@@ -0,0 +1,215 @@
+import json
+import os
+import re
+import shutil
+from datetime import datetime
+
+import pandas as pd
+
+from data_store import read_data, write_data
+from log_store import ALUMNI_FILENAME
+
+# =============================
+# OPERASI KELAS MASSAL
+# =============================
+# Kenaikan kelas, pindah kelas, dan pengarsipan lulusan disusun dulu sebagai
+# "rencana" (DataFrame: ID_Murid, Nama_Murid, Kelas_Lama, Kelas_Baru, Aksi)
+# yang bisa dipratinjau (dry-run). Rencana diterapkan sekaligus dengan satu
+# operasi vektor dan satu kali tulis; sebelum itu file database disalin ke
+# snapshot sehingga operasi terakhir bisa dibatalkan (undo).
+
+GRADUATED = "LULUS"
+ACTION_PROMOTE = "Naik Kelas"
+ACTION_MOVE = "Pindah Kelas"
+ACTION_GRADUATE = "Lulus (Arsip)"
+ACTION_STAY = "Tetap"
+
+UNDO_DIRNAME = "snapshot_undo"
+
+GRADE_ORDER = ["VII", "VIII", "IX"]
+_CLASS_PATTERN = re.compile(r"^\s*(IX|VIII|VII)(\s*-?\s*)(.*)$", re.IGNORECASE)
+
+PLAN_COLUMNS = ["ID_Murid", "Nama_Murid", "Kelas_Lama", "Kelas_Baru", "Aksi"]
+
+
+def promote_class_name(kelas: str) -> str:
+    """
+    Nama kelas tahun berikutnya: VII A -> VIII A, VIII-B -> IX-B, IX C -> LULUS.
+    Kelas yang tidak dikenali dikembalikan apa adanya.
+    """
+    m = _CLASS_PATTERN.match(str(kelas))
+    if not m:
+        return kelas
+    grade, sep, section = m.group(1).upper(), m.group(2), m.group(3)
+    idx = GRADE_ORDER.index(grade)
+    if idx == len(GRADE_ORDER) - 1:
+        return GRADUATED
+    return f"{GRADE_ORDER[idx + 1]}{sep}{section}".rstrip()
+
+
+def grade_of(kelas: str) -> str:
+    """Tingkat kelas: VII A -> VII, ix-b -> IX. Kelas yang tidak dikenali menjadi tingkatnya sendiri."""
+    m = _CLASS_PATTERN.match(str(kelas))
+    return m.group(1).upper() if m else str(kelas)
+
+
+def default_promotion_map(classes) -> dict:
+    """Peta kenaikan bawaan untuk semua kelas yang ada."""
+    return {k: promote_class_name(k) for k in sorted(set(classes))}
+
+
+def _plan(df: pd.DataFrame, kelas_baru: pd.Series) -> pd.DataFrame:
+    kelas_lama = df["Kelas"].astype(str)
+    kelas_baru = kelas_baru.astype(str)
+    aksi = pd.Series(ACTION_STAY, index=df.index)
+    aksi = aksi.mask(kelas_baru != kelas_lama, ACTION_PROMOTE)
+    aksi = aksi.mask(kelas_baru == GRADUATED, ACTION_GRADUATE)
+    return pd.DataFrame(
+        {
+            "ID_Murid": df["ID_Murid"],
+            "Nama_Murid": df["Nama_Murid"],
+            "Kelas_Lama": kelas_lama,
+            "Kelas_Baru": kelas_baru,
+            "Aksi": aksi,
+        },
+        columns=PLAN_COLUMNS,
+    )
+
+
+def plan_promotion(df: pd.DataFrame, mapping: dict) -> pd.DataFrame:
+    """
+    Rencana kenaikan kelas untuk seluruh murid berdasarkan `mapping`
+    {kelas_lama: kelas_baru | "LULUS"}. Semua kelas dipetakan serentak,
+    sehingga VII A -> VIII A dan VIII A -> IX A tidak saling bertumpuk.
+    """
+    kelas_lama = df["Kelas"].astype(str)
+    kelas_baru = kelas_lama.map(mapping).fillna(kelas_lama)
+    return _plan(df, kelas_baru)
+
+
+def plan_move(df: pd.DataFrame, student_ids, target_class: str) -> pd.DataFrame:
+    """Rencana memindahkan murid terpilih ke `target_class`."""
+    selected = df[df["ID_Murid"].isin(list(student_ids))]
+    plan = _plan(selected, pd.Series(target_class, index=selected.index))
+    plan.loc[plan["Aksi"] == ACTION_PROMOTE, "Aksi"] = ACTION_MOVE
+    return plan
+
+
+def plan_graduation(df: pd.DataFrame, student_ids) -> pd.DataFrame:
+    """Rencana mengarsipkan murid terpilih sebagai lulusan."""
+    return plan_move(df, student_ids, GRADUATED)
+
+
+def summarize_plan(plan: pd.DataFrame) -> pd.DataFrame:
+    """Ringkasan rencana per (Kelas_Lama, Kelas_Baru, Aksi) untuk pratinjau."""
+    return (
+        plan.groupby(["Kelas_Lama", "Kelas_Baru", "Aksi"])
+        .size()
+        .reset_index(name="Jumlah_Murid")
+        .sort_values(["Kelas_Lama", "Kelas_Baru"])
+    )
+
+
+def affected_classes(plan: pd.DataFrame):
+    """Kelas asal dan tujuan yang berubah oleh rencana (shard yang perlu ditulis ulang)."""
+    changes = plan[plan["Aksi"] != ACTION_STAY]
+    kelas = set(changes["Kelas_Lama"].astype(str)) | set(changes["Kelas_Baru"].astype(str))
+    kelas.discard(GRADUATED)
+    return sorted(kelas)
+
+
+def apply_plan(df: pd.DataFrame, plan: pd.DataFrame, now: str = None):
+    """
+    Menerapkan rencana dalam satu langkah vektor.
+    Mengembalikan (df_baru, df_lulusan). Lulusan dikeluarkan dari df_baru.
+    """
+    now = now or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    changes = plan[plan["Aksi"] != ACTION_STAY]
+    new_class = pd.Series(changes["Kelas_Baru"].to_numpy(), index=changes["ID_Murid"].to_numpy())
+
+    df = df.copy()
+    target = df["ID_Murid"].map(new_class)
+    moved = target.notna()
+    df.loc[moved, "Kelas"] = target[moved]
+    df.loc[moved, "Update_Terakhir"] = now
+
+    graduated = df["Kelas"] == GRADUATED
+    lulusan = df[graduated].copy()
+    if not lulusan.empty:
+        kelas_terakhir = pd.Series(changes["Kelas_Lama"].to_numpy(), index=changes["ID_Murid"].to_numpy())
+        lulusan["Kelas"] = lulusan["ID_Murid"].map(kelas_terakhir)
+        lulusan["Tanggal_Lulus"] = now
+    return df[~graduated].reset_index(drop=True), lulusan
+
+
+def archive_graduates(lulusan: pd.DataFrame, alumni_path: str):
+    """Menambahkan lulusan (lengkap dengan status hafalannya) ke file arsip alumni."""
+    if lulusan.empty:
+        return
+    write_header = not os.path.exists(alumni_path)
+    lulusan.to_csv(alumni_path, mode="a", index=False, header=write_header)
+
+
+# =============================
+# SNAPSHOT UNDO
+# =============================
+
+def save_undo_snapshot(snapshot_dir: str, files, description: str) -> str:
+    """
+    Menyalin file-file yang akan diubah ke folder snapshot baru beserta
+    manifest (deskripsi operasi dan file mana yang sebelumnya belum ada).
+    """
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    target = os.path.join(snapshot_dir, stamp)
+    os.makedirs(target, exist_ok=True)
+
+    manifest = {"description": description, "created": stamp, "files": {}}
+    for path in files:
+        name = os.path.basename(path.rstrip(os.sep))
+        if os.path.isdir(path):
+            # database per kelas: salin semua shard yang berlaku
+            write_data(read_data(path), os.path.join(target, name))
+            manifest["files"][path] = name
+        elif os.path.exists(path):
+            shutil.copy2(path, os.path.join(target, name))
+            manifest["files"][path] = name
+        else:
+            manifest["files"][path] = None
+
+    with open(os.path.join(target, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return target
+
+
+def list_undo_snapshots(snapshot_dir: str):
+    """Daftar snapshot (terbaru dulu) berupa (folder, manifest)."""
+    if not os.path.isdir(snapshot_dir):
+        return []
+    hasil = []
+    for name in sorted(os.listdir(snapshot_dir), reverse=True):
+        manifest_path = os.path.join(snapshot_dir, name, "manifest.json")
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                hasil.append((os.path.join(snapshot_dir, name), json.load(f)))
+    return hasil
+
+
+def restore_undo_snapshot(folder: str):
+    """Mengembalikan file ke isi snapshot lalu menghapus snapshot tersebut."""
+    with open(os.path.join(folder, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    for path, name in manifest["files"].items():
+        if name is None:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+        elif os.path.isdir(os.path.join(folder, name)):
+            # satu kali ganti katalog: semua shard kembali bersamaan
+            write_data(read_data(os.path.join(folder, name)), path)
+        else:
+            tmp_path = path + ".tmp"
+            shutil.copy2(os.path.join(folder, name), tmp_path)
+            os.replace(tmp_path, path)
+    shutil.rmtree(folder)
+    return manifest
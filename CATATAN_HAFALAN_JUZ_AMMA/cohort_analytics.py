@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+
+from curriculum import CURRICULUM_COLUMN, DEFAULT_CURRICULUM, get_curriculum
+from log_archive import ACADEMIC_YEAR_START_MONTH
+from log_engine import ayat_index
+
+# =============================
+# PERBANDINGAN ANGKATAN (KOHORT)
+# =============================
+# Murid dikelompokkan per angkatan (tahun ajaran masuk) dan kemajuannya
+# disejajarkan menurut minggu sejak masuk, sehingga angkatan VII tahun ini
+# bisa dibandingkan dengan angkatan lalu pada titik yang sama.
+#   Angkatan     4 digit awal NIS (YY lalu YY+1, mis. 252607001 -> 2025-2026);
+#                jika tidak cocok, tahun ajaran setoran pertama murid di log.
+#   Masuk        awal tahun ajaran angkatan (1 Juli).
+#   Kemajuan     jumlah ayat berbeda yang sudah pernah Lulus sampai akhir
+#                minggu ke-n (Lulus ulang saat murajaah tidak dihitung lagi).
+# Kurva = persentil kemajuan seluruh murid angkatan per minggu. Angkatan
+# yang sudah melewati MINGGU_KURVA minggu tidak berubah lagi, sehingga
+# CohortCache menyimpannya dan log hanya dibaca untuk angkatan yang berjalan
+# (mulai dari tanggal masuk angkatan berjalan tertua).
+
+MINGGU_KURVA = 156  # tiga tahun SMP
+PERSENTIL = (25, 50, 75)
+
+COHORT_COLUMNS = ["ID_Murid", "Angkatan", "Tanggal_Masuk"]
+
+
+def _day(when) -> int:
+    return int(np.datetime64(pd.Timestamp(when).date(), "D").astype(np.int64))
+
+
+def _percentile_name(p: int) -> str:
+    return "Median" if p == 50 else f"P{p}"
+
+
+CURVE_COLUMNS = ["Angkatan", "Minggu", "Murid"] + [_percentile_name(p) for p in PERSENTIL]
+
+
+def nis_intake_year(nis: pd.Series) -> pd.Series:
+    """Tahun awal angkatan dari NIS (252607001 -> 2025); NaN jika NIS tidak berpola YY(YY+1)."""
+    teks = nis.astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+    digit = teks.str.extract(r"^(\d{2})(\d{2})\d")
+    awal = pd.to_numeric(digit[0], errors="coerce")
+    akhir = pd.to_numeric(digit[1], errors="coerce")
+    return (2000 + awal).where((akhir - awal) % 100 == 1)
+
+
+def assign_cohorts(df_students: pd.DataFrame, first_setoran: pd.Series = None) -> pd.DataFrame:
+    """
+    Angkatan dan tanggal masuk tiap murid. `first_setoran` (ID_Murid ->
+    Timestamp setoran pertama) dipakai untuk murid yang NIS-nya tidak
+    berpola angkatan; murid tanpa keduanya tidak ikut.
+    """
+    if "NIS" in df_students.columns:
+        tahun = nis_intake_year(df_students["NIS"])
+    else:
+        tahun = pd.Series(np.nan, index=df_students.index)
+    if first_setoran is not None:
+        pertama = pd.to_datetime(df_students["ID_Murid"].map(first_setoran))
+        tahun_log = pertama.dt.year - (pertama.dt.month < ACADEMIC_YEAR_START_MONTH)
+        tahun = tahun.fillna(tahun_log)
+
+    ada = tahun.notna()
+    tahun = tahun[ada].astype(np.int64)
+    return pd.DataFrame(
+        {
+            "ID_Murid": df_students.loc[ada, "ID_Murid"].to_numpy(dtype=np.int64),
+            "Angkatan": (tahun.astype(str) + "-" + (tahun + 1).astype(str)).to_numpy(),
+            "Tanggal_Masuk": pd.to_datetime(
+                {"year": tahun, "month": ACADEMIC_YEAR_START_MONTH, "day": 1}
+            ).to_numpy(),
+        },
+        columns=COHORT_COLUMNS,
+    )
+
+
+def first_pass_days(df_log: pd.DataFrame, student_ids, kurikulum) -> tuple:
+    """
+    Hari Lulus pertama setiap pasangan (murid, ayat) `kurikulum`:
+    (baris murid dalam `student_ids`, nomor hari epoch), satu elemen per pasangan.
+    """
+    ids = pd.Index(np.asarray(student_ids, dtype=np.int64))
+    lulus = df_log[df_log["Status"] == "Lulus"]
+    row = ids.get_indexer(lulus["ID_Murid"].to_numpy(dtype=np.int64))
+    lulus, row = lulus[row >= 0], row[row >= 0]
+    baris, posisi = ayat_index(lulus, kurikulum)
+    if not len(baris):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    hari = lulus["Timestamp"].to_numpy(dtype="datetime64[D]").astype(np.int64)[baris]
+    pasangan, kunci = pd.factorize(row[baris] * kurikulum.total_ayat + posisi)
+    pertama = np.full(len(kunci), np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(pertama, pasangan, hari)
+    return np.asarray(kunci, dtype=np.int64) // kurikulum.total_ayat, pertama
+
+
+def cohort_progress(df_log: pd.DataFrame, df_students: pd.DataFrame, tanggal_masuk, today=None, minggu: int = MINGGU_KURVA) -> np.ndarray:
+    """
+    Matriks (murid x minggu) jumlah ayat berbeda yang sudah Lulus sampai akhir
+    tiap minggu sejak `tanggal_masuk`, hanya untuk minggu yang sudah dijalani.
+    Hanya setoran sejak tanggal masuk yang dihitung, berapa pun histori yang
+    ada di `df_log` (pemuat CohortCache membaca log sejak tanggal masuk tertua).
+    """
+    masuk = _day(tanggal_masuk)
+    df_log = df_log[df_log["Timestamp"] >= pd.Timestamp(tanggal_masuk).normalize()]
+    n_minggu = int(np.clip((_day(today or pd.Timestamp.now()) - masuk) // 7 + 1, 0, minggu))
+    n = len(df_students)
+    per_minggu = np.zeros(n * n_minggu, dtype=np.int64)
+    if n_minggu == 0:
+        return per_minggu.reshape(n, 0)
+
+    if CURRICULUM_COLUMN in df_students.columns:
+        kode = df_students[CURRICULUM_COLUMN].fillna(DEFAULT_CURRICULUM).to_numpy()
+    else:
+        kode = np.full(n, DEFAULT_CURRICULUM, dtype=object)
+    for k in pd.unique(kode):
+        pilih = np.flatnonzero(kode == k)
+        row, hari = first_pass_days(df_log, df_students["ID_Murid"].to_numpy()[pilih], get_curriculum(k))
+        pekan = (hari - masuk) // 7
+        dalam = pekan < n_minggu
+        per_minggu += np.bincount(pilih[row[dalam]] * n_minggu + pekan[dalam], minlength=n * n_minggu)
+    return np.cumsum(per_minggu.reshape(n, n_minggu), axis=1)
+
+
+def cohort_curve(df_log: pd.DataFrame, df_students: pd.DataFrame, angkatan: str, tanggal_masuk, today=None, minggu: int = MINGGU_KURVA) -> pd.DataFrame:
+    """Persentil kemajuan satu angkatan per minggu sejak masuk (Minggu 1 = tujuh hari pertama)."""
+    kemajuan = cohort_progress(df_log, df_students, tanggal_masuk, today, minggu)
+    n_minggu = kemajuan.shape[1]
+    out = pd.DataFrame(
+        {"Angkatan": angkatan, "Minggu": np.arange(1, n_minggu + 1), "Murid": len(df_students)},
+        columns=CURVE_COLUMNS,
+    )
+    if len(df_students) and n_minggu:
+        nilai = np.percentile(kemajuan, PERSENTIL, axis=0)
+        for p, baris in zip(PERSENTIL, nilai):
+            out[_percentile_name(p)] = baris
+    return out
+
+
+def compare_at_week(curves: pd.DataFrame, minggu: int) -> pd.DataFrame:
+    """Satu baris per angkatan: posisi kurva pada minggu ke-`minggu` sejak masuk (jika sudah dijalani)."""
+    return curves[curves["Minggu"] == minggu].reset_index(drop=True)
+
+
+class CohortCache:
+    """
+    Kurva per angkatan. Angkatan tertutup (sudah melewati `minggu` minggu)
+    disimpan dan dipakai ulang selama anggotanya sama; angkatan berjalan
+    selalu dihitung ulang. Log hanya dibaca jika ada kurva yang perlu dihitung.
+    """
+
+    def __init__(self):
+        self._tertutup = {}
+
+    def curves(self, cohorts: pd.DataFrame, df_students: pd.DataFrame, load_log, today=None, minggu: int = MINGGU_KURVA) -> pd.DataFrame:
+        """
+        Kurva semua angkatan di `cohorts` (hasil assign_cohorts). `load_log(start)`
+        mengembalikan log setoran sejak `start` (tanggal masuk paling awal di
+        antara angkatan yang perlu dihitung), sehingga arsip lama tidak dibaca.
+        """
+        today = pd.Timestamp(today or pd.Timestamp.now()).normalize()
+        hasil, hitung = {}, []
+        for angkatan, grup in cohorts.groupby("Angkatan", sort=True):
+            masuk = grup["Tanggal_Masuk"].iloc[0]
+            tertutup = _day(masuk) + minggu * 7 <= _day(today)
+            kunci = (angkatan, minggu, hash(tuple(np.sort(grup["ID_Murid"].to_numpy()))))
+            if tertutup and kunci in self._tertutup:
+                hasil[angkatan] = self._tertutup[kunci]
+            else:
+                hitung.append((angkatan, grup, masuk, kunci if tertutup else None))
+
+        if hitung:
+            # log dibaca dan disaring sekali untuk semua angkatan yang perlu dihitung
+            df_log = load_log(min(masuk for _, _, masuk, _ in hitung))
+            perlu = np.concatenate([grup["ID_Murid"].to_numpy() for _, grup, _, _ in hitung])
+            df_log = df_log[(df_log["Status"] == "Lulus") & df_log["ID_Murid"].isin(perlu)]
+            for angkatan, grup, masuk, kunci in hitung:
+                murid = df_students[df_students["ID_Murid"].isin(grup["ID_Murid"])]
+                hasil[angkatan] = cohort_curve(df_log, murid, angkatan, masuk, today, minggu)
+                if kunci is not None:
+                    self._tertutup[kunci] = hasil[angkatan]
+
+        parts = [hasil[a] for a in sorted(hasil)]
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=CURVE_COLUMNS)
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+from curriculum import target_ayat
+
+# =============================
+# PERKIRAAN TANGGAL SELESAI HAFALAN
+# =============================
+# Laju tiap murid diukur dari rollup harian (lihat daily_rollup), bukan log
+# mentah, untuk seluruh sekolah sekaligus:
+#   1. Ayat lulus per murid dijumlah per minggu (7 hari berjalan mundur dari
+#      hari ini) selama JENDELA_MINGGU terakhir -> matriks murid x minggu.
+#   2. Minggu tanpa setoran sama sekali di seluruh sekolah (libur) dibuang.
+#   3. Laju = median ayat per minggu efektif (tahan terhadap satu minggu
+#      "kebut"); murid yang jarang setor (median 0) memakai rata-rata.
+#   4. Sisa ayat dibagi laju dan dikoreksi porsi minggu efektif, sehingga
+#      libur yang biasa terjadi ikut diperhitungkan ke depan.
+# ForecastCache menyimpan hasil per murid dan hanya menghitung ulang murid
+# yang jumlah setoran / ayat lulus / targetnya berubah sejak perhitungan lalu.
+
+JENDELA_MINGGU = 8
+
+FORECAST_COLUMNS = ["ID_Murid", "Laju_Ayat_per_Minggu", "Sisa_Ayat", "Perkiraan_Selesai"]
+
+
+def _day(when) -> int:
+    return int(np.datetime64(pd.Timestamp(when).date(), "D").astype(np.int64))
+
+
+def weekly_matrix(records: np.ndarray, student_ids, today, minggu: int = JENDELA_MINGGU) -> tuple:
+    """
+    (ayat lulus murid x minggu, minggu aktif sekolah) dari record rollup
+    murid. Minggu 0 = 7 hari terakhir sampai `today`.
+    """
+    ids = pd.Index(np.asarray(student_ids, dtype=np.int64))
+    umur = _day(today) - records["hari"].astype(np.int64)
+    dalam = (umur >= 0) & (umur < minggu * 7)
+    rec, pekan = records[dalam], umur[dalam] // 7
+
+    aktif = np.bincount(pekan, weights=rec["setoran"], minlength=minggu) > 0
+    row = ids.get_indexer(rec["kunci"].astype(np.int64))
+    ada = row >= 0
+    sel = row[ada] * minggu + pekan[ada]
+    ayat = np.bincount(sel, weights=rec["ayat_lulus"][ada], minlength=len(ids) * minggu)
+    return ayat.reshape(len(ids), minggu), aktif
+
+
+def forecast_completion(records: np.ndarray, df_students: pd.DataFrame, today=None, minggu: int = JENDELA_MINGGU) -> pd.DataFrame:
+    """Perkiraan tanggal selesai target kurikulum untuk semua murid `df_students` dalam satu operasi vektor."""
+    today = pd.Timestamp(today or pd.Timestamp.now()).normalize()
+    ayat, aktif = weekly_matrix(records, df_students["ID_Murid"], today, minggu)
+    sisa = np.clip(target_ayat(df_students).to_numpy() - df_students["Total_Ayat_Lulus"].to_numpy(dtype=np.int64), 0, None)
+
+    if aktif.any():
+        efektif = ayat[:, aktif]
+        laju = np.median(efektif, axis=1)
+        laju = np.where(laju > 0, laju, efektif.mean(axis=1))
+    else:
+        laju = np.zeros(len(df_students))
+    porsi_aktif = aktif.mean()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hari = np.ceil(sisa / (laju * porsi_aktif) * 7)
+    bisa = (laju > 0) & np.isfinite(hari)
+    selesai = np.where(sisa == 0, 0, np.where(bisa, hari, 0)).astype("timedelta64[D]")
+    tanggal = np.where((sisa == 0) | bisa, np.datetime64(today.date(), "D") + selesai, np.datetime64("NaT", "D"))
+    return pd.DataFrame(
+        {
+            "ID_Murid": df_students["ID_Murid"].to_numpy(dtype=np.int64),
+            "Laju_Ayat_per_Minggu": np.round(laju, 1),
+            "Sisa_Ayat": sisa,
+            "Perkiraan_Selesai": pd.to_datetime(tanggal),
+        },
+        columns=FORECAST_COLUMNS,
+    )
+
+
+class ForecastCache:
+    """Hasil perkiraan per murid, dihitung ulang hanya untuk murid yang datanya berubah."""
+
+    def __init__(self):
+        self._hasil = None
+        self._versi = None
+
+    def get(self, records: np.ndarray, df_students: pd.DataFrame, today=None) -> pd.DataFrame:
+        """Perkiraan untuk `df_students` (urutan sama), memakai cache untuk murid yang tidak berubah."""
+        ids = df_students["ID_Murid"].to_numpy(dtype=np.int64)
+        setoran = pd.Series(records["setoran"].astype(np.int64)).groupby(records["kunci"].astype(np.int64)).sum()
+        versi = pd.DataFrame(
+            {
+                "setoran": setoran.reindex(ids, fill_value=0).to_numpy(),
+                "lulus": df_students["Total_Ayat_Lulus"].to_numpy(dtype=np.int64),
+                "target": target_ayat(df_students).to_numpy(),
+            },
+            index=ids,
+        )
+        if self._hasil is None:
+            berubah = np.ones(len(ids), dtype=bool)
+        else:
+            berubah = ~(self._versi.reindex(ids) == versi).all(axis=1).to_numpy()
+
+        if berubah.all():
+            self._hasil = forecast_completion(records, df_students, today).set_index("ID_Murid")
+            self._versi = versi
+        elif berubah.any():
+            baru = forecast_completion(records, df_students[berubah], today).set_index("ID_Murid")
+            self._hasil = pd.concat([self._hasil.drop(baru.index, errors="ignore"), baru])
+            self._versi = pd.concat([self._versi.drop(baru.index, errors="ignore"), versi[berubah]])
+        return self._hasil.reindex(ids).reset_index(names="ID_Murid")
@@ -0,0 +1,101 @@
+"""
+Konversi penyimpanan data hafalan antara format standar, per kelas dan Parquet.
+
+    standar   : data_hafalan.csv + log_hafalan.bin (log kompak, arsip di arsip_log/)
+    per_kelas : data_hafalan_kelas/ (satu CSV per kelas) + log_hafalan.bin
+    parquet   : data_hafalan.parquet + log_hafalan.parquet/ (dataset per tahun ajaran/bulan)
+
+Contoh:
+    python convert_storage.py parquet            # standar -> parquet
+    python convert_storage.py standar            # parquet -> standar
+    python convert_storage.py per_kelas          # standar -> per kelas
+    python convert_storage.py parquet --folder /data/hafalan
+
+Aplikasi memakai format lain jika dijalankan dengan HAFALAN_STORAGE=parquet
+atau HAFALAN_STORAGE=per_kelas.
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+from data_store import convert_data
+from log_archive import archive_dir_for, load_manifest
+from log_engine import read_log
+from log_store import LOG_COLUMNS, write_log_frame
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+BACKEND_STANDARD = "standar"
+BACKEND_PARQUET = "parquet"
+BACKEND_PER_KELAS = "per_kelas"
+BACKENDS = (BACKEND_STANDARD, BACKEND_PER_KELAS, BACKEND_PARQUET)
+
+STORAGE_FILES = {
+    BACKEND_STANDARD: ("data_hafalan.csv", "log_hafalan.bin"),
+    BACKEND_PER_KELAS: ("data_hafalan_kelas", "log_hafalan.bin"),
+    BACKEND_PARQUET: ("data_hafalan.parquet", "log_hafalan.parquet"),
+}
+
+
+def storage_paths(folder: str, backend: str):
+    """(path database murid, path log setoran) untuk backend tertentu."""
+    data_name, log_name = STORAGE_FILES[backend]
+    return os.path.join(folder, data_name), os.path.join(folder, log_name)
+
+
+def source_backend(folder: str, target: str) -> str:
+    """Backend sumber: backend lain pertama (urutan BACKENDS) yang database muridnya ada."""
+    for backend in BACKENDS:
+        if backend != target and os.path.exists(storage_paths(folder, backend)[0]):
+            return backend
+    return BACKEND_STANDARD if target != BACKEND_STANDARD else BACKEND_PARQUET
+
+
+def convert_storage(folder: str, target: str) -> dict:
+    """
+    Menyalin database murid dan seluruh histori log (termasuk partisi arsip)
+    dari backend lain ke backend `target`. File sumber tidak diubah.
+    Mengembalikan ringkasan {murid, setoran, detik}.
+    """
+    source = source_backend(folder, target)
+    src_data, src_log = storage_paths(folder, source)
+    dst_data, dst_log = storage_paths(folder, target)
+
+    started = time.perf_counter()
+    murid = convert_data(src_data, dst_data) if os.path.exists(src_data) else 0
+    if src_log == dst_log:
+        # standar <-> per_kelas memakai log yang sama; cukup database murid
+        return {"murid": murid, "setoran": 0, "detik": time.perf_counter() - started}
+
+    # read_log menggabungkan log panas + arsip, lengkap dengan Nama_Murid/Kelas
+    df_log = read_log(src_log)
+    if target != BACKEND_PARQUET:
+        # baris yang sudah ada di partisi arsip tidak ditulis lagi ke log panas
+        partisi = load_manifest(archive_dir_for(dst_log))["partitions"]
+        if partisi:
+            batas = max(pd.Timestamp(p["end"]) for p in partisi)
+            df_log = df_log[df_log["Timestamp"] > batas]
+    write_log_frame(dst_log, df_log[LOG_COLUMNS])
+    return {"murid": murid, "setoran": len(df_log), "detik": time.perf_counter() - started}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Konversi data hafalan antara format standar (CSV), per kelas dan Parquet.")
+    parser.add_argument("target", choices=BACKENDS, help="Format tujuan.")
+    parser.add_argument("--folder", default=BASE_DIR, help="Folder data aplikasi (default: folder skrip ini).")
+    args = parser.parse_args(argv)
+
+    ringkasan = convert_storage(args.folder, args.target)
+    dst_data, dst_log = storage_paths(args.folder, args.target)
+    print(
+        f"Selesai: {ringkasan['murid']} murid -> {os.path.basename(dst_data)}, "
+        f"{ringkasan['setoran']} setoran -> {os.path.basename(dst_log)} ({ringkasan['detik']:.2f} dtk)."
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
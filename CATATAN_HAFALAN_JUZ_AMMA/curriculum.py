@@ -0,0 +1,113 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# =============================
+# KURIKULUM (TARGET HAFALAN)
+# =============================
+# Selain Juz Amma (bawaan, didefinisikan di juz_amma_data), target hafalan
+# lain dibaca dari folder kurikulum/:
+#   daftar.csv  -> Kode,Nama,File        daftar kurikulum tambahan
+#   <File>      -> Surah,Jumlah_Ayat     urutan surah satu kurikulum
+#   kelas.csv   -> Kelas,Kurikulum       kurikulum per kelas
+#   murid.csv   -> ID_Murid,Kurikulum    pengecualian per murid (didahulukan)
+# Murid tanpa penetapan memakai DEFAULT_CURRICULUM. Kurikulum aktif murid
+# disimpan di kolom CURRICULUM_COLUMN pada DataFrame (tidak ditulis ke database).
+
+CURRICULUM_DIRNAME = "kurikulum"
+CURRICULUM_COLUMN = "Kurikulum"
+DEFAULT_CURRICULUM = "juz_amma"
+
+DEFAULT_CURRICULUM_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), CURRICULUM_DIRNAME)
+
+
+class Curriculum:
+    """Satu target hafalan: daftar surah berurutan, jumlah ayat, dan posisi ayat pertama tiap surah."""
+
+    def __init__(self, kode: str, nama: str, surah_map: dict):
+        self.kode = kode
+        self.nama = nama
+        self.surah_map = dict(surah_map)
+        self.surah_names = list(self.surah_map)
+        self.total_ayat = sum(self.surah_map.values())
+        # posisi ayat 1 tiap surah jika semua ayat kurikulum dijajarkan dalam satu baris
+        self.offsets = {}
+        posisi = 0
+        for surah, jumlah in self.surah_map.items():
+            self.offsets[surah] = posisi
+            posisi += jumlah
+        self.starts = np.array(list(self.offsets.values()), dtype=np.int64)
+
+    def __repr__(self):
+        return f"Curriculum({self.kode!r}, {len(self.surah_names)} surah, {self.total_ayat} ayat)"
+
+
+_REGISTRY = {}
+
+
+def register_curriculum(kurikulum: Curriculum) -> Curriculum:
+    _REGISTRY[kurikulum.kode] = kurikulum
+    return kurikulum
+
+
+def load_curricula(folder: str = None) -> dict:
+    """Mendaftarkan kurikulum dari `folder`/daftar.csv; mengembalikan semua kurikulum terdaftar."""
+    folder = folder or DEFAULT_CURRICULUM_DIR
+    daftar_path = os.path.join(folder, "daftar.csv")
+    if os.path.exists(daftar_path):
+        for row in pd.read_csv(daftar_path, dtype=str).itertuples(index=False):
+            surah = pd.read_csv(os.path.join(folder, row.File))
+            register_curriculum(
+                Curriculum(row.Kode, row.Nama, dict(zip(surah["Surah"], surah["Jumlah_Ayat"].astype(int))))
+            )
+    return dict(_REGISTRY)
+
+
+def get_curriculum(kode: str) -> Curriculum:
+    """Kurikulum berdasarkan kode; daftar di folder bawaan dibaca sekali jika kode belum dikenal."""
+    if kode not in _REGISTRY:
+        load_curricula()
+    return _REGISTRY[kode]
+
+
+def curriculum_of(record) -> Curriculum:
+    """Kurikulum satu murid (dict / baris DataFrame); tanpa kolom Kurikulum berarti kurikulum bawaan."""
+    kode = record.get(CURRICULUM_COLUMN)
+    return get_curriculum(kode if isinstance(kode, str) and kode else DEFAULT_CURRICULUM)
+
+
+def target_ayat(df: pd.DataFrame) -> pd.Series:
+    """Jumlah ayat target (total ayat kurikulum) setiap murid di `df`."""
+    if CURRICULUM_COLUMN not in df.columns:
+        return pd.Series(get_curriculum(DEFAULT_CURRICULUM).total_ayat, index=df.index)
+    kode = df[CURRICULUM_COLUMN].fillna(DEFAULT_CURRICULUM)
+    return kode.map({k: get_curriculum(k).total_ayat for k in kode.unique()}).astype(int)
+
+
+def surah_lengths() -> dict:
+    """Jumlah ayat setiap surah yang dikenal oleh kurikulum mana pun."""
+    load_curricula()
+    hasil = {}
+    for kurikulum in _REGISTRY.values():
+        hasil.update(kurikulum.surah_map)
+    return hasil
+
+
+def _assignment(folder: str, filename: str, key: str) -> pd.Series:
+    path = os.path.join(folder, filename)
+    if not os.path.exists(path):
+        return pd.Series(dtype=object)
+    df = pd.read_csv(path, dtype=str).dropna()
+    return pd.Series(df["Kurikulum"].str.strip().to_numpy(), index=df[key].str.strip().to_numpy())
+
+
+def assign_curricula(df: pd.DataFrame, folder: str = None) -> pd.Series:
+    """Kode kurikulum aktif setiap murid di `df`: murid.csv, lalu kelas.csv, lalu DEFAULT_CURRICULUM."""
+    folder = folder or DEFAULT_CURRICULUM_DIR
+    known = load_curricula(folder)
+    per_murid = df["ID_Murid"].astype(str).map(_assignment(folder, "murid.csv", "ID_Murid"))
+    per_kelas = df["Kelas"].astype(str).str.strip().map(_assignment(folder, "kelas.csv", "Kelas"))
+    kode = per_murid.fillna(per_kelas).fillna(DEFAULT_CURRICULUM)
+    # kode yang salah ketik di file penetapan jatuh ke kurikulum bawaan
+    return kode.where(kode.isin(list(known)), DEFAULT_CURRICULUM).astype(object)
@@ -0,0 +1,252 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from export_jobs import data_version
+from log_archive import archive_dir_for
+from log_engine import read_log
+
+# =============================
+# ROLLUP HARIAN (PER MURID DAN PER KELAS)
+# =============================
+# Grafik perkembangan tidak lagi mengelompokkan log mentah per Tanggal di
+# setiap kunjungan. Ringkasan harian disimpan di folder rollup_harian/:
+#   murid.bin  -> record (ID_Murid, hari, ayat lulus, setoran, mengulang)
+#   kelas.bin  -> record yang sama dengan kunci = kode kelas
+#   guru.bin   -> record yang sama dengan kunci = (kode guru << 16) | kode kelas
+#   meta.json  -> daftar nama kelas dan guru (kode = posisi) dan versi log yang tercakup
+# Setiap log_setoran menambah satu setoran ke record (kunci, hari ini): record
+# yang sudah ada diubah di tempat lewat memmap, record baru ditambahkan di
+# akhir file. Jika log diubah di luar aplikasi (versi di meta.json tidak
+# cocok), rollup dibangun ulang sekali dari seluruh log + arsip.
+# Rollup kelas mengikuti kolom Kelas log: kelas murid saat setoran dicatat
+# (pembangunan ulang dari log kompak memakai kelas murid saat itu).
+# Beberapa proses boleh berbagi folder ini selama penulisan dibungkus
+# store_lock.StoreLock: refresh() cukup memetakan ulang file jika meta.json
+# di disk sudah mencakup log terbaru.
+
+ROLLUP_DIRNAME = "rollup_harian"
+META_NAME = "meta.json"
+
+ROLLUP_DTYPE = np.dtype(
+    [
+        ("kunci", "<u4"),
+        ("hari", "<u4"),  # nomor hari epoch (1970-01-01 = 0)
+        ("ayat_lulus", "<u4"),
+        ("setoran", "<u4"),
+        ("mengulang", "<u4"),
+    ]
+)
+ROLLUP_COLUMNS = ["Tanggal", "Ayat_Lulus", "Setoran", "Mengulang"]
+GURU_COLUMNS = ["Guru_Pencatat", "Kelas"] + ROLLUP_COLUMNS
+_KELAS_BITS = 16
+
+
+def _day(when) -> int:
+    return int(np.datetime64(pd.Timestamp(when).date(), "D").astype(np.int64))
+
+
+class RollupTable:
+    """Satu file rollup: peta (kunci, hari) -> nomor record, diperbarui di tempat."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._open()
+
+    def _map(self):
+        if os.path.exists(self.path) and os.path.getsize(self.path) >= ROLLUP_DTYPE.itemsize:
+            self.records = np.memmap(self.path, dtype=ROLLUP_DTYPE, mode="r+")
+        else:
+            self.records = np.zeros(0, dtype=ROLLUP_DTYPE)
+
+    def _open(self):
+        self._map()
+        self._rows = dict(zip(self._keys(self.records["kunci"], self.records["hari"]).tolist(), range(len(self.records))))
+
+    @staticmethod
+    def _keys(kunci, hari) -> np.ndarray:
+        return (np.asarray(kunci, dtype=np.int64) << 32) | np.asarray(hari, dtype=np.int64)
+
+    def add(self, kunci: int, hari: int, ayat_lulus: int, setoran: int, mengulang: int):
+        key = int(self._keys(kunci, hari))
+        row = self._rows.get(key)
+        if row is not None:
+            rec = self.records[row]
+            self.records[row] = (kunci, hari, rec["ayat_lulus"] + ayat_lulus, rec["setoran"] + setoran, rec["mengulang"] + mengulang)
+            self.records.flush()
+            return
+        with open(self.path, "ab") as f:
+            f.write(np.array([(kunci, hari, ayat_lulus, setoran, mengulang)], dtype=ROLLUP_DTYPE).tobytes())
+        self._map()
+        self._rows[key] = len(self.records) - 1
+
+    def replace(self, records: np.ndarray):
+        """Menulis ulang seluruh file secara atomik (tmp lalu os.replace)."""
+        with open(self.path + ".tmp", "wb") as f:
+            f.write(records.astype(ROLLUP_DTYPE).tobytes())
+        os.replace(self.path + ".tmp", self.path)
+        self._open()
+
+    def series(self, kunci=None, start=None, end=None) -> pd.DataFrame:
+        """Ringkasan harian (urut Tanggal) untuk satu/beberapa kunci (None = semua), dijumlah per hari."""
+        rec = self.records
+        keep = np.ones(len(rec), dtype=bool)
+        if kunci is not None:
+            keep &= np.isin(rec["kunci"], np.atleast_1d(np.asarray(kunci, dtype=np.int64)))
+        if start is not None:
+            keep &= rec["hari"] >= _day(start)
+        if end is not None:
+            keep &= rec["hari"] < _day(end)
+        rec = rec[keep]
+
+        hari, posisi = np.unique(rec["hari"], return_inverse=True)
+
+        def jumlah(col):
+            return np.bincount(posisi, weights=rec[col], minlength=len(hari)).astype(np.int64)
+
+        return pd.DataFrame(
+            {
+                "Tanggal": pd.to_datetime(hari.astype("datetime64[D]")),
+                "Ayat_Lulus": jumlah("ayat_lulus"),
+                "Setoran": jumlah("setoran"),
+                "Mengulang": jumlah("mengulang"),
+            },
+            columns=ROLLUP_COLUMNS,
+        )
+
+
+def _aggregate(kunci, hari, ayat_lulus, mengulang) -> np.ndarray:
+    """Record rollup dari satu elemen per setoran (vektor), dijumlah per (kunci, hari)."""
+    df = pd.DataFrame(
+        {"kunci": kunci, "hari": hari, "ayat_lulus": ayat_lulus, "setoran": 1, "mengulang": mengulang}
+    )
+    agg = df.groupby(["kunci", "hari"], sort=True).sum().reset_index()
+    out = np.zeros(len(agg), dtype=ROLLUP_DTYPE)
+    for col in ROLLUP_DTYPE.names:
+        out[col] = agg[col].to_numpy()
+    return out
+
+
+class DailyRollups:
+    """Rollup harian per murid dan per kelas untuk satu file log setoran."""
+
+    def __init__(self, folder: str, log_path: str):
+        self.folder = folder
+        self.log_path = os.path.abspath(log_path)  # versi log dihitung dari path absolut
+        os.makedirs(folder, exist_ok=True)
+        self.murid = RollupTable(os.path.join(folder, "murid.bin"))
+        self.kelas = RollupTable(os.path.join(folder, "kelas.bin"))
+        self.guru = RollupTable(os.path.join(folder, "guru.bin"))
+        self.meta = self._load_meta()
+
+    def _load_meta(self) -> dict:
+        path = os.path.join(self.folder, META_NAME)
+        if not os.path.exists(path):
+            return {"versi_log": None, "kelas": [], "guru": []}
+        with open(path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if "guru" not in meta:
+            meta["versi_log"] = None  # rollup lama tanpa guru.bin -> bangun ulang sekali
+        return meta
+
+    def _save_meta(self):
+        path = os.path.join(self.folder, META_NAME)
+        self.meta["versi_log"] = self._log_version()
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, ensure_ascii=False, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def _log_version(self) -> str:
+        return data_version(self.log_path, archive_dir_for(self.log_path))
+
+    def _class_code(self, kelas: str) -> int:
+        kelas = str(kelas)
+        if kelas not in self.meta["kelas"]:
+            self.meta["kelas"].append(kelas)
+        return self.meta["kelas"].index(kelas)
+
+    def _guru_key(self, guru: str, kelas: str) -> int:
+        guru = str(guru)
+        if guru not in self.meta["guru"]:
+            self.meta["guru"].append(guru)
+        return (self.meta["guru"].index(guru) << _KELAS_BITS) | self._class_code(kelas)
+
+    def refresh(self) -> bool:
+        """Bangun ulang dari log jika log berubah di luar record(); True jika dibangun ulang."""
+        versi = self._log_version()
+        if self.meta["versi_log"] == versi:
+            return False
+        disk = self._load_meta()
+        if disk["versi_log"] == versi:
+            # proses lain (mis. server API) sudah mencatat setoran: cukup petakan ulang file
+            self.meta = disk
+            for table in (self.murid, self.kelas, self.guru):
+                table._open()
+            return False
+        self.rebuild()
+        return True
+
+    def rebuild(self):
+        """Membangun seluruh rollup dari log + arsip dalam satu agregasi vektor."""
+        df_log = read_log(
+            self.log_path, columns=["ID_Murid", "Kelas", "Ayat_Dari", "Ayat_Sampai", "Status", "Guru_Pencatat"]
+        )
+        hari = df_log["Timestamp"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+        lulus = (df_log["Status"] == "Lulus").to_numpy()
+        ayat_lulus = np.where(lulus, df_log["Jumlah_Ayat"].to_numpy(dtype=np.int64), 0)
+        mengulang = (df_log["Status"] == "Mengulang").to_numpy().astype(np.int64)
+
+        kode_kelas, nama_kelas = pd.factorize(df_log["Kelas"].astype(str))
+        kode_guru, nama_guru = pd.factorize(df_log["Guru_Pencatat"].fillna("").astype(str))
+        self.meta["kelas"] = [str(k) for k in nama_kelas]
+        self.meta["guru"] = [str(g) for g in nama_guru]
+        self.murid.replace(_aggregate(df_log["ID_Murid"].to_numpy(dtype=np.int64), hari, ayat_lulus, mengulang))
+        self.kelas.replace(_aggregate(kode_kelas, hari, ayat_lulus, mengulang))
+        kunci_guru = (kode_guru.astype(np.int64) << _KELAS_BITS) | kode_kelas
+        self.guru.replace(_aggregate(kunci_guru, hari, ayat_lulus, mengulang))
+        self._save_meta()
+
+    def record(self, student_id, kelas, when, status_code: int, jumlah_ayat: int, guru_pencatat: str = ""):
+        """
+        Menambahkan satu setoran yang baru saja ditulis ke log. Panggil
+        refresh() sebelum baris log ditulis agar rollup sudah sinkron.
+        """
+        hari = _day(when)
+        ayat_lulus = jumlah_ayat if status_code == 1 else 0
+        mengulang = 1 if status_code == 2 else 0
+        self.murid.add(int(student_id), hari, ayat_lulus, 1, mengulang)
+        self.kelas.add(self._class_code(kelas), hari, ayat_lulus, 1, mengulang)
+        self.guru.add(self._guru_key(guru_pencatat, kelas), hari, ayat_lulus, 1, mengulang)
+        self._save_meta()
+
+    def student_series(self, student_id, start=None, end=None) -> pd.DataFrame:
+        return self.murid.series(int(student_id), start, end)
+
+    def class_series(self, kelas, start=None, end=None) -> pd.DataFrame:
+        if str(kelas) not in self.meta["kelas"]:
+            return self.kelas.series([], start, end)
+        return self.kelas.series(self.meta["kelas"].index(str(kelas)), start, end)
+
+    def teacher_daily(self, start=None, end=None) -> pd.DataFrame:
+        """Record harian per (guru, kelas) apa adanya (tanpa penjumlahan), urut Tanggal."""
+        rec = self.guru.records
+        keep = np.ones(len(rec), dtype=bool)
+        if start is not None:
+            keep &= rec["hari"] >= _day(start)
+        if end is not None:
+            keep &= rec["hari"] < _day(end)
+        rec = np.sort(rec[keep], order="hari")
+        kunci = rec["kunci"].astype(np.int64)
+        return pd.DataFrame(
+            {
+                "Guru_Pencatat": np.asarray(self.meta["guru"] or [""], dtype=object)[kunci >> _KELAS_BITS],
+                "Kelas": np.asarray(self.meta["kelas"] or [""], dtype=object)[kunci & ((1 << _KELAS_BITS) - 1)],
+                "Tanggal": pd.to_datetime(rec["hari"].astype("datetime64[D]")),
+                "Ayat_Lulus": rec["ayat_lulus"].astype(np.int64),
+                "Setoran": rec["setoran"].astype(np.int64),
+                "Mengulang": rec["mengulang"].astype(np.int64),
+            },
+            columns=GURU_COLUMNS,
+        )
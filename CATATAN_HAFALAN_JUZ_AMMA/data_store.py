@@ -0,0 +1,170 @@
+import json
+import os
+import re
+
+import pandas as pd
+
+# =============================
+# PENYIMPANAN DATABASE MURID
+# =============================
+# data_hafalan dapat disimpan sebagai:
+#   .csv       -> satu file CSV (bawaan)
+#   .parquet   -> satu file Parquet (kolom bertipe, bisa dibaca sebagian kolom saja)
+#   _kelas/    -> folder berisi satu CSV per kelas + katalog.json
+# Format dipilih dari path, sehingga pemanggil cukup memakai read_data / write_data.
+#
+# Pada format per kelas, nama file shard memuat nomor generasi
+# (mis. VII_A.g12.csv). Penulisan membuat file generasi baru lalu mengganti
+# katalog dalam satu os.replace; katalog inilah yang menentukan file mana
+# yang berlaku. Karena itu pindah kelas yang menyentuh beberapa shard
+# tetap atomik: pembaca melihat semua shard lama atau semua shard baru.
+
+FORMAT_CSV = "csv"
+FORMAT_PARQUET = "parquet"
+FORMAT_SHARDED = "per_kelas"
+
+CATALOG_NAME = "katalog.json"
+
+
+def data_format(path: str) -> str:
+    if path.endswith(".parquet"):
+        return FORMAT_PARQUET
+    if path.rstrip(os.sep).endswith("_kelas"):
+        return FORMAT_SHARDED
+    return FORMAT_CSV
+
+
+# =============================
+# SHARD PER KELAS
+# =============================
+
+def _shard_stem(kelas: str) -> str:
+    return re.sub(r"[^0-9A-Za-z]+", "_", str(kelas)).strip("_") or "tanpa_kelas"
+
+
+def load_catalog(path: str) -> dict:
+    """Katalog shard: {"generasi": n, "kelas": {kelas: {"file": ..., "murid": ...}}}."""
+    catalog_path = os.path.join(path, CATALOG_NAME)
+    if not os.path.exists(catalog_path):
+        return {"generasi": 0, "kelas": {}}
+    with open(catalog_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_classes(path: str):
+    """Daftar kelas yang tersimpan, tanpa membaca data murid (hanya katalog untuk format per kelas)."""
+    if data_format(path) == FORMAT_SHARDED:
+        return sorted(load_catalog(path)["kelas"])
+    return sorted(read_data(path, columns=["Kelas"])["Kelas"].astype(str).unique())
+
+
+def _read_shards(path: str, columns=None, kelas=None) -> pd.DataFrame:
+    for _ in range(3):
+        catalog = load_catalog(path)
+        wanted = catalog["kelas"] if kelas is None else {k: catalog["kelas"][k] for k in map(str, kelas) if k in catalog["kelas"]}
+        try:
+            parts = [pd.read_csv(os.path.join(path, info["file"]), usecols=columns) for info in wanted.values()]
+            break
+        except FileNotFoundError:
+            continue  # katalog baru saja diganti penulis lain; baca ulang
+    else:
+        raise FileNotFoundError(f"Shard di {path} berubah terus saat dibaca.")
+    if not parts:
+        return pd.DataFrame(columns=columns) if columns else pd.DataFrame()
+    return pd.concat(parts, ignore_index=True)
+
+
+def _write_shards(df: pd.DataFrame, path: str, kelas=None):
+    """
+    Menulis ulang shard kelas `kelas` (semua kelas jika None) dari `df`.
+    Kelas yang tidak lagi punya murid dihapus dari katalog.
+    """
+    os.makedirs(path, exist_ok=True)
+    catalog = load_catalog(path)
+    generasi = catalog["generasi"] + 1
+    groups = {str(k): g for k, g in df.groupby(df["Kelas"].astype(str), sort=False)}
+    targets = set(groups) | set(catalog["kelas"]) if kelas is None else {str(k) for k in kelas}
+
+    new_classes = dict(catalog["kelas"])
+    old_files = []
+    used = set()
+    for k in sorted(targets):
+        if k in catalog["kelas"]:
+            old_files.append(catalog["kelas"][k]["file"])
+        if k not in groups:
+            new_classes.pop(k, None)
+            continue
+        # "VII-A" dan "VII A" sama-sama VII_A; beri nomor agar file tidak bertabrakan
+        stem = _shard_stem(k)
+        name, n = f"{stem}.g{generasi}.csv", 1
+        while name in used:
+            n += 1
+            name = f"{stem}_{n}.g{generasi}.csv"
+        used.add(name)
+        groups[k].to_csv(os.path.join(path, name), index=False)
+        new_classes[k] = {"file": name, "murid": int(len(groups[k]))}
+
+    catalog_path = os.path.join(path, CATALOG_NAME)
+    with open(catalog_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"generasi": generasi, "kelas": new_classes}, f, ensure_ascii=False, indent=2)
+    os.replace(catalog_path + ".tmp", catalog_path)  # titik komit
+
+    for name in old_files:
+        try:
+            os.remove(os.path.join(path, name))
+        except FileNotFoundError:
+            pass
+
+
+# =============================
+# BACA / TULIS
+# =============================
+
+def read_data(path: str, columns=None, kelas=None) -> pd.DataFrame:
+    """
+    Membaca database murid. `columns` membatasi kolom yang dibaca; untuk
+    Parquet kolom lain (mis. Status_Hafalan) sama sekali tidak disentuh.
+    `kelas` membatasi kelas yang dibaca; pada format per kelas hanya shard
+    kelas tersebut yang dibuka.
+    """
+    fmt = data_format(path)
+    if fmt == FORMAT_SHARDED:
+        if not os.path.isdir(path):
+            raise FileNotFoundError(path)
+        return _read_shards(path, columns, kelas)
+    if fmt == FORMAT_PARQUET:
+        df = pd.read_parquet(path, columns=columns)
+    else:
+        df = pd.read_csv(path, usecols=columns)
+    if kelas is not None:
+        df = df[df["Kelas"].astype(str).isin([str(k) for k in kelas])].reset_index(drop=True)
+    return df
+
+
+def write_data(df: pd.DataFrame, path: str, kelas=None):
+    """
+    Menulis database murid secara atomik (tmp lalu os.replace).
+    Pada format per kelas, `kelas` membatasi shard yang ditulis ulang
+    (mis. hanya kelas asal dan tujuan saat pindah kelas); format lain
+    selalu menulis seluruh file.
+    """
+    if data_format(path) == FORMAT_SHARDED:
+        _write_shards(df, path, kelas)
+        return
+    tmp_path = path + ".tmp"
+    if data_format(path) == FORMAT_PARQUET:
+        out = df.copy()
+        if "NIS" in out.columns:
+            # kolom campuran angka/teks tidak bisa disimpan di Parquet; NIS selalu teks
+            out["NIS"] = out["NIS"].astype("string").fillna("").str.replace(r"\.0+$", "", regex=True)
+        out.to_parquet(tmp_path, index=False)
+    else:
+        df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def convert_data(src: str, dst: str) -> int:
+    """Mengonversi database murid antar format (CSV / Parquet / per kelas). Mengembalikan jumlah murid."""
+    df = read_data(src)
+    write_data(df, dst)
+    return len(df)
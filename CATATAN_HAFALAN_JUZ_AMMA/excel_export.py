@@ -0,0 +1,170 @@
+import re
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+# =============================
+# EKSPOR LAPORAN KE EXCEL (XLSX)
+# =============================
+# Workbook ditulis dengan mode write-only openpyxl: baris dialirkan langsung
+# ke file (tidak disimpan sebagai objek Cell di memori), dan lebar kolom
+# dihitung dari DataFrame sebelum baris pertama ditulis. Dengan begitu
+# workbook satu sekolah (puluhan ribu baris, satu sheet per kelas) tetap
+# hemat memori.
+
+MAX_COLUMN_WIDTH = 60
+_INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+
+def column_widths(df: pd.DataFrame):
+    """Lebar tiap kolom = teks terpanjang (header atau isi) + 3, dihitung vektor per kolom."""
+    widths = []
+    for col in df.columns:
+        values = df[col]
+        longest = values.astype(str).str.len().max() if len(values) else 0
+        longest = 0 if pd.isna(longest) else int(longest)
+        widths.append(min(max(longest, len(str(col))) + 3, MAX_COLUMN_WIDTH))
+    return widths
+
+
+def safe_sheet_name(name, used=None) -> str:
+    """Nama sheet Excel maksimal 31 karakter, tanpa karakter terlarang, dan unik dalam workbook."""
+    base = _INVALID_SHEET_CHARS.sub("-", str(name)).strip() or "Sheet"
+    base = base[:31]
+    if used is None:
+        return base
+    candidate, n = base, 2
+    while candidate.lower() in used:
+        suffix = f" ({n})"
+        candidate = base[: 31 - len(suffix)] + suffix
+        n += 1
+    used.add(candidate.lower())
+    return candidate
+
+
+def _excel_value(value):
+    """Konversi nilai numpy/pandas ke tipe Python yang dipahami openpyxl."""
+    if value is None:
+        return None
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is pd.NaT or value is pd.NA:
+        return None
+    return value
+
+
+def write_report_sheet(wb, sheet_name: str, df: pd.DataFrame, title: str, progress=None):
+    """
+    Menulis satu sheet laporan ke workbook write-only: judul (digabung selebar
+    tabel) di baris 1, baris kosong, header tebal di baris 3, lalu data.
+    """
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font
+    from openpyxl.utils import get_column_letter
+
+    ws = wb.create_sheet(title=sheet_name)
+    n_cols = max(len(df.columns), 1)
+
+    # lebar kolom wajib diset sebelum baris pertama ditulis
+    for i, width in enumerate(column_widths(df), start=1):
+        ws.column_dimensions[get_column_letter(i)].width = width
+
+    title_cell = WriteOnlyCell(ws, value=title)
+    title_cell.font = Font(size=14, bold=True)
+    title_cell.alignment = Alignment(horizontal="center")
+    ws.append([title_cell])
+    ws.merged_cells.add(f"A1:{get_column_letter(n_cols)}1")
+    ws.append([])
+
+    header_font = Font(bold=True)
+    header_align = Alignment(horizontal="center")
+    header = []
+    for col in df.columns:
+        cell = WriteOnlyCell(ws, value=str(col))
+        cell.font = header_font
+        cell.alignment = header_align
+        header.append(cell)
+    ws.append(header)
+
+    total = len(df)
+    step = max(total // 20, 1)
+    for i, row in enumerate(df.itertuples(index=False, name=None)):
+        ws.append([_excel_value(v) for v in row])
+        if progress and i % step == 0:
+            progress(i / total)
+    return ws
+
+
+def build_annual_excel(laporan_df: pd.DataFrame, tahun: int, progress=None) -> bytes:
+    """
+    Membangun file Excel laporan tahunan (satu sheet): judul besar di baris 1,
+    tabel mulai baris 3 dengan header tebal dan lebar kolom otomatis.
+    `progress(fraction)` opsional dipanggil selama proses.
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    write_report_sheet(
+        wb,
+        safe_sheet_name(f"Laporan {tahun}"),
+        laporan_df,
+        f"Laporan Tahunan Hafalan Juz Amma - Tahun {tahun}",
+        progress,
+    )
+    output = BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+def build_school_workbook(df: pd.DataFrame, title: str, group_col: str = "Kelas", progress=None) -> bytes:
+    """
+    Workbook satu sekolah dengan satu sheet per kelas (`group_col`).
+    Setiap sheet dialirkan baris demi baris sehingga memori tetap terbatas
+    walau total puluhan ribu baris.
+    """
+    from openpyxl import Workbook
+
+    progress = progress or (lambda fraction: None)
+    wb = Workbook(write_only=True)
+    used_names = set()
+    total = max(len(df), 1)
+    done = 0
+
+    for kelas, group in df.groupby(group_col, sort=True):
+        base = done / total
+        share = len(group) / total
+        write_report_sheet(
+            wb,
+            safe_sheet_name(kelas, used_names),
+            group,
+            f"{title} - Kelas {kelas}",
+            lambda fraction, base=base, share=share: progress(base + fraction * share),
+        )
+        done += len(group)
+        progress(done / total)
+
+    if not used_names:
+        write_report_sheet(wb, "Laporan", df, title)
+
+    output = BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+def build_sheets_workbook(sheets: dict, title: str, progress=None) -> bytes:
+    """Workbook dengan satu sheet per entri `sheets` ({nama sheet: DataFrame}), judul `title` - nama sheet."""
+    from openpyxl import Workbook
+
+    progress = progress or (lambda fraction: None)
+    wb = Workbook(write_only=True)
+    used_names = set()
+    for i, (name, df) in enumerate(sheets.items()):
+        write_report_sheet(wb, safe_sheet_name(name, used_names), df, f"{title} - {name}")
+        progress((i + 1) / len(sheets))
+
+    output = BytesIO()
+    wb.save(output)
+    return output.getvalue()
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+# =============================
+# ANTRIAN PEKERJAAN EKSPOR (BACKGROUND)
+# =============================
+# File ekspor (Excel, PDF, ...) dibangun di thread pool, bukan di dalam
+# rerun Streamlit. Hasil yang selesai disimpan di disk dengan kunci
+# (jenis laporan, parameter, versi data), sehingga laporan yang sama
+# tidak pernah dibangun dua kali dan tombol unduh cukup membaca file cache.
+# Begitu versi yang lebih baru dari laporan yang sama selesai, artefak versi
+# lama dihapus; sisa dari sesi sebelumnya dibatasi MAX_ARTIFACTS file.
+
+CACHE_DIRNAME = "cache_ekspor"
+MAX_ARTIFACTS = 64
+
+JOB_IDLE = "belum diminta"
+JOB_PENDING = "menunggu"
+JOB_RUNNING = "diproses"
+JOB_DONE = "selesai"
+JOB_FAILED = "gagal"
+
+
+def data_version(*paths) -> str:
+    """
+    Versi data berdasarkan ukuran dan waktu modifikasi file sumber.
+    Berubah setiap kali salah satu file ditulis ulang / ditambah.
+    Untuk folder (mis. dataset Parquet) semua file di dalamnya ikut dihitung.
+    """
+    parts = []
+    for path in paths:
+        files = [path]
+        if os.path.isdir(path):
+            files = sorted(os.path.join(root, f) for root, _, names in os.walk(path) for f in names)
+        for file in files:
+            try:
+                st_ = os.stat(file)
+                parts.append(f"{file}:{st_.st_size}:{st_.st_mtime_ns}")
+            except FileNotFoundError:
+                parts.append(f"{file}:-")
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def artifact_key(report_type: str, params: dict, version: str) -> str:
+    payload = json.dumps([report_type, params, version], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _report_slot(report_type: str, params: dict) -> str:
+    """Identitas laporan tanpa versi data: semua versinya saling menggantikan."""
+    return json.dumps([report_type, params], sort_keys=True, default=str)
+
+
+class ExportJob:
+    """Satu pekerjaan ekspor beserta status dan progresnya (0.0 - 1.0)."""
+
+    def __init__(self, key, report_type, params, filename, path):
+        self.key = key
+        self.report_type = report_type
+        self.params = params
+        self.filename = filename
+        self.path = path
+        self.status = JOB_IDLE
+        self.progress = 0.0
+        self.error = ""
+
+    @property
+    def done(self):
+        return self.status == JOB_DONE
+
+    def read_bytes(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+class ExportJobManager:
+    """
+    Pengelola antrian ekspor. `builder(progress_callback)` harus mengembalikan
+    bytes file; ia dipanggil di thread pool sehingga tidak boleh memakai
+    fungsi Streamlit.
+    """
+
+    def __init__(self, cache_dir: str, max_workers: int = 2, max_artifacts: int = MAX_ARTIFACTS):
+        self.cache_dir = cache_dir
+        self.max_artifacts = max_artifacts
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ekspor")
+        self._jobs = {}
+        self._latest = {}  # slot laporan -> kunci versi yang terakhir diminta
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _artifact_path(self, key, filename):
+        ext = os.path.splitext(filename)[1]
+        return os.path.join(self.cache_dir, key + ext)
+
+    def get(self, report_type: str, params: dict, version: str, filename: str) -> ExportJob:
+        """
+        Mengembalikan job untuk laporan ini tanpa mengantrikan apa pun.
+        Jika artefak sudah ada di disk, job langsung berstatus selesai.
+        """
+        key = artifact_key(report_type, params, version)
+        with self._lock:
+            self._latest[_report_slot(report_type, params)] = key
+            job = self._jobs.get(key)
+            if job is None:
+                job = ExportJob(key, report_type, params, filename, self._artifact_path(key, filename))
+                if os.path.exists(job.path):
+                    job.status = JOB_DONE
+                    job.progress = 1.0
+                self._jobs[key] = job
+            return job
+
+    def submit(self, report_type: str, params: dict, version: str, filename: str, builder) -> ExportJob:
+        """Mengantrikan pembangunan artefak jika belum ada / belum sedang diproses."""
+        job = self.get(report_type, params, version, filename)
+        with self._lock:
+            if job.status in (JOB_IDLE, JOB_FAILED):
+                job.status = JOB_PENDING
+                job.progress = 0.0
+                job.error = ""
+                self._executor.submit(self._run, job, builder)
+        return job
+
+    def _run(self, job: ExportJob, builder):
+        job.status = JOB_RUNNING
+
+        def progress(fraction):
+            job.progress = max(0.0, min(1.0, float(fraction)))
+
+        try:
+            data = builder(progress)
+            tmp_path = job.path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, job.path)
+            job.progress = 1.0
+            job.status = JOB_DONE
+        except Exception as e:
+            job.error = f"{e}\n{traceback.format_exc()}"
+            job.status = JOB_FAILED
+            return
+        with self._lock:
+            self._evict(job)
+
+    def _drop(self, job: ExportJob):
+        """Hapus artefak job dari disk dan memori (dipanggil di dalam self._lock)."""
+        job.status = JOB_IDLE
+        job.progress = 0.0
+        self._jobs.pop(job.key, None)
+        try:
+            os.remove(job.path)
+        except FileNotFoundError:
+            pass
+
+    def _evict(self, finished: ExportJob):
+        """
+        Buang versi lama dari laporan yang sama dengan `finished`, lalu batasi
+        isi folder cache (termasuk sisa sesi sebelumnya) ke max_artifacts file.
+        """
+        slot = _report_slot(finished.report_type, finished.params)
+        latest = self._latest.get(slot)
+        for job in list(self._jobs.values()):
+            if job.status != JOB_DONE or _report_slot(job.report_type, job.params) != slot:
+                continue
+            if job.key != latest and (job is finished or self._jobs.get(latest, job).done):
+                self._drop(job)
+
+        aktif = {job.path for job in self._jobs.values()}
+        files = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if path not in aktif and not name.endswith(".tmp"):
+                try:
+                    files.append((os.path.getmtime(path), path))
+                except FileNotFoundError:
+                    pass
+        berlebih = len(files) + len(aktif) - self.max_artifacts
+        for _, path in sorted(files)[:max(0, berlebih)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
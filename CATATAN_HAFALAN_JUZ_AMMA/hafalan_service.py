@@ -0,0 +1,394 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from completion_forecast import ForecastCache
+from convert_storage import BACKEND_STANDARD, convert_storage, storage_paths
+from curriculum import CURRICULUM_COLUMN, CURRICULUM_DIRNAME, assign_curricula, get_curriculum, load_curricula
+from daily_rollup import ROLLUP_DIRNAME, DailyRollups
+from data_store import read_data, write_data
+from export_jobs import data_version
+from juz_amma_data import create_initial_data_structure, patch_surah, surah_summary
+from leaderboard import SCOPE_SCHOOL, Leaderboard
+from log_archive import ARCHIVE_DIRNAME, needs_rotation, rotate_log
+from log_store import append_log, migrate_legacy_log
+from monthly_report import SNAPSHOT_DIRNAME, load_monthly_report
+from status_matrix import MATRIX_FILENAME, NILAI_MAX, NILAI_MIN, StatusMatrices
+from store_lock import LOCK_FILENAME, StoreLock
+from student_import import normalize_nis
+from teacher_analytics import teacher_summary
+
+# =============================
+# LAYANAN INTI PENCATATAN HAFALAN (TANPA STREAMLIT)
+# =============================
+# Operasi yang mengubah data (setoran, tambah murid, simpan database) dan
+# laporan dasar dikumpulkan di sini agar aplikasi Streamlit (app.py) dan
+# server API (api_server.py) memakai jalur tulis yang sama:
+#   matriks status (memmap) -> log setoran -> rollup harian -> papan peringkat
+# Semua penulisan dibungkus StoreLock folder data, jadi UI dan API boleh
+# berjalan bersamaan di proses berbeda. Kesalahan input dilaporkan sebagai
+# ValueError (input tidak valid) / NotFound (murid atau kelas tidak ada)
+# berisi pesan yang siap ditampilkan.
+
+STATUS_CODES = {"Lulus": 1, "Mengulang": 2}
+STATUS_LABELS = {kode: label for label, kode in STATUS_CODES.items()}
+SETORAN_FIELDS = ["ID_Murid", "Surah", "Ayat_Dari", "Ayat_Sampai", "Status", "Guru_Pencatat"]  # + Nilai (opsional)
+LEGACY_LOG_FILENAME = "log_hafalan.csv"  # log CSV lama, dimigrasi otomatis ke format kompak
+
+
+class NotFound(LookupError):
+    """Murid atau kelas yang diminta tidak ada di database."""
+
+
+def ensure_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Pastikan kolom penting selalu ada di dataframe meski file lama.
+    """
+    if "Guru_Pencatat" not in df.columns:
+        df["Guru_Pencatat"] = ""
+    if "NIS" not in df.columns:
+        df["NIS"] = ""
+    if "Total_Ayat_Lulus" not in df.columns:
+        df["Total_Ayat_Lulus"] = 0
+    if "Update_Terakhir" not in df.columns:
+        df["Update_Terakhir"] = ""
+    return df
+
+
+def status_code_of(status) -> int:
+    """Kode status dari label ("Lulus"/"Mengulang", huruf besar/kecil bebas) atau kode 1/2."""
+    label = str(status).strip()
+    if label.isdigit():
+        kode = int(label) if int(label) in STATUS_LABELS else None
+    else:
+        kode = {k.lower(): v for k, v in STATUS_CODES.items()}.get(label.lower())
+    if kode is None:
+        raise ValueError(f"Status '{status}' tidak dikenal. Gunakan Lulus atau Mengulang.")
+    return kode
+
+
+class HafalanService:
+    """Jalur baca/tulis bersama untuk satu folder data (database murid, log, matriks, rollup)."""
+
+    def __init__(self, base_dir: str, backend: str = BACKEND_STANDARD):
+        self.base_dir = base_dir
+        self.backend = backend
+        self.db_file, self.log_file = storage_paths(base_dir, backend)
+        self.curriculum_dir = os.path.join(base_dir, CURRICULUM_DIRNAME)
+        self.snapshot_dir = os.path.join(base_dir, SNAPSHOT_DIRNAME)
+        self.lock = StoreLock(os.path.join(base_dir, LOCK_FILENAME))
+        self.matrices = StatusMatrices(os.path.join(base_dir, MATRIX_FILENAME))
+        self.rollups = DailyRollups(os.path.join(base_dir, ROLLUP_DIRNAME), self.log_file)
+        self.leaderboard = Leaderboard(max(k.total_ayat for k in load_curricula(self.curriculum_dir).values()))
+        self.forecasts = ForecastCache()
+        self._df = None
+        self._versi = None
+
+    def prepare_storage(self) -> dict:
+        """
+        Langkah yang menulis ulang log/database sebelum data dipakai, di dalam
+        kunci agar tidak bertabrakan dengan setoran dari proses lain:
+        migrasi log CSV lama, konversi pertama kali ke backend non-standar, dan
+        rotasi log ke arsip. Hanya memeriksa keberadaan file / baris pertama log
+        jika tidak ada yang perlu dikerjakan, jadi murah dipanggil tiap rerun.
+        Mengembalikan {"migrasi": jumlah baris, "konversi": ringkasan/None, "rotasi": hasil/None}.
+        """
+        hasil = {"migrasi": 0, "konversi": None, "rotasi": None}
+        with self.lock:
+            hasil["migrasi"] = migrate_legacy_log(
+                os.path.join(self.base_dir, LEGACY_LOG_FILENAME), storage_paths(self.base_dir, BACKEND_STANDARD)[1]
+            )
+            if self.backend != BACKEND_STANDARD and not os.path.exists(self.db_file):
+                hasil["konversi"] = convert_storage(self.base_dir, self.backend)
+            if needs_rotation(self.log_file):
+                hasil["rotasi"] = rotate_log(self.log_file, os.path.join(self.base_dir, ARCHIVE_DIRNAME))
+        return hasil
+
+    # ---------- database murid ----------
+
+    def with_curricula(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Isi kolom Kurikulum (kurikulum aktif tiap murid) dari file di folder kurikulum/."""
+        df[CURRICULUM_COLUMN] = assign_curricula(df, self.curriculum_dir)
+        return df
+
+    def data_version(self) -> str:
+        return data_version(self.db_file, self.log_file)
+
+    def load_students(self, df: pd.DataFrame = None) -> pd.DataFrame:
+        """Database murid (dibaca dari disk jika `df` None) dengan status terbaru dari matriks status."""
+        with self.lock:
+            df = self.with_curricula(ensure_columns(read_data(self.db_file) if df is None else df))
+            df["NIS"] = normalize_nis(df["NIS"])  # CSV membaca NIS sebagai float (252607001.0)
+            self.matrices.sync_students(df)
+            return self.matrices.overlay(df)
+
+    def students(self) -> pd.DataFrame:
+        """
+        Salinan database milik layanan (dipakai server API). Dibaca ulang hanya
+        jika database/log diubah proses lain sejak penulisan terakhir layanan ini.
+        """
+        with self.lock:
+            versi = self.data_version()
+            if self._df is None or versi != self._versi:
+                self._df = self.load_students()
+                self._versi = versi
+            return self._df
+
+    def _written(self, df: pd.DataFrame):
+        """Setelah menulis lewat salinan milik layanan, versi data baru tidak perlu memicu baca ulang."""
+        if df is self._df:
+            self._versi = self.data_version()
+
+    def save_students(self, df: pd.DataFrame, kelas=None) -> pd.DataFrame:
+        """
+        Simpan df terbaru ke database utama (CSV/Parquet/per kelas).
+        `kelas` = kelas yang berubah; pada backend per kelas hanya shard itu yang ditulis ulang.
+        """
+        with self.lock:
+            df = self.with_curricula(ensure_columns(df))
+            # kolom Kurikulum hanya turunan dari folder kurikulum/, tidak ikut disimpan
+            write_data(df.drop(columns=[CURRICULUM_COLUMN]), self.db_file, kelas=kelas)
+            self.matrices.sync_students(df)
+            self._df = None  # salinan milik layanan dibaca ulang saat dipakai berikutnya
+            return df
+
+    def add_student(self, name: str, kelas: str, nis: str = "") -> int:
+        """
+        Menambah satu murid dan mengembalikan ID barunya. Database dibaca dari
+        disk di dalam kunci, sehingga murid yang baru ditambahkan proses lain
+        tidak tertimpa.
+        """
+        name, kelas, nis = str(name or "").strip(), str(kelas or "").strip(), str(nis or "").strip()
+        if not name or not kelas:
+            raise ValueError("Nama dan Kelas tidak boleh kosong.")
+        with self.lock:
+            # seluruh database dibaca ulang: matriks status disinkronkan dengan daftar murid lengkap
+            df = ensure_columns(read_data(self.db_file))
+            next_id = int(df["ID_Murid"].max()) + 1 if not df.empty else 1001
+            new_data = {
+                "ID_Murid": next_id,
+                "Nama_Murid": name,
+                "NIS": nis,
+                "Kelas": kelas,
+                "Status_Hafalan": create_initial_data_structure(),
+                "Total_Ayat_Lulus": 0,
+                "Update_Terakhir": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "Guru_Pencatat": "",
+            }
+            self.save_students(pd.concat([df, pd.DataFrame([new_data])], ignore_index=True), kelas=[kelas])
+        return next_id
+
+    # ---------- setoran ----------
+
+    def _apply_setoran(self, df: pd.DataFrame, setoran: dict, when: datetime) -> dict:
+        """Validasi + tulis matriks status + tambal `df` untuk satu setoran; mengembalikan baris log."""
+        if not isinstance(setoran, dict):
+            raise ValueError("Setoran harus berupa objek dengan kolom " + ", ".join(SETORAN_FIELDS) + ".")
+        kosong = [kolom for kolom in SETORAN_FIELDS if setoran.get(kolom) in (None, "")]
+        if kosong:
+            raise ValueError(f"Kolom wajib kosong: {', '.join(kosong)}.")
+        try:
+            student_id = int(setoran["ID_Murid"])
+            start_ayat, end_ayat = int(setoran["Ayat_Dari"]), int(setoran["Ayat_Sampai"])
+            nilai = None if setoran.get("Nilai") in (None, "") else int(setoran["Nilai"])
+        except (TypeError, ValueError):
+            raise ValueError("ID_Murid, Ayat_Dari, Ayat_Sampai dan Nilai harus bilangan bulat.") from None
+        surah = str(setoran["Surah"])
+        status_code = status_code_of(setoran["Status"])
+        guru_pencatat = str(setoran["Guru_Pencatat"])
+        if nilai is not None and not NILAI_MIN <= nilai <= NILAI_MAX:
+            raise ValueError(f"Nilai harus {NILAI_MIN}-{NILAI_MAX}.")
+
+        idx_list = df.index[df["ID_Murid"] == student_id]
+        if idx_list.empty:
+            raise NotFound(f"Murid {student_id} tidak ditemukan.")
+        idx = idx_list[0]
+        kurikulum = get_curriculum(df.loc[idx, CURRICULUM_COLUMN])
+
+        max_ayat = kurikulum.surah_map.get(surah)
+        if not max_ayat:
+            raise ValueError(f"Surah {surah} tidak termasuk kurikulum {kurikulum.nama}.")
+        if not (1 <= start_ayat <= max_ayat and 1 <= end_ayat <= max_ayat and start_ayat <= end_ayat):
+            raise ValueError(f"Rentang ayat tidak valid. Surah {surah} hanya punya ayat 1 sampai {max_ayat}.")
+
+        # Tulis byte ayat yang berubah langsung ke matriks status (memmap);
+        # database murid tidak perlu ditulis ulang untuk setiap setoran
+        total_lulus = self.matrices.update_range(
+            student_id, kurikulum.kode, surah, start_ayat, end_ayat, status_code, guru_pencatat, when, grade=nilai
+        )
+
+        # salinan di memori cukup ditambal pada potongan surah ini saja
+        df.loc[idx, "Status_Hafalan"] = patch_surah(
+            df.loc[idx, "Status_Hafalan"], surah, start_ayat, end_ayat, status_code, kurikulum
+        )
+        df.loc[idx, "Total_Ayat_Lulus"] = total_lulus
+        self.leaderboard.update(student_id, total_lulus, df.loc[idx, "Kelas"])
+        df.loc[idx, "Update_Terakhir"] = when.strftime("%Y-%m-%d %H:%M:%S")
+        df.loc[idx, "Guru_Pencatat"] = guru_pencatat
+
+        return {
+            "Timestamp": when.strftime("%Y-%m-%d %H:%M:%S"),
+            "ID_Murid": student_id,
+            "Nama_Murid": df.loc[idx, "Nama_Murid"],
+            "Kelas": df.loc[idx, "Kelas"],
+            "Surah": surah,
+            "Ayat_Dari": start_ayat,
+            "Ayat_Sampai": end_ayat,
+            "Status": STATUS_LABELS[status_code],
+            "Guru_Pencatat": guru_pencatat,
+            "Total_Ayat_Lulus": total_lulus,
+        }
+
+    def record_batch(self, df: pd.DataFrame, setoran_list) -> tuple:
+        """
+        Mencatat banyak setoran dalam satu kunci dan satu penambahan log.
+        Setoran yang tidak valid dilewati. Mengembalikan (berhasil, gagal):
+        berhasil = baris log yang ditulis (+ Total_Ayat_Lulus terbaru),
+        gagal = [{"indeks", "pesan"}].
+        """
+        berhasil, gagal = [], []
+        with self.lock:
+            when = datetime.now()
+            for i, setoran in enumerate(setoran_list):
+                try:
+                    berhasil.append(self._apply_setoran(df, setoran, when))
+                except (NotFound, ValueError) as e:
+                    gagal.append({"indeks": i, "pesan": e.args[0] if e.args else str(e)})
+            if berhasil:
+                rows = pd.DataFrame(berhasil).drop(columns=["Total_Ayat_Lulus"])
+                self.rollups.refresh()  # rollup harus sinkron dengan log sebelum baris baru ditambahkan
+                append_log(self.log_file, rows)
+                for row in berhasil:
+                    self.rollups.record(
+                        row["ID_Murid"], row["Kelas"], when, STATUS_CODES[row["Status"]],
+                        row["Ayat_Sampai"] - row["Ayat_Dari"] + 1, row["Guru_Pencatat"],
+                    )
+                self._written(df)
+        return berhasil, gagal
+
+    def record_setoran(
+        self, df, student_id, surah, start_ayat, end_ayat, status_code, guru_pencatat, nilai=None
+    ) -> dict:
+        """
+        Update status hafalan ayat tertentu untuk murid di `df` (ditambal di
+        tempat) dan catat log transaksi setoran. `nilai` (1-5, opsional)
+        disimpan per ayat beserta tanggal penilaian. Input tidak valid -> ValueError/NotFound.
+        """
+        setoran = {
+            "ID_Murid": student_id,
+            "Surah": surah,
+            "Ayat_Dari": start_ayat,
+            "Ayat_Sampai": end_ayat,
+            "Status": status_code,
+            "Guru_Pencatat": guru_pencatat,
+            "Nilai": nilai,
+        }
+        with self.lock:
+            when = datetime.now()
+            row = self._apply_setoran(df, setoran, when)
+            self.rollups.refresh()
+            append_log(self.log_file, pd.DataFrame([row]).drop(columns=["Total_Ayat_Lulus"]))
+            self.rollups.record(
+                row["ID_Murid"], row["Kelas"], when, STATUS_CODES[row["Status"]],
+                row["Ayat_Sampai"] - row["Ayat_Dari"] + 1, row["Guru_Pencatat"],
+            )
+            self._written(df)
+        return row
+
+    def submit(self, setoran_list) -> tuple:
+        """record_batch atas salinan database milik layanan (jalur server API)."""
+        with self.lock:
+            return self.record_batch(self.students(), setoran_list)
+
+    # ---------- laporan ----------
+
+    def school_leaderboard(self, df: pd.DataFrame) -> Leaderboard:
+        """Papan peringkat yang sudah disamakan dengan `df` (hanya murid yang berubah disentuh)."""
+        with self.lock:
+            self.leaderboard.sync(ensure_columns(df.copy()))
+        return self.leaderboard
+
+    def completion_forecasts(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Perkiraan selesai seluruh murid `df` (satu baris per murid, urutan sama dengan `df`)."""
+        with self.lock:
+            self.rollups.refresh()
+            return self.forecasts.get(self.rollups.murid.records, ensure_columns(df.copy()))
+
+    def class_report(self, df: pd.DataFrame, kelas: str) -> pd.DataFrame:
+        """Murid satu kelas urut Total_Ayat_Lulus, dengan target, peringkat sekolah dan perkiraan selesai."""
+        leaderboard = self.school_leaderboard(df)
+        kelas_df = df[df["Kelas"].astype(str) == str(kelas)]
+        if kelas_df.empty:
+            raise NotFound(f"Kelas {kelas} tidak ditemukan.")
+        kelas_df = kelas_df.sort_values("Total_Ayat_Lulus", ascending=False, kind="stable")
+        peringkat = leaderboard.ranks(kelas_df["ID_Murid"].tolist()).set_index("ID_Murid")
+        perkiraan = self.completion_forecasts(kelas_df).set_index("ID_Murid")
+        ids = kelas_df["ID_Murid"]
+        return pd.DataFrame(
+            {
+                "ID_Murid": ids.to_numpy(),
+                "Nama_Murid": kelas_df["Nama_Murid"].to_numpy(),
+                "NIS": kelas_df["NIS"].astype(str).to_numpy(),
+                "Total_Ayat_Lulus": kelas_df["Total_Ayat_Lulus"].to_numpy(dtype=np.int64),
+                "Target_Ayat": kelas_df[CURRICULUM_COLUMN].map(lambda k: get_curriculum(k).total_ayat).to_numpy(),
+                "Peringkat_Sekolah": ids.map(peringkat["Peringkat"]).to_numpy(),
+                "Persentil_Sekolah": ids.map(peringkat["Persentil"]).to_numpy(),
+                "Laju_Ayat_per_Minggu": ids.map(perkiraan["Laju_Ayat_per_Minggu"]).to_numpy(),
+                "Perkiraan_Selesai": ids.map(perkiraan["Perkiraan_Selesai"]).dt.strftime("%Y-%m-%d").to_numpy(),
+                "Update_Terakhir": kelas_df["Update_Terakhir"].astype(str).to_numpy(),
+            }
+        )
+
+    def student_report(self, df: pd.DataFrame, student_id) -> dict:
+        """Profil satu murid: progres, peringkat, perkiraan selesai, jumlah setoran dan rekap per surah."""
+        murid = df[df["ID_Murid"] == int(student_id)]
+        if murid.empty:
+            raise NotFound(f"Murid {student_id} tidak ditemukan.")
+        row = murid.iloc[0]
+        kurikulum = get_curriculum(row[CURRICULUM_COLUMN])
+        leaderboard = self.school_leaderboard(df)
+        tingkat = leaderboard.scope_of[int(student_id)]
+        perkiraan = self.completion_forecasts(murid).iloc[0]
+        with self.lock:
+            harian = self.rollups.student_series(student_id)
+        return {
+            "ID_Murid": int(student_id),
+            "Nama_Murid": row["Nama_Murid"],
+            "NIS": str(row["NIS"]),
+            "Kelas": row["Kelas"],
+            "Kurikulum": kurikulum.kode,
+            "Total_Ayat_Lulus": int(row["Total_Ayat_Lulus"]),
+            "Target_Ayat": kurikulum.total_ayat,
+            "Peringkat_Sekolah": leaderboard.rank(int(student_id)),
+            "Peringkat_Tingkat": dict(leaderboard.rank(int(student_id), tingkat), Tingkat=tingkat),
+            "Laju_Ayat_per_Minggu": float(perkiraan["Laju_Ayat_per_Minggu"]),
+            "Perkiraan_Selesai": None if pd.isna(perkiraan["Perkiraan_Selesai"]) else f"{perkiraan['Perkiraan_Selesai']:%Y-%m-%d}",
+            "Total_Setoran": int(harian["Setoran"].sum()),
+            "Total_Mengulang": int(harian["Mengulang"].sum()),
+            "Per_Surah": surah_summary(row["Status_Hafalan"], kurikulum).to_dict("records"),
+        }
+
+    def top(self, df: pd.DataFrame, k: int = 10, scope: str = SCOPE_SCHOOL) -> pd.DataFrame:
+        """K murid teratas satu cakupan (seluruh sekolah atau tingkat) beserta nama dan kelasnya."""
+        leaderboard = self.school_leaderboard(df)
+        if scope not in leaderboard.indexes:
+            raise ValueError(f"Cakupan {scope} tidak dikenal. Pilihan: {', '.join(leaderboard.scopes())}.")
+        return leaderboard.top(k, scope).join(df.set_index("ID_Murid")[["Nama_Murid", "Kelas"]], on="ID_Murid")
+
+    def monthly_report(self, df: pd.DataFrame, year: int, month: int) -> pd.DataFrame:
+        """Laporan bulanan (snapshot untuk bulan yang sudah lewat, lihat monthly_report)."""
+        laporan, _ = load_monthly_report(df, self.log_file, year, month, self.snapshot_dir)
+        return laporan
+
+    def daily_rollups(self) -> DailyRollups:
+        """Rollup harian yang sudah sinkron dengan log (dibangun ulang di dalam kunci jika log berubah dari luar)."""
+        with self.lock:
+            self.rollups.refresh()
+        return self.rollups
+
+    def teacher_report(self) -> pd.DataFrame:
+        """Ringkasan aktivitas guru dari rollup harian (lihat teacher_analytics)."""
+        with self.lock:
+            return teacher_summary(self.daily_rollups().teacher_daily())
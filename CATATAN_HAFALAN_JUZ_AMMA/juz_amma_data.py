@@ -1,7 +1,13 @@
+import base64
+import binascii
 import pandas as pd
 import json
+import numpy as np
 from datetime import datetime
 
+from curriculum import CURRICULUM_COLUMN, DEFAULT_CURRICULUM, Curriculum, get_curriculum, register_curriculum
+from data_store import read_data, write_data
+
 # --- 1. DATA MASTER SURAH JUZ AMMA ---
 # Dictionary berisi Surah dan jumlah ayatnya (untuk validasi dan inisiasi)
 JUZ_AMMA_MAP = {
@@ -17,22 +23,236 @@ JUZ_AMMA_MAP = {
 SURAH_NAMES = list(JUZ_AMMA_MAP.keys())
 TOTAL_AYAT_JUZ_AMMA = sum(JUZ_AMMA_MAP.values())
 
-# --- 2. FUNGSI PEMBANTU DATA ---
+# Juz Amma adalah kurikulum bawaan; kurikulum lain (Juz 29, Juz 28, 30 juz)
+# dibaca dari folder kurikulum/ (lihat curriculum.py). Semua fungsi status di
+# bawah menerima parameter `kurikulum` dengan Juz Amma sebagai nilai bawaan.
+JUZ_AMMA = register_curriculum(Curriculum(DEFAULT_CURRICULUM, "Juz Amma (Juz 30)", JUZ_AMMA_MAP))
+
+# Posisi ayat pertama tiap surah jika seluruh ayat Juz Amma dijajarkan
+# dalam satu baris (An-Naba' ayat 1 = posisi 0, An-Nas ayat 6 = posisi 563)
+SURAH_OFFSETS = JUZ_AMMA.offsets
+
+# --- 2. FORMAT KOLOM STATUS_HAFALAN ---
+# Status tiap ayat: 0 = Belum, 1 = Lulus, 2 = Mengulang (cukup 2 bit).
+# Status_Hafalan disimpan sebagai "v1:" + base64 dari status 2 bit per ayat
+# (4 ayat per byte, ayat pertama di bit tertinggi, urutan offset kurikulum).
+# Juz Amma: 141 byte -> 188 karakter, dibanding ~2 KB untuk JSON {surah: [0, 0, ...]}.
+# Kurikulum selain Juz Amma menyertakan kodenya: "v1:quran:" + base64.
+# Nilai dari kurikulum lain dipetakan per surah saat didekode (mis. murid
+# pindah dari Juz Amma ke 30 juz tetap membawa status Juz Amma-nya).
+# Format JSON lama tetap terbaca; initialize_database memigrasinya sekali.
+STATUS_FORMAT_V1 = "v1:"
+_SHIFTS = np.array([6, 4, 2, 0], dtype=np.uint8)
+# Jumlah ayat Belum/Lulus/Mengulang untuk setiap nilai byte (0-255)
+_BYTE_COUNTS = np.stack(
+    [((np.arange(256)[:, None] >> _SHIFTS) & 3 == kode).sum(axis=1) for kode in (0, 1, 2)], axis=1
+)
+
+
+def _packed_size(kurikulum) -> int:
+    # dibulatkan ke kelipatan 3 byte agar base64 tidak pernah memakai "=" (baris bisa digabung)
+    return -(-((kurikulum.total_ayat + 3) // 4) // 3) * 3
+
+
+def _status_prefix(kurikulum) -> str:
+    if kurikulum.kode == DEFAULT_CURRICULUM:
+        return STATUS_FORMAT_V1
+    return f"{STATUS_FORMAT_V1}{kurikulum.kode}:"
+
+
+def _v1_length(kurikulum) -> int:
+    return len(_status_prefix(kurikulum)) + 4 * (_packed_size(kurikulum) // 3)
+
+
+def _is_native(value, kurikulum) -> bool:
+    """True jika `value` berformat v1 milik `kurikulum` persis (bisa dibaca tanpa konversi)."""
+    return (
+        isinstance(value, str)
+        and len(value) == _v1_length(kurikulum)
+        and value.startswith(_status_prefix(kurikulum))
+        and (kurikulum.kode != DEFAULT_CURRICULUM or ":" not in value[len(STATUS_FORMAT_V1):])
+    )
+
+
+def _legacy_json_to_array(status_json, kurikulum) -> np.ndarray:
+    arr = np.zeros(kurikulum.total_ayat, dtype=np.uint8)
+    try:
+        status_dict = json.loads(status_json)
+    except Exception:
+        return arr
+    for surah, ayat_list in status_dict.items():
+        if surah not in kurikulum.offsets:
+            continue
+        n = min(len(ayat_list), kurikulum.surah_map[surah])
+        arr[kurikulum.offsets[surah]:kurikulum.offsets[surah] + n] = ayat_list[:n]
+    return arr
+
+
+def _unpack_bytes(packed, kurikulum) -> np.ndarray:
+    return ((packed[:, None] >> _SHIFTS) & 3).reshape(-1)[:kurikulum.total_ayat]
+
 
-def create_initial_data_structure():
+def _packed_bytes(value, kurikulum):
+    """Byte terkemas dari nilai v1 milik `kurikulum`, atau None jika bukan."""
+    if not _is_native(value, kurikulum):
+        return None
+    try:
+        raw = base64.b64decode(value[len(_status_prefix(kurikulum)):], validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    return np.frombuffer(raw, dtype=np.uint8)
+
+
+def convert_status(arr, sumber, tujuan) -> np.ndarray:
+    """Memetakan array status kurikulum `sumber` ke `tujuan` per surah (surah yang tidak ada = Belum)."""
+    out = np.zeros(tujuan.total_ayat, dtype=np.uint8)
+    for surah, n in tujuan.surah_map.items():
+        if surah in sumber.offsets:
+            out[tujuan.offsets[surah]:tujuan.offsets[surah] + n] = arr[sumber.offsets[surah]:sumber.offsets[surah] + n]
+    return out
+
+
+def pack_status(arr, kurikulum=JUZ_AMMA) -> str:
+    """Array status semua ayat kurikulum -> teks Status_Hafalan format v1."""
+    return pack_status_rows(np.asarray(arr, dtype=np.uint8)[None, :], kurikulum)[0]
+
+
+def pack_status_rows(arr2d, kurikulum=JUZ_AMMA) -> list:
+    """Versi vektor pack_status untuk matriks (n murid x jumlah ayat kurikulum)."""
+    arr2d = np.asarray(arr2d, dtype=np.uint8) & 3
+    padded = np.zeros((len(arr2d), _packed_size(kurikulum) * 4), dtype=np.uint8)
+    padded[:, :kurikulum.total_ayat] = arr2d
+    packed = (padded.reshape(len(arr2d), -1, 4) << _SHIFTS).sum(axis=2, dtype=np.uint8)
+    prefix = _status_prefix(kurikulum)
+    return [prefix + base64.b64encode(row.tobytes()).decode("ascii") for row in packed]
+
+
+def unpack_status(value, kurikulum=JUZ_AMMA) -> np.ndarray:
     """
-    Membuat struktur data hafalan awal (list berisi 0 untuk setiap ayat).
+    Teks Status_Hafalan (v1 atau JSON lama) -> array uint8 sepanjang jumlah ayat
+    kurikulum. Nilai v1 kurikulum lain dipetakan per surah; nilai rusak = semua Belum.
+    """
+    packed = _packed_bytes(value, kurikulum)
+    if packed is not None:
+        return _unpack_bytes(packed, kurikulum)
+    if not (isinstance(value, str) and value.startswith(STATUS_FORMAT_V1)):
+        return _legacy_json_to_array(value, kurikulum)
+
+    isi = value[len(STATUS_FORMAT_V1):]
+    kode = isi.split(":", 1)[0] if ":" in isi else DEFAULT_CURRICULUM
+    try:
+        sumber = get_curriculum(kode)
+    except KeyError:
+        return np.zeros(kurikulum.total_ayat, dtype=np.uint8)
+    packed = _packed_bytes(value, sumber)
+    if packed is None or sumber is kurikulum:
+        return np.zeros(kurikulum.total_ayat, dtype=np.uint8)
+    return convert_status(_unpack_bytes(packed, sumber), sumber, kurikulum)
+
+
+def unpack_status_column(values, kurikulum=JUZ_AMMA) -> np.ndarray:
+    """
+    Kolom Status_Hafalan -> matriks (n murid x jumlah ayat kurikulum). Baris v1
+    milik kurikulum ini didekode sekaligus dengan satu b64decode; baris lain
+    (JSON lama, kurikulum lain) diproses satu per satu.
+    """
+    values = pd.Series(values, dtype=object).reset_index(drop=True)
+    out = np.zeros((len(values), kurikulum.total_ayat), dtype=np.uint8)
+    prefix = _status_prefix(kurikulum)
+    is_v1 = np.array(values.str.startswith(prefix, na=False) & (values.str.len() == _v1_length(kurikulum)), dtype=bool)
+    if is_v1.any():
+        try:
+            raw = base64.b64decode("".join(s[len(prefix):] for s in values[is_v1]), validate=True)
+            packed = np.frombuffer(raw, dtype=np.uint8).reshape(-1, _packed_size(kurikulum))
+            out[is_v1] = ((packed[:, :, None] >> _SHIFTS) & 3).reshape(len(packed), -1)[:, :kurikulum.total_ayat]
+        except (binascii.Error, ValueError):
+            is_v1[:] = False  # ada baris rusak: dekode satu per satu
+    for i in np.flatnonzero(~is_v1):
+        out[i] = unpack_status(values[i], kurikulum)
+    return out
+
+
+def status_counts(value, kurikulum=JUZ_AMMA) -> np.ndarray:
+    """[Belum, Lulus, Mengulang] satu murid; format v1 dihitung langsung dari byte terkemas."""
+    packed = _packed_bytes(value, kurikulum)
+    if packed is None:
+        return np.bincount(unpack_status(value, kurikulum), minlength=3)[:3]
+    counts = _BYTE_COUNTS[packed].sum(axis=0)
+    counts[0] -= _packed_size(kurikulum) * 4 - kurikulum.total_ayat  # bit pengisi byte terakhir
+    return counts
+
+
+def _surah_window(surah, kurikulum):
+    """
+    Potongan teks v1 yang memuat seluruh ayat `surah`: (awal karakter, akhir
+    karakter, byte pertama potongan). Base64 selalu 4 karakter per 3 byte,
+    jadi potongan bisa didekode dan ditulis ulang tanpa menyentuh surah lain.
+    """
+    awal_ayat = kurikulum.offsets[surah]
+    akhir_ayat = awal_ayat + kurikulum.surah_map[surah]
+    grup_awal = (awal_ayat // 4) // 3
+    grup_akhir = ((akhir_ayat - 1) // 4) // 3 + 1
+    prefix = len(_status_prefix(kurikulum))
+    return prefix + 4 * grup_awal, prefix + 4 * grup_akhir, 3 * grup_awal
+
+
+def _window_status(status_value, surah, kurikulum):
+    """(status ayat dalam potongan, posisi ayat 1 surah di potongan) untuk nilai v1; None jika bukan v1."""
+    if not _is_native(status_value, kurikulum):
+        return None
+    awal, akhir, byte_awal = _surah_window(surah, kurikulum)
+    try:
+        chunk = np.frombuffer(base64.b64decode(status_value[awal:akhir], validate=True), dtype=np.uint8)
+    except (binascii.Error, ValueError):
+        return None
+    return ((chunk[:, None] >> _SHIFTS) & 3).reshape(-1), kurikulum.offsets[surah] - 4 * byte_awal
+
+
+def surah_status(status_value, surah, kurikulum=JUZ_AMMA) -> np.ndarray:
+    """Status ayat satu surah (array uint8). Format v1 hanya mendekode beberapa karakter milik surah itu."""
+    n = kurikulum.surah_map[surah]
+    window = _window_status(status_value, surah, kurikulum)
+    if window is None:
+        return unpack_status(status_value, kurikulum)[kurikulum.offsets[surah]:kurikulum.offsets[surah] + n]
+    ayat, geser = window
+    return ayat[geser:geser + n]
+
+
+def patch_surah(status_value, surah, start_ayat, end_ayat, status_code, kurikulum=JUZ_AMMA) -> str:
+    """
+    Mengubah status ayat start..end satu surah dan mengembalikan Status_Hafalan baru.
+    Pada format v1 hanya potongan karakter surah tersebut yang ditulis ulang;
+    format lain (JSON lama, kurikulum lain, nilai rusak) dikonversi utuh ke v1.
+    """
+    window = _window_status(status_value, surah, kurikulum)
+    if window is None:
+        arr = unpack_status(status_value, kurikulum)
+        arr[kurikulum.offsets[surah] + start_ayat - 1:kurikulum.offsets[surah] + end_ayat] = status_code
+        return pack_status(arr, kurikulum)
+    ayat, geser = window
+    ayat[geser + start_ayat - 1:geser + end_ayat] = status_code & 3
+    packed = (ayat.reshape(-1, 4) << _SHIFTS).sum(axis=1, dtype=np.uint8)
+    awal, akhir, _ = _surah_window(surah, kurikulum)
+    return status_value[:awal] + base64.b64encode(packed.tobytes()).decode("ascii") + status_value[akhir:]
+
+
+def surah_counts(arr2d, kurikulum=JUZ_AMMA) -> np.ndarray:
+    """Matriks (n x jumlah ayat) -> jumlah ayat per surah untuk tiap status, bentuk (3 status x jumlah surah)."""
+    arr2d = np.asarray(arr2d).reshape(-1, kurikulum.total_ayat)
+    return np.stack([np.add.reduceat((arr2d == kode).sum(axis=0), kurikulum.starts) for kode in (0, 1, 2)])
+
+
+# --- 3. FUNGSI PEMBANTU DATA ---
+
+def create_initial_data_structure(kurikulum=JUZ_AMMA):
+    """
+    Membuat struktur data hafalan awal (semua ayat berstatus 0).
     0 = Belum Dihafal/Setor
     1 = LULUS
     2 = Mengulang
     """
-    initial_status = {}
-    for surah, count in JUZ_AMMA_MAP.items():
-        # Membuat list dengan panjang sesuai jumlah ayat, diisi dengan 0
-        initial_status[surah] = [0] * count
-    
-    # Mengkonversi ke string JSON agar bisa disimpan dalam satu kolom Pandas/CSV
-    return json.dumps(initial_status)
+    # byte nol dalam format v1 agar bisa disimpan dalam satu kolom Pandas/CSV
+    return _status_prefix(kurikulum) + base64.b64encode(bytes(_packed_size(kurikulum))).decode("ascii")
 
 def initialize_database(filepath="data_hafalan.csv"):
     """
@@ -41,7 +261,7 @@ def initialize_database(filepath="data_hafalan.csv"):
     """
     try:
         # Mencoba membaca file
-        df = pd.read_csv(filepath)
+        df = read_data(filepath)
         print("Database sudah ada, menggunakan file yang sudah ada.")
         
         # Tambahkan kolom yang mungkin hilang jika file lama
@@ -49,7 +269,18 @@ def initialize_database(filepath="data_hafalan.csv"):
             df['Total_Ayat_Lulus'] = 0
         if 'Update_Terakhir' not in df.columns:
             df['Update_Terakhir'] = ""
-            
+
+        # Migrasi sekali: Status_Hafalan JSON lama -> format v1
+        if 'Status_Hafalan' in df.columns:
+            legacy = df['Status_Hafalan'].astype(str).str.startswith('{').to_numpy()
+            if legacy.any():
+                df['Status_Hafalan'] = df['Status_Hafalan'].astype(object)
+                df.loc[legacy, 'Status_Hafalan'] = pack_status_rows(
+                    unpack_status_column(df.loc[legacy, 'Status_Hafalan'])
+                )
+                write_data(df, filepath)
+                print(f"{int(legacy.sum())} baris Status_Hafalan dimigrasi ke format {STATUS_FORMAT_V1}")
+
         return df
 
     except FileNotFoundError:
@@ -66,17 +297,55 @@ def initialize_database(filepath="data_hafalan.csv"):
         }
         df = pd.DataFrame(data)
         
-        # Simpan file CSV
-        df.to_csv(filepath, index=False)
+        # Simpan file database (CSV atau Parquet, sesuai ekstensi)
+        write_data(df, filepath)
         return df
 
-def calculate_lulus_count(status_json):
-    """Menghitung total ayat yang LULUS (status = 1) dari JSON status hafalan."""
-    try:
-        status_dict = json.loads(status_json)
-        total_lulus = 0
-        for surah_list in status_dict.values():
-            total_lulus += surah_list.count(1) # Hanya menghitung status LULUS (1)
-        return total_lulus
-    except:
-        return 0
+def calculate_lulus_count(status_value, kurikulum=JUZ_AMMA):
+    """Menghitung total ayat yang LULUS (status = 1) dari Status_Hafalan (v1 atau JSON lama)."""
+    return int(status_counts(status_value, kurikulum)[1])
+
+
+def format_nis(value):
+    """NIS dari CSV sering terbaca sebagai float (252607001.0) atau NaN; tampilkan sebagai teks bersih."""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+# --- 4. REKAP STATUS HAFALAN ---
+
+def build_rekap_per_surah(df, selected_class, kurikulum=JUZ_AMMA):
+    """Rekap per surah satu kelas; jika df punya kolom Kurikulum, hanya murid kurikulum tersebut."""
+    class_df = df[df['Kelas'] == selected_class]
+    if CURRICULUM_COLUMN in class_df.columns:
+        class_df = class_df[class_df[CURRICULUM_COLUMN] == kurikulum.kode]
+    # satu matriks (murid x ayat) untuk seluruh kelas, lalu dijumlah per surah
+    belum, lulus, mengulang = surah_counts(unpack_status_column(class_df['Status_Hafalan'], kurikulum), kurikulum)
+    total_ayat = np.array(list(kurikulum.surah_map.values()))
+
+    denom = len(class_df) * total_ayat if len(class_df) > 0 else np.ones_like(total_ayat)
+    return pd.DataFrame({
+        'Surah': kurikulum.surah_names,
+        'Lulus': lulus,
+        'Mengulang': mengulang,
+        'Belum': belum,
+        'Persentase Lulus (%)': np.round(lulus / denom * 100, 2),
+    })
+
+
+def surah_summary(status_value, kurikulum=JUZ_AMMA):
+    """
+    Ringkasan status hafalan satu murid per surah:
+    jumlah ayat Lulus, Mengulang dan Belum untuk setiap surah kurikulumnya.
+    """
+    belum, lulus, mengulang = surah_counts(unpack_status(status_value, kurikulum), kurikulum)
+    return pd.DataFrame({
+        'Surah': kurikulum.surah_names,
+        'Jumlah Ayat': list(kurikulum.surah_map.values()),
+        'Lulus': lulus,
+        'Mengulang': mengulang,
+        'Belum': belum,
+    })
@@ -0,0 +1,209 @@
+import numpy as np
+import pandas as pd
+
+from class_operations import grade_of
+
+# =============================
+# PAPAN PERINGKAT SEKOLAH (ORDER-STATISTICS)
+# =============================
+# Skor = Total_Ayat_Lulus, bilangan bulat 0..skor_maks. Untuk setiap cakupan
+# (seluruh sekolah dan tiap tingkat VII/VIII/IX) disimpan dua Fenwick tree
+# di atas nilai skor:
+#   jumlah  -> banyak murid per skor   (peringkat, persentil, murid ke-k)
+#   ada     -> 1 jika ada murid di skor (peringkat padat / dense rank)
+# Satu setoran mengubah skor satu murid: O(log skor_maks) per cakupan.
+# Peringkat memakai aturan kompetisi (skor sama = peringkat sama, lalu
+# melompat: 1, 2, 2, 4); peringkat padat tidak melompat (1, 2, 2, 3).
+
+SCOPE_SCHOOL = "Seluruh Sekolah"
+
+RANK_COLUMNS = ["ID_Murid", "Skor", "Peringkat", "Peringkat_Padat", "Persentil"]
+
+
+class FenwickTree:
+    """Jumlah prefiks dan pencarian elemen ke-k atas indeks 0..size-1, masing-masing O(log size)."""
+
+    def __init__(self, counts):
+        counts = np.asarray(counts, dtype=np.int64)
+        self.size = len(counts)
+        # pembangunan O(size): tree[i] = prefix(i) - prefix(i - lowbit(i)) (indeks 1-based)
+        prefix = np.concatenate([[0], np.cumsum(counts)])
+        i = np.arange(1, self.size + 1)
+        self.tree = np.concatenate([[0], prefix[i] - prefix[i - (i & -i)]]).tolist()
+        self._top_bit = 1 << (self.size.bit_length() - 1) if self.size else 0
+
+    def add(self, index: int, delta: int):
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, index: int) -> int:
+        """Jumlah elemen 0..index (index < 0 -> 0)."""
+        total, i = 0, min(index + 1, self.size)
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, k: int) -> int:
+        """Indeks terkecil dengan prefix(indeks) >= k (k >= 1)."""
+        pos, bit = 0, self._top_bit
+        while bit:
+            nxt = pos + bit
+            if nxt <= self.size and self.tree[nxt] < k:
+                pos = nxt
+                k -= self.tree[nxt]
+            bit >>= 1
+        return pos
+
+
+class RankIndex:
+    """Peringkat satu cakupan: skor per murid + Fenwick jumlah/ada + ember murid per skor."""
+
+    def __init__(self, scores: pd.Series, max_score: int):
+        self.max_score = max_score
+        self.score_of = {}
+        self.buckets = {}
+        skor = np.clip(scores.to_numpy(dtype=np.int64), 0, max_score)
+        for sid, s in zip(scores.index.tolist(), skor.tolist()):
+            self.score_of[sid] = s
+            self.buckets.setdefault(s, set()).add(sid)
+        counts = np.bincount(skor, minlength=max_score + 1)
+        self.jumlah = FenwickTree(counts)
+        self.ada = FenwickTree(counts > 0)
+
+    def __len__(self):
+        return len(self.score_of)
+
+    def __contains__(self, student_id):
+        return student_id in self.score_of
+
+    def add(self, student_id, score: int):
+        score = min(max(int(score), 0), self.max_score)
+        self.score_of[student_id] = score
+        bucket = self.buckets.setdefault(score, set())
+        if not bucket:
+            self.ada.add(score, 1)
+        bucket.add(student_id)
+        self.jumlah.add(score, 1)
+
+    def remove(self, student_id):
+        score = self.score_of.pop(student_id)
+        bucket = self.buckets[score]
+        bucket.discard(student_id)
+        if not bucket:
+            del self.buckets[score]
+            self.ada.add(score, -1)
+        self.jumlah.add(score, -1)
+
+    def update(self, student_id, score: int):
+        if student_id in self.score_of:
+            self.remove(student_id)
+        self.add(student_id, score)
+
+    def rank(self, student_id) -> dict:
+        """Skor, peringkat, peringkat padat dan persentil (% murid dengan skor <= skor murid ini)."""
+        s = self.score_of[student_id]
+        n = len(self.score_of)
+        return {
+            "ID_Murid": student_id,
+            "Skor": s,
+            "Peringkat": n - self.jumlah.prefix(s) + 1,
+            "Peringkat_Padat": self.ada.prefix(self.max_score) - self.ada.prefix(s) + 1,
+            "Persentil": round(self.jumlah.prefix(s) / n * 100, 1),
+        }
+
+    def top(self, k: int) -> pd.DataFrame:
+        """K murid teratas (skor sama diurutkan menurut ID_Murid); hanya menyentuh skor yang dipakai."""
+        rows = []
+        n = len(self.score_of)
+        tersisa = n  # jumlah murid dengan skor <= skor yang sedang dikunjungi
+        dense = 0
+        while tersisa > 0 and len(rows) < k:
+            s = self.jumlah.find(tersisa)  # skor tertinggi yang masih tersisa
+            dense += 1
+            peringkat = n - tersisa + 1
+            persentil = round(tersisa / n * 100, 1)
+            for sid in sorted(self.buckets[s])[: k - len(rows)]:
+                rows.append((sid, s, peringkat, dense, persentil))
+            tersisa -= len(self.buckets[s])
+        return pd.DataFrame(rows, columns=RANK_COLUMNS)
+
+
+class Leaderboard:
+    """Peringkat seluruh sekolah dan per tingkat; disinkronkan dari DataFrame murid."""
+
+    def __init__(self, max_score: int):
+        self.max_score = max_score
+        self.indexes = {}
+        self.scope_of = {}
+
+    def scopes(self):
+        return [SCOPE_SCHOOL] + sorted(k for k in self.indexes if k != SCOPE_SCHOOL)
+
+    def build(self, df: pd.DataFrame):
+        skor = pd.Series(df["Total_Ayat_Lulus"].to_numpy(dtype=np.int64), index=df["ID_Murid"].tolist())
+        tingkat = df["Kelas"].map(grade_of).to_numpy()
+        self.indexes = {SCOPE_SCHOOL: RankIndex(skor, self.max_score)}
+        for t in pd.unique(tingkat):
+            self.indexes[t] = RankIndex(skor[tingkat == t], self.max_score)
+        self.scope_of = dict(zip(skor.index, tingkat.tolist()))
+
+    def update(self, student_id, score: int, kelas: str):
+        """
+        Skor/kelas satu murid berubah: O(log skor_maks) untuk cakupan sekolah
+        dan tingkatnya. Sebelum build()/sync() pertama tidak ada yang dicatat;
+        sinkronisasi pertama membaca seluruh skor dari DataFrame.
+        """
+        if not self.indexes:
+            return
+        tingkat = grade_of(kelas)
+        lama = self.scope_of.get(student_id)
+        if lama is not None and lama != tingkat:
+            self.indexes[lama].remove(student_id)
+        self.scope_of[student_id] = tingkat
+        self.indexes[SCOPE_SCHOOL].update(student_id, score)
+        if tingkat not in self.indexes:
+            self.indexes[tingkat] = RankIndex(pd.Series(dtype="int64"), self.max_score)
+        self.indexes[tingkat].update(student_id, score)
+
+    def remove(self, student_id):
+        tingkat = self.scope_of.pop(student_id)
+        self.indexes[SCOPE_SCHOOL].remove(student_id)
+        self.indexes[tingkat].remove(student_id)
+
+    def sync(self, df: pd.DataFrame) -> int:
+        """
+        Menyamakan isi dengan `df`: hanya murid yang skor/tingkatnya berubah,
+        murid baru atau murid yang hilang yang disentuh. Mengembalikan jumlah perubahan.
+        """
+        if not self.indexes:
+            self.build(df)
+            return len(df)
+        ids = df["ID_Murid"].tolist()
+        skor = df["Total_Ayat_Lulus"].to_numpy(dtype=np.int64)
+        tingkat = df["Kelas"].map(grade_of).tolist()
+        sekolah = self.indexes[SCOPE_SCHOOL]
+        berubah = [
+            i
+            for i, (sid, s, t) in enumerate(zip(ids, np.clip(skor, 0, self.max_score).tolist(), tingkat))
+            if sekolah.score_of.get(sid) != s or self.scope_of.get(sid) != t
+        ]
+        for i in berubah:
+            self.update(ids[i], skor[i], df["Kelas"].iat[i])
+        hilang = set(self.scope_of) - set(ids)
+        for sid in hilang:
+            self.remove(sid)
+        return len(berubah) + len(hilang)
+
+    def rank(self, student_id, scope: str = SCOPE_SCHOOL) -> dict:
+        if scope != SCOPE_SCHOOL and self.scope_of.get(student_id) != scope:
+            raise KeyError(f"Murid {student_id} tidak termasuk tingkat {scope}.")
+        return self.indexes[scope].rank(student_id)
+
+    def ranks(self, student_ids, scope: str = SCOPE_SCHOOL) -> pd.DataFrame:
+        return pd.DataFrame([self.rank(sid, scope) for sid in student_ids], columns=RANK_COLUMNS)
+
+    def top(self, k: int, scope: str = SCOPE_SCHOOL) -> pd.DataFrame:
+        return self.indexes[scope].top(k)
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import stat
+from datetime import datetime
+
+import pandas as pd
+
+from log_store import (
+    FORMAT_CSV,
+    FORMAT_PARQUET,
+    archive_suffix,
+    log_format,
+    oldest_timestamp,
+    read_log_frame,
+    read_records,
+    write_log_frame,
+)
+
+# =============================
+# ARSIP & ROTASI LOG SETORAN
+# =============================
+# Log setoran ("log panas") hanya menyimpan periode berjalan. Baris dari
+# tahun ajaran sebelumnya dipindah ke partisi arsip terkompresi (.npz, atau
+# csv.gz selama log panas masih CSV lama) yang tidak pernah diubah lagi (read-only), dicatat
+# di manifest.json beserta rentang waktunya. Pembaca log hanya membuka partisi yang rentangnya
+# beririsan dengan periode yang diminta.
+
+ARCHIVE_DIRNAME = "arsip_log"
+MANIFEST_NAME = "manifest.json"
+ACADEMIC_YEAR_START_MONTH = 7  # tahun ajaran dimulai bulan Juli
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024
+
+
+def academic_year(ts) -> str:
+    """Label tahun ajaran untuk sebuah waktu, mis. 2025-10-29 -> '2025-2026'."""
+    ts = pd.Timestamp(ts)
+    start = ts.year if ts.month >= ACADEMIC_YEAR_START_MONTH else ts.year - 1
+    return f"{start}-{start + 1}"
+
+
+def academic_year_start(ts=None) -> pd.Timestamp:
+    """Tanggal awal tahun ajaran yang memuat `ts` (default: sekarang)."""
+    ts = pd.Timestamp(ts if ts is not None else datetime.now())
+    start = ts.year if ts.month >= ACADEMIC_YEAR_START_MONTH else ts.year - 1
+    return pd.Timestamp(year=start, month=ACADEMIC_YEAR_START_MONTH, day=1)
+
+
+def archive_dir_for(log_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(log_path)), ARCHIVE_DIRNAME)
+
+
+def load_manifest(archive_dir: str) -> dict:
+    path = os.path.join(archive_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {"partitions": []}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_manifest(archive_dir: str, manifest: dict):
+    path = os.path.join(archive_dir, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def partitions_for_range(archive_dir: str, start=None, end=None):
+    """
+    Partisi arsip yang rentang waktunya beririsan dengan [start, end).
+    None berarti tidak dibatasi di sisi tersebut.
+    """
+    hasil = []
+    for part in load_manifest(archive_dir)["partitions"]:
+        if end is not None and pd.Timestamp(part["start"]) >= pd.Timestamp(end):
+            continue
+        if start is not None and pd.Timestamp(part["end"]) < pd.Timestamp(start):
+            continue
+        hasil.append(os.path.join(archive_dir, part["file"]))
+    return hasil
+
+
+def needs_rotation(log_path: str, max_bytes: int = DEFAULT_MAX_BYTES, now=None) -> bool:
+    """
+    Cek murah (tanpa membaca seluruh log): rotasi diperlukan jika baris tertua
+    sudah dari tahun ajaran lalu, atau ukuran log panas melewati `max_bytes`
+    dan baris tertua sebelum bulan berjalan. Log besar yang seluruhnya berisi
+    bulan ini tidak punya apa pun untuk diarsipkan, jadi tidak memicu rotasi.
+    """
+    if log_format(log_path) == FORMAT_PARQUET:
+        return False  # dataset Parquet sudah dipartisi per tahun ajaran/bulan
+    oldest = oldest_timestamp(log_path)
+    if oldest is None or pd.isna(oldest):
+        return False
+    if oldest < academic_year_start(now):
+        return True
+    now = pd.Timestamp(now if now is not None else datetime.now())
+    if oldest < pd.Timestamp(year=now.year, month=now.month, day=1):
+        return bool(max_bytes) and os.path.getsize(log_path) > max_bytes
+    return False
+
+
+def rotate_log(log_path: str, archive_dir: str = None, max_bytes: int = DEFAULT_MAX_BYTES, now=None) -> dict:
+    """
+    Memindahkan baris lama dari log panas ke partisi arsip.
+    - Selalu: semua baris sebelum awal tahun ajaran berjalan.
+    - Jika log panas masih lebih besar dari `max_bytes`: juga semua baris
+      sebelum awal bulan berjalan.
+    Setiap partisi ditulis sekali sebagai .npz read-only (csv.gz untuk log
+    panas CSV lama). Mengembalikan
+    ringkasan {partisi_baru, baris_diarsipkan, baris_tersisa}.
+    """
+    archive_dir = archive_dir or archive_dir_for(log_path)
+    now = pd.Timestamp(now if now is not None else datetime.now())
+    if log_format(log_path) == FORMAT_PARQUET:
+        return {"partisi_baru": [], "baris_diarsipkan": 0, "baris_tersisa": None}
+
+    df_log = read_log_frame(log_path)
+    ts = pd.to_datetime(df_log["Timestamp"], errors="coerce")
+    kamus = read_records(log_path)[1] if log_format(log_path) != FORMAT_CSV else None
+
+    cutoff = academic_year_start(now)
+    if max_bytes and os.path.getsize(log_path) > max_bytes:
+        cutoff = max(cutoff, pd.Timestamp(year=now.year, month=now.month, day=1))
+    to_archive = ts < cutoff
+    if not to_archive.any():
+        return {"partisi_baru": [], "baris_diarsipkan": 0, "baris_tersisa": len(df_log)}
+
+    os.makedirs(archive_dir, exist_ok=True)
+    manifest = load_manifest(archive_dir)
+    existing = {p["file"] for p in manifest["partitions"]}
+
+    old_rows = df_log[to_archive]
+    old_ts = ts[to_archive]
+    periods = old_ts.map(academic_year)
+    new_files = []
+    suffix = archive_suffix(log_path)
+    for period, idx in old_rows.groupby(periods).groups.items():
+        n = 1
+        while f"log_{period}_{n:03d}{suffix}" in existing:
+            n += 1
+        name = f"log_{period}_{n:03d}{suffix}"
+        path = os.path.join(archive_dir, name)
+        write_log_frame(path, old_rows.loc[idx], kamus)
+        os.chmod(path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        manifest["partitions"].append(
+            {
+                "file": name,
+                "period": period,
+                "start": str(old_ts.loc[idx].min()),
+                "end": str(old_ts.loc[idx].max()),
+                "rows": int(len(idx)),
+                "sha256": _sha256(path),
+                "created": now.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+        )
+        existing.add(name)
+        new_files.append(name)
+
+    _save_manifest(archive_dir, manifest)
+
+    # log panas ditulis ulang hanya berisi baris yang tidak diarsipkan
+    write_log_frame(log_path, df_log[~to_archive])
+
+    return {
+        "partisi_baru": new_files,
+        "baris_diarsipkan": int(to_archive.sum()),
+        "baris_tersisa": int((~to_archive).sum()),
+    }
+
+
+def verify_archive(archive_dir: str):
+    """Daftar partisi yang hilang atau isinya berubah (checksum tidak cocok)."""
+    rusak = []
+    for part in load_manifest(archive_dir)["partitions"]:
+        path = os.path.join(archive_dir, part["file"])
+        if not os.path.exists(path) or _sha256(path) != part["sha256"]:
+            rusak.append(part["file"])
+    return rusak
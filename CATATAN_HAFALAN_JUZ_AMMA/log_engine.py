@@ -0,0 +1,173 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from log_archive import archive_dir_for, partitions_for_range
+from log_store import (
+    FORMAT_COMPACT,
+    FORMAT_COMPACT_ARCHIVE,
+    FORMAT_PARQUET,
+    LOG_COLUMNS,
+    STATUS_CODE_MAP,
+    default_students,
+    log_format,
+    read_log_frame,
+)
+
+# =============================
+# MESIN PEMBACA LOG SETORAN
+# =============================
+# Semua halaman laporan membaca log setoran lewat modul ini supaya
+# parsing Timestamp dan perhitungan per ayat cukup ditulis satu kali
+# dan dikerjakan dengan operasi vektor (tanpa iterrows).
+# Format file (CSV, kompak atau Parquet) ditangani oleh log_store.
+
+COMPACT_FORMATS = (FORMAT_COMPACT, FORMAT_COMPACT_ARCHIVE)
+
+
+def empty_log() -> pd.DataFrame:
+    """DataFrame log kosong dengan kolom standar dan kolom turunan read_log (Tanggal, Jumlah_Ayat)."""
+    df = pd.DataFrame({col: pd.Series(dtype="object") for col in LOG_COLUMNS})
+    df["Timestamp"] = pd.to_datetime(df["Timestamp"])
+    df["Tanggal"] = pd.Series(dtype="object")
+    df["Jumlah_Ayat"] = pd.Series(dtype="int64")
+    return df
+
+
+def read_log(
+    filepath: str,
+    start=None,
+    end=None,
+    archive_dir: str = None,
+    students: pd.DataFrame = None,
+    columns=None,
+    student_ids=None,
+) -> pd.DataFrame:
+    """
+    Membaca log setoran dan menyiapkan kolom turunan:
+    Timestamp (datetime), Tanggal (date) dan Jumlah_Ayat.
+    Baris dengan Timestamp rusak dibuang.
+
+    Partisi arsip (lihat log_archive) ikut dibaca hanya jika rentangnya
+    beririsan dengan [start, end); tanpa start/end seluruh histori dibaca.
+    Jika start/end diberikan, hasil juga dibatasi ke rentang tersebut.
+
+    Untuk log kompak, Nama_Murid/Kelas diisi dari `students` (default:
+    database murid di folder log, lihat log_store.default_students).
+
+    `columns` membatasi kolom yang dibaca (Timestamp selalu ikut); pada log
+    Parquet kolom lain tidak dibaca dari disk sama sekali.
+
+    `student_ids` membatasi hasil ke murid tertentu (mis. halaman profil)
+    dan disaring langsung saat tiap file dibaca.
+    """
+    if log_format(filepath) == FORMAT_PARQUET:
+        sources = []  # dataset Parquet sudah memuat seluruh histori, dipartisi per bulan
+    else:
+        sources = partitions_for_range(archive_dir or archive_dir_for(filepath), start, end)
+    if os.path.exists(filepath):
+        sources.append(filepath)
+    if not sources:
+        return empty_log()
+
+    if columns is not None:
+        columns = ["Timestamp"] + [c for c in columns if c in LOG_COLUMNS and c != "Timestamp"]
+    need_names = columns is None or "Nama_Murid" in columns or "Kelas" in columns
+    if students is None and need_names and any(log_format(path) in COMPACT_FORMATS for path in sources):
+        students = default_students(filepath)
+    parts = [read_log_frame(path, students, columns, start, end, student_ids) for path in sources]
+    df_log = parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+
+    df_log["Timestamp"] = pd.to_datetime(df_log["Timestamp"], errors="coerce")
+    keep = df_log["Timestamp"].notna()
+    if start is not None:
+        keep &= df_log["Timestamp"] >= pd.Timestamp(start)
+    if end is not None:
+        keep &= df_log["Timestamp"] < pd.Timestamp(end)
+    df_log = df_log[keep].reset_index(drop=True)
+    df_log["Tanggal"] = df_log["Timestamp"].dt.date
+    if "Ayat_Dari" in df_log.columns and "Ayat_Sampai" in df_log.columns:
+        df_log["Jumlah_Ayat"] = df_log["Ayat_Sampai"] - df_log["Ayat_Dari"] + 1
+    return df_log
+
+
+def explode_ayat(df_log: pd.DataFrame) -> pd.DataFrame:
+    """
+    Memecah setiap baris log (rentang Ayat_Dari..Ayat_Sampai) menjadi satu
+    baris per ayat. Kolom hasil: Timestamp, ID_Murid, Surah, Ayat, Status_Code.
+    """
+    if df_log.empty:
+        return pd.DataFrame(
+            {
+                "Timestamp": pd.Series(dtype="datetime64[ns]"),
+                "ID_Murid": pd.Series(dtype="int64"),
+                "Surah": pd.Series(dtype="object"),
+                "Ayat": pd.Series(dtype="int64"),
+                "Status_Code": pd.Series(dtype="int8"),
+            }
+        )
+
+    dari = df_log["Ayat_Dari"].to_numpy(dtype=np.int64)
+    sampai = df_log["Ayat_Sampai"].to_numpy(dtype=np.int64)
+    panjang = np.clip(sampai - dari + 1, 0, None)
+
+    # posisi ayat ke-k di dalam rentangnya: 0, 1, ..., panjang-1 untuk tiap baris
+    rep = np.repeat(np.arange(len(df_log)), panjang)
+    awal_blok = np.repeat(np.cumsum(panjang) - panjang, panjang)
+    offset = np.arange(len(rep)) - awal_blok
+
+    status_code = df_log["Status"].map(STATUS_CODE_MAP).fillna(0).to_numpy(dtype=np.int8)
+
+    return pd.DataFrame(
+        {
+            "Timestamp": df_log["Timestamp"].to_numpy()[rep],
+            "ID_Murid": df_log["ID_Murid"].to_numpy()[rep],
+            "Surah": df_log["Surah"].to_numpy()[rep],
+            "Ayat": dari[rep] + offset,
+            "Status_Code": status_code[rep],
+        }
+    )
+
+
+def ayat_index(df_log: pd.DataFrame, kurikulum) -> tuple:
+    """
+    Versi numpy dari explode_ayat untuk analisis per ayat: (baris, posisi)
+    dengan satu elemen per ayat yang dicakup log. `baris` = nomor baris di
+    `df_log`, `posisi` = indeks ayat datar dalam `kurikulum` (0..total_ayat-1).
+    Baris dengan surah di luar kurikulum dilewati; rentang dipotong ke
+    jumlah ayat surahnya.
+    """
+    # nama surah hanya puluhan nilai unik: faktorkan dulu, cari indeksnya sekali per nama
+    kode, nama = pd.factorize(df_log["Surah"])
+    surah = np.append(pd.Index(kurikulum.surah_names).get_indexer(nama), -1)[kode]
+    valid = np.flatnonzero(surah >= 0)
+    surah = surah[valid]
+    jumlah = np.diff(np.append(kurikulum.starts, kurikulum.total_ayat))[surah]
+
+    dari = np.clip(df_log["Ayat_Dari"].to_numpy(dtype=np.int64)[valid], 1, None)
+    sampai = np.minimum(df_log["Ayat_Sampai"].to_numpy(dtype=np.int64)[valid], jumlah)
+    panjang = np.clip(sampai - dari + 1, 0, None)
+
+    rep = np.repeat(np.arange(len(valid)), panjang)
+    offset = np.arange(len(rep)) - np.repeat(np.cumsum(panjang) - panjang, panjang)
+    posisi = (kurikulum.starts[surah] + dari - 1)[rep] + offset
+    return valid[rep], posisi
+
+
+def status_as_of(df_ayat: pd.DataFrame, cutoff) -> pd.Series:
+    """
+    Status terakhir setiap ayat (ID_Murid, Surah, Ayat) sebelum `cutoff`.
+    `df_ayat` adalah hasil explode_ayat. Mengembalikan Series Status_Code
+    ber-index (ID_Murid, Surah, Ayat).
+    """
+    keys = ["ID_Murid", "Surah", "Ayat"]
+    sebelum = df_ayat[df_ayat["Timestamp"] < pd.Timestamp(cutoff)]
+    if sebelum.empty:
+        return pd.Series(
+            dtype="int8",
+            index=pd.MultiIndex.from_arrays([[], [], []], names=keys),
+            name="Status_Code",
+        )
+    terakhir = sebelum.sort_values("Timestamp", kind="stable").drop_duplicates(keys, keep="last")
+    return terakhir.set_index(keys)["Status_Code"]
@@ -0,0 +1,436 @@
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from data_store import read_data
+
+# =============================
+# FORMAT PENYIMPANAN LOG SETORAN
+# =============================
+# Format dipilih dari ekstensi file:
+#   .csv / .csv.gz  -> teks (format lama, satu baris per setoran apa adanya)
+#   .bin            -> log kompak: record biner 16 byte per setoran
+#   .npz            -> log kompak terkompresi dan mandiri (dipakai partisi arsip)
+#   .parquet        -> folder dataset Parquet (pyarrow), dipartisi per
+#                      tahun_ajaran=.../bulan=YYYY-MM; dibaca per kolom
+#
+# Log kompak hanya menyimpan angka:
+#   waktu (detik epoch), ID_Murid, kode surah, ayat dari/sampai, kode status, kode guru.
+# Nama surah dan nama guru disimpan sekali di kamus (<log>.kamus.json); kode
+# tidak pernah berubah, kamus hanya bertambah. Nama_Murid dan Kelas tidak
+# disimpan di log, melainkan diambil dari database murid saat dibaca.
+
+LOG_COLUMNS = [
+    "Timestamp",
+    "ID_Murid",
+    "Nama_Murid",
+    "Kelas",
+    "Surah",
+    "Ayat_Dari",
+    "Ayat_Sampai",
+    "Status",
+    "Guru_Pencatat",
+]
+
+STATUS_CODE_MAP = {"Lulus": 1, "Mengulang": 2}
+STATUS_LABELS = np.array(["", "Lulus", "Mengulang"], dtype=object)
+
+FORMAT_CSV = "csv"
+FORMAT_COMPACT = "kompak"
+FORMAT_COMPACT_ARCHIVE = "kompak_arsip"
+FORMAT_PARQUET = "parquet"
+PARQUET_PARTITIONS = ["tahun_ajaran", "bulan"]
+
+RECORD_DTYPE = np.dtype(
+    [
+        ("waktu", "<u4"),
+        ("id_murid", "<u4"),
+        ("ayat_dari", "<u2"),
+        ("ayat_sampai", "<u2"),
+        ("guru", "<u2"),
+        ("surah", "u1"),
+        ("status", "u1"),
+    ]
+)
+
+STUDENT_FILENAME = "data_hafalan.csv"
+STUDENT_PARQUET_FILENAME = "data_hafalan.parquet"
+STUDENT_SHARD_DIRNAME = "data_hafalan_kelas"
+ALUMNI_FILENAME = "alumni_hafalan.csv"  # arsip murid lulus, lihat class_operations.archive_graduates
+
+
+def log_format(path: str) -> str:
+    if path.endswith(".parquet"):
+        return FORMAT_PARQUET
+    if path.endswith(".bin"):
+        return FORMAT_COMPACT
+    if path.endswith(".npz"):
+        return FORMAT_COMPACT_ARCHIVE
+    return FORMAT_CSV
+
+
+def archive_suffix(path: str) -> str:
+    """Ekstensi partisi arsip yang sesuai dengan format log panas."""
+    return ".npz" if log_format(path) == FORMAT_COMPACT else ".csv.gz"
+
+
+def dictionary_path(path: str) -> str:
+    return path + ".kamus.json"
+
+
+def empty_dictionary() -> dict:
+    return {"surah": [], "guru": []}
+
+
+def load_dictionary(path: str) -> dict:
+    kamus_path = dictionary_path(path)
+    if not os.path.exists(kamus_path):
+        return empty_dictionary()
+    with open(kamus_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_dictionary(path: str, kamus: dict):
+    kamus_path = dictionary_path(path)
+    tmp_path = kamus_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(kamus, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, kamus_path)
+
+
+def dictionary_codes(values: pd.Series, vocab: list, max_codes: int = None) -> np.ndarray:
+    """
+    Kode kamus untuk tiap nilai; nilai baru ditambahkan di akhir `vocab`.
+    `max_codes` = jumlah kode yang muat di kolom record; jika terlampaui,
+    ValueError dan `vocab` tidak diubah.
+    """
+    values = values.fillna("").astype(str)
+    index = pd.Index(vocab)
+    codes = index.get_indexer(values)
+    if (codes < 0).any():
+        baru = pd.unique(values[codes < 0]).tolist()
+        if max_codes is not None and len(vocab) + len(baru) > max_codes:
+            raise ValueError(f"Kamus log penuh ({max_codes} entri); nilai baru: {', '.join(baru[:5])}")
+        vocab.extend(baru)
+        codes = pd.Index(vocab).get_indexer(values)
+    return codes
+
+
+def _max_codes(field: str) -> int:
+    return int(np.iinfo(RECORD_DTYPE[field]).max) + 1
+
+
+def encode_log(df_log: pd.DataFrame, kamus: dict) -> np.ndarray:
+    """Mengubah DataFrame log (kolom standar) menjadi array record kompak. `kamus` diperbarui di tempat."""
+    ts = pd.to_datetime(df_log["Timestamp"], errors="coerce")
+    df_log = df_log[ts.notna()]
+    ts = ts[ts.notna()]
+
+    records = np.zeros(len(df_log), dtype=RECORD_DTYPE)
+    records["waktu"] = ts.to_numpy(dtype="datetime64[s]").astype(np.int64)
+    records["id_murid"] = df_log["ID_Murid"].astype(np.int64).to_numpy()
+    records["ayat_dari"] = df_log["Ayat_Dari"].astype(np.int64).to_numpy()
+    records["ayat_sampai"] = df_log["Ayat_Sampai"].astype(np.int64).to_numpy()
+    # kode disimpan sebagai u1/u2: kamus yang melewati kapasitas ditolak, bukan terpotong diam-diam
+    records["surah"] = dictionary_codes(df_log["Surah"], kamus["surah"], _max_codes("surah"))
+    records["guru"] = dictionary_codes(df_log["Guru_Pencatat"], kamus["guru"], _max_codes("guru"))
+    records["status"] = df_log["Status"].map(STATUS_CODE_MAP).fillna(0).to_numpy(dtype=np.uint8)
+    return records
+
+
+def default_students(log_path: str) -> pd.DataFrame:
+    """
+    Nama_Murid dan Kelas per ID_Murid dari database di folder yang sama dengan
+    log, ditambah arsip alumni (data murid aktif didahulukan).
+    """
+    folder = os.path.dirname(os.path.abspath(log_path))
+    parts = []
+    for name in (STUDENT_PARQUET_FILENAME, STUDENT_SHARD_DIRNAME, STUDENT_FILENAME, ALUMNI_FILENAME):
+        path = os.path.join(folder, name)
+        if os.path.exists(path):
+            parts.append(read_data(path, columns=["ID_Murid", "Nama_Murid", "Kelas"]))
+    if not parts:
+        return pd.DataFrame(columns=["ID_Murid", "Nama_Murid", "Kelas"])
+    return pd.concat(parts, ignore_index=True).drop_duplicates("ID_Murid", keep="first")
+
+
+def decode_log(records: np.ndarray, kamus: dict, students: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Record kompak -> DataFrame dengan kolom standar LOG_COLUMNS.
+    Nama_Murid/Kelas diisi dari `students` (kosong jika tidak diberikan).
+    """
+    ids = records["id_murid"].astype(np.int64)
+    if students is not None and len(students):
+        lookup = students.drop_duplicates("ID_Murid").set_index("ID_Murid")
+        pos = lookup.index.get_indexer(ids)
+        nama = np.append(lookup["Nama_Murid"].to_numpy(dtype=object), "")[pos]
+        kelas = np.append(lookup["Kelas"].astype(str).to_numpy(dtype=object), "")[pos]
+    else:
+        nama = kelas = np.full(len(records), "", dtype=object)
+
+    return pd.DataFrame(
+        {
+            "Timestamp": pd.to_datetime(records["waktu"].astype(np.int64), unit="s"),
+            "ID_Murid": ids,
+            "Nama_Murid": nama,
+            "Kelas": kelas,
+            "Surah": np.asarray(kamus["surah"] or [""], dtype=object)[records["surah"]],
+            "Ayat_Dari": records["ayat_dari"].astype(np.int64),
+            "Ayat_Sampai": records["ayat_sampai"].astype(np.int64),
+            "Status": STATUS_LABELS[records["status"]],
+            "Guru_Pencatat": np.asarray(kamus["guru"] or [""], dtype=object)[records["guru"]],
+        },
+        columns=LOG_COLUMNS,
+    )
+
+
+def read_records(path: str):
+    """Membaca log kompak (.bin atau .npz) sebagai (records, kamus) tanpa parsing teks."""
+    if log_format(path) == FORMAT_COMPACT_ARCHIVE:
+        with np.load(path, allow_pickle=False) as npz:
+            kamus = {"surah": npz["surah"].tolist(), "guru": npz["guru"].tolist()}
+            return npz["records"], kamus
+    return np.fromfile(path, dtype=RECORD_DTYPE), load_dictionary(path)
+
+
+def _parquet_table(df_log: pd.DataFrame):
+    """DataFrame log -> tabel Arrow bertipe, ditambah kolom partisi tahun ajaran dan bulan."""
+    import pyarrow as pa
+
+    ts = pd.to_datetime(df_log["Timestamp"], errors="coerce")
+    df_log = df_log[ts.notna()]
+    ts = ts[ts.notna()]
+
+    # label partisi dibuat per bulan unik saja, lalu disebar ke semua baris
+    bulan_ke = (ts.dt.year * 12 + ts.dt.month - 1).to_numpy()
+    unik, posisi = np.unique(bulan_ke, return_inverse=True)
+    label_bulan = np.array([f"{b // 12}-{b % 12 + 1:02d}" for b in unik], dtype=object)
+    awal_tahun = [b // 12 if b % 12 + 1 >= 7 else b // 12 - 1 for b in unik]  # tahun ajaran mulai Juli
+    label_tahun = np.array([f"{y}-{y + 1}" for y in awal_tahun], dtype=object)
+
+    def teks(col):
+        return pa.array(df_log[col].fillna("").astype(str).to_numpy(dtype=object), pa.string())
+
+    data = {
+        "Timestamp": pa.array(ts.to_numpy(dtype="datetime64[s]"), pa.timestamp("s")),
+        "ID_Murid": pa.array(df_log["ID_Murid"].astype(np.int64).to_numpy(), pa.int32()),
+        "Nama_Murid": teks("Nama_Murid"),
+        "Kelas": teks("Kelas"),
+        "Surah": teks("Surah"),
+        "Ayat_Dari": pa.array(df_log["Ayat_Dari"].astype(np.int64).to_numpy(), pa.int16()),
+        "Ayat_Sampai": pa.array(df_log["Ayat_Sampai"].astype(np.int64).to_numpy(), pa.int16()),
+        "Status": teks("Status"),
+        "Guru_Pencatat": teks("Guru_Pencatat"),
+        "tahun_ajaran": pa.array(label_tahun[posisi], pa.string()),
+        "bulan": pa.array(label_bulan[posisi], pa.string()),
+    }
+    return pa.table(data)
+
+
+def _write_parquet_parts(root: str, df_log: pd.DataFrame):
+    import pyarrow.parquet as pq
+
+    table = _parquet_table(df_log)
+    if table.num_rows:
+        pq.write_to_dataset(
+            table,
+            root,
+            partition_cols=PARQUET_PARTITIONS,
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        )
+
+
+def read_parquet_log(path: str, columns=None, start=None, end=None, student_ids=None) -> pd.DataFrame:
+    """
+    Membaca dataset log Parquet. Hanya kolom `columns` yang dibaca, folder
+    partisi bulan di luar [start, end) dilewati tanpa dibuka, dan jika
+    `student_ids` diberikan hanya baris murid tersebut yang dimuat.
+    """
+    import pyarrow.dataset as ds
+
+    if not os.path.isdir(path):
+        return pd.DataFrame(columns=columns or LOG_COLUMNS)
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    cols = [c for c in (columns or LOG_COLUMNS) if c in LOG_COLUMNS]
+
+    filt = None
+    if start is not None:
+        start = pd.Timestamp(start)
+        filt = (ds.field("bulan") >= start.strftime("%Y-%m")) & (ds.field("Timestamp") >= start.to_datetime64())
+    if end is not None:
+        end = pd.Timestamp(end)
+        cond = (ds.field("bulan") <= end.strftime("%Y-%m")) & (ds.field("Timestamp") < end.to_datetime64())
+        filt = cond if filt is None else filt & cond
+    if student_ids is not None:
+        cond = ds.field("ID_Murid").isin([int(i) for i in student_ids])
+        filt = cond if filt is None else filt & cond
+    df_log = dataset.to_table(columns=cols, filter=filt).to_pandas()
+    if "Timestamp" in df_log.columns:
+        df_log = df_log.sort_values("Timestamp", kind="stable").reset_index(drop=True)
+    return df_log
+
+
+def read_log_frame(
+    path: str, students: pd.DataFrame = None, columns=None, start=None, end=None, student_ids=None
+) -> pd.DataFrame:
+    """
+    Membaca satu file log (format apa pun) menjadi DataFrame kolom standar.
+    Untuk CSV, Timestamp masih berupa teks; untuk format lain sudah datetime.
+    `columns` membatasi kolom yang dibaca. `start`/`end` hanya dipakai untuk
+    melewati partisi Parquet; penyaringan baris tetap dilakukan pemanggil.
+    `student_ids` membatasi baris ke murid tertentu; pada log kompak record
+    disaring sebelum didekode.
+    """
+    fmt = log_format(path)
+    if fmt == FORMAT_PARQUET:
+        return read_parquet_log(path, columns, start, end, student_ids)
+    if fmt == FORMAT_CSV:
+        usecols = columns if columns is None or student_ids is None else list(dict.fromkeys([*columns, "ID_Murid"]))
+        try:
+            df_log = pd.read_csv(path, usecols=usecols)
+        except pd.errors.EmptyDataError:
+            return pd.DataFrame(columns=columns or LOG_COLUMNS)
+        if student_ids is not None:
+            df_log = df_log[df_log["ID_Murid"].isin(list(student_ids))].reset_index(drop=True)
+        return df_log[columns] if columns else df_log
+    records, kamus = read_records(path)
+    if student_ids is not None:
+        records = records[np.isin(records["id_murid"], np.asarray(list(student_ids), dtype=np.int64))]
+    df_log = decode_log(records, kamus, students)
+    return df_log[columns] if columns else df_log
+
+
+def write_log_frame(path: str, df_log: pd.DataFrame, kamus: dict = None):
+    """
+    Menulis ulang seluruh isi file log secara atomik (tmp lalu os.replace).
+    Untuk .bin, kamus file tersebut dipakai dan diperbarui; .npz menyimpan
+    kamusnya sendiri sehingga bisa dibaca tanpa file lain.
+    """
+    fmt = log_format(path)
+    tmp_path = path + ".tmp"
+    if fmt == FORMAT_PARQUET:
+        # dataset ditulis lengkap di folder sementara lalu ditukar dengan yang lama
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        _write_parquet_parts(tmp_path, df_log)
+        old_path = path + ".old"
+        if os.path.exists(path):
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        return
+    if fmt == FORMAT_CSV:
+        df_log[LOG_COLUMNS].to_csv(tmp_path, index=False, compression="gzip" if path.endswith(".gz") else None)
+    elif fmt == FORMAT_COMPACT:
+        kamus = load_dictionary(path)
+        records = encode_log(df_log, kamus)
+        save_dictionary(path, kamus)
+        records.tofile(tmp_path)
+    else:
+        kamus = kamus if kamus is not None else empty_dictionary()
+        kamus = {"surah": list(kamus["surah"]), "guru": list(kamus["guru"])}
+        records = encode_log(df_log, kamus)
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                records=records,
+                surah=np.array(kamus["surah"], dtype=str),
+                guru=np.array(kamus["guru"], dtype=str),
+            )
+    os.replace(tmp_path, path)
+
+
+def append_log(path: str, df_rows: pd.DataFrame):
+    """
+    Menambahkan baris setoran ke akhir log panas. Untuk Parquet, setiap
+    penambahan menjadi file kecil di partisi bulannya (lihat compact_parquet_log).
+    """
+    if log_format(path) == FORMAT_PARQUET:
+        _write_parquet_parts(path, df_rows)
+        return
+    if log_format(path) == FORMAT_CSV:
+        write_header = not os.path.exists(path)
+        df_rows[LOG_COLUMNS].to_csv(path, mode="a", index=False, header=write_header)
+        return
+    kamus = load_dictionary(path)
+    jumlah_kamus = (len(kamus["surah"]), len(kamus["guru"]))
+    records = encode_log(df_rows, kamus)
+    if (len(kamus["surah"]), len(kamus["guru"])) != jumlah_kamus:
+        save_dictionary(path, kamus)  # kamus ditulis dulu agar kode baru selalu bisa dibaca
+    with open(path, "ab") as f:
+        f.write(records.tobytes())
+
+
+def oldest_timestamp(path: str):
+    """Timestamp setoran pertama di log (log hanya di-append, jadi ini yang tertua)."""
+    if not os.path.exists(path):
+        return None
+    if log_format(path) == FORMAT_PARQUET:
+        df_log = read_parquet_log(path, columns=["Timestamp"])
+        return df_log["Timestamp"].min() if len(df_log) else None
+    if log_format(path) == FORMAT_COMPACT:
+        first = np.fromfile(path, dtype=RECORD_DTYPE, count=1)
+        if not len(first):
+            return None
+        return pd.to_datetime(int(first["waktu"][0]), unit="s")
+    with open(path, encoding="utf-8") as f:
+        f.readline()  # header
+        first = f.readline()
+    if not first.strip():
+        return None
+    return pd.to_datetime(first.split(",", 1)[0], errors="coerce")
+
+
+def convert_log(src: str, dst: str, students: pd.DataFrame = None) -> int:
+    """
+    Mengonversi log antar format (mis. log_hafalan.csv -> log_hafalan.bin atau
+    sebaliknya). `students` dipakai untuk mengisi Nama_Murid/Kelas saat menulis
+    CSV dari log kompak. Mengembalikan jumlah baris.
+    """
+    compact = (FORMAT_COMPACT, FORMAT_COMPACT_ARCHIVE)
+    if students is None and log_format(src) in compact and log_format(dst) in (FORMAT_CSV, FORMAT_PARQUET):
+        students = default_students(src)
+    df_log = read_log_frame(src, students)
+    kamus = read_records(src)[1] if log_format(src) in compact else None
+    write_log_frame(dst, df_log, kamus)
+    return len(df_log)
+
+
+def compact_parquet_log(path: str) -> int:
+    """
+    Menggabungkan file-file kecil hasil append di setiap partisi bulan
+    menjadi satu file per partisi. Mengembalikan jumlah partisi yang digabung.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    digabung = 0
+    for folder, _, files in os.walk(path):
+        parts = sorted(f for f in files if f.endswith(".parquet"))
+        if len(parts) < 2:
+            continue
+        table = pa.concat_tables([pq.read_table(os.path.join(folder, f)) for f in parts]).sort_by("Timestamp")
+        merged = os.path.join(folder, f"part-{uuid.uuid4().hex}-0.parquet")
+        pq.write_table(table, merged + ".tmp")
+        os.replace(merged + ".tmp", merged)
+        for f in parts:
+            os.remove(os.path.join(folder, f))
+        digabung += 1
+    return digabung
+
+
+def migrate_legacy_log(csv_path: str, compact_path: str) -> int:
+    """
+    Migrasi sekali jalan dari log CSV lama ke log kompak. File CSV diganti
+    nama menjadi *.bak setelah berhasil. Mengembalikan jumlah baris yang
+    dipindahkan (0 jika tidak ada yang perlu dimigrasi).
+    """
+    if os.path.exists(compact_path) or not os.path.exists(csv_path):
+        return 0
+    jumlah = convert_log(csv_path, compact_path)
+    os.replace(csv_path, csv_path + ".bak")
+    return jumlah
@@ -0,0 +1,171 @@
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from curriculum import surah_lengths, target_ayat
+from log_engine import explode_ayat, read_log, status_as_of
+
+# =============================
+# LAPORAN BULANAN DARI LOG SETORAN
+# =============================
+# Laporan dihitung dari log untuk bulan yang dipilih. Bulan yang sudah
+# lewat dibekukan ke file snapshot (CSV) sehingga laporan historis cukup
+# dibaca ulang dan tidak pernah dihitung lagi.
+
+SNAPSHOT_DIRNAME = "snapshot_laporan"
+
+REPORT_COLUMNS = [
+    "ID_Murid",
+    "NIS",
+    "Nama",
+    "Kelas",
+    "Setoran Bulan Ini",
+    "Mengulang Bulan Ini",
+    "Ayat Lulus Bulan Ini",
+    "Surah Selesai Bulan Ini",
+    "Total Ayat Lulus",
+    "% Hafalan Juz Amma",
+    "Selisih Ayat Lulus vs Bulan Lalu",
+    "Selisih Setoran vs Bulan Lalu",
+]
+
+
+def month_start(year: int, month: int) -> pd.Timestamp:
+    return pd.Timestamp(year=year, month=month, day=1)
+
+
+def previous_month(year: int, month: int):
+    return (year - 1, 12) if month == 1 else (year, month - 1)
+
+
+def next_month(year: int, month: int):
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def snapshot_path(snapshot_dir: str, year: int, month: int) -> str:
+    return os.path.join(snapshot_dir, f"laporan_bulanan_{year:04d}-{month:02d}.csv")
+
+
+def is_month_closed(year: int, month: int, today=None) -> bool:
+    """Bulan dianggap selesai (boleh dibekukan) jika sudah lewat dari bulan berjalan."""
+    today = today or datetime.now()
+    return (year, month) < (today.year, today.month)
+
+
+def _new_lulus_per_student(state_awal: pd.Series, state_akhir: pd.Series) -> pd.Series:
+    """Jumlah ayat per murid yang berstatus Lulus di akhir periode tapi belum Lulus di awal."""
+    awal = state_awal.reindex(state_akhir.index)
+    baru = (state_akhir == 1) & (awal != 1)
+    return baru.groupby(level="ID_Murid").sum()
+
+
+def _completed_surah(state: pd.Series) -> pd.DataFrame:
+    """Pasangan (ID_Murid, Surah) yang seluruh ayatnya berstatus Lulus pada `state`."""
+    lulus = (state == 1).groupby(level=["ID_Murid", "Surah"]).sum().reset_index(name="Lulus")
+    lulus["Total"] = lulus["Surah"].map(surah_lengths())
+    return lulus[lulus["Lulus"] >= lulus["Total"]][["ID_Murid", "Surah"]]
+
+
+def build_monthly_report(df_data: pd.DataFrame, df_log: pd.DataFrame, year: int, month: int) -> pd.DataFrame:
+    """
+    Menyusun laporan bulanan per murid untuk bulan (year, month):
+    jumlah setoran, ayat yang menjadi Lulus di bulan tersebut, surah yang
+    selesai di bulan tersebut, total ayat Lulus di akhir bulan, serta
+    selisihnya terhadap bulan sebelumnya.
+    """
+    prev_year, prev_month = previous_month(year, month)
+    nxt_year, nxt_month = next_month(year, month)
+    awal_bulan_lalu = month_start(prev_year, prev_month)
+    awal_bulan = month_start(year, month)
+    akhir_bulan = month_start(nxt_year, nxt_month)
+
+    df_ayat = explode_ayat(df_log)
+    state_bulan_lalu = status_as_of(df_ayat, awal_bulan_lalu)
+    state_awal = status_as_of(df_ayat, awal_bulan)
+    state_akhir = status_as_of(df_ayat, akhir_bulan)
+
+    lulus_bulan_ini = _new_lulus_per_student(state_awal, state_akhir)
+    lulus_bulan_lalu = _new_lulus_per_student(state_bulan_lalu, state_awal)
+    total_lulus = (state_akhir == 1).groupby(level="ID_Murid").sum()
+
+    # surah selesai bulan ini = selesai di akhir bulan tapi belum selesai di awal bulan
+    selesai_akhir = _completed_surah(state_akhir)
+    selesai_awal = _completed_surah(state_awal)
+    selesai_baru = selesai_akhir.merge(selesai_awal, how="left", indicator=True)
+    selesai_baru = selesai_baru[selesai_baru["_merge"] == "left_only"]
+    surah_selesai = selesai_baru.groupby("ID_Murid")["Surah"].agg(", ".join)
+
+    ts = df_log["Timestamp"]
+    log_bulan = df_log[(ts >= awal_bulan) & (ts < akhir_bulan)]
+    log_bulan_lalu = df_log[(ts >= awal_bulan_lalu) & (ts < awal_bulan)]
+    setoran = log_bulan.groupby("ID_Murid").size()
+    setoran_lalu = log_bulan_lalu.groupby("ID_Murid").size()
+    mengulang = log_bulan[log_bulan["Status"] == "Mengulang"].groupby("ID_Murid").size()
+
+    ids = df_data["ID_Murid"]
+    laporan = pd.DataFrame(
+        {
+            "ID_Murid": ids.to_numpy(),
+            "NIS": df_data["NIS"].to_numpy() if "NIS" in df_data.columns else "",
+            "Nama": df_data["Nama_Murid"].to_numpy(),
+            "Kelas": df_data["Kelas"].to_numpy(),
+        }
+    )
+
+    def per_murid(series):
+        return series.reindex(ids).fillna(0).astype(int).to_numpy()
+
+    laporan["Setoran Bulan Ini"] = per_murid(setoran)
+    laporan["Mengulang Bulan Ini"] = per_murid(mengulang)
+    laporan["Ayat Lulus Bulan Ini"] = per_murid(lulus_bulan_ini)
+    laporan["Surah Selesai Bulan Ini"] = surah_selesai.reindex(ids).fillna("-").to_numpy()
+    laporan["Total Ayat Lulus"] = per_murid(total_lulus)
+    laporan["% Hafalan Juz Amma"] = (laporan["Total Ayat Lulus"] / target_ayat(df_data).to_numpy() * 100).round(2)
+    laporan["Selisih Ayat Lulus vs Bulan Lalu"] = laporan["Ayat Lulus Bulan Ini"] - per_murid(lulus_bulan_lalu)
+    laporan["Selisih Setoran vs Bulan Lalu"] = laporan["Setoran Bulan Ini"] - per_murid(setoran_lalu)
+
+    return laporan[REPORT_COLUMNS]
+
+
+def load_monthly_report(df_data, log_path, year, month, snapshot_dir, today=None):
+    """
+    Mengambil laporan bulanan. Untuk bulan yang sudah lewat, snapshot dibaca
+    jika ada; jika belum ada, laporan dihitung lalu dibekukan ke snapshot.
+    Bulan berjalan selalu dihitung ulang dari log.
+    Mengembalikan (laporan_df, dari_snapshot).
+    """
+    path = snapshot_path(snapshot_dir, year, month)
+    closed = is_month_closed(year, month, today)
+
+    if closed and os.path.exists(path):
+        return pd.read_csv(path, keep_default_na=False), True
+
+    # status ayat direplay dari awal histori, jadi hanya batas akhir yang dipakai:
+    # partisi arsip setelah bulan ini tidak perlu dibuka
+    df_log = read_log(
+        log_path,
+        end=month_start(*next_month(year, month)),
+        columns=["ID_Murid", "Surah", "Ayat_Dari", "Ayat_Sampai", "Status"],
+    )
+    laporan = build_monthly_report(df_data, df_log, year, month)
+
+    if closed:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        tmp_path = path + ".tmp"
+        laporan.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    return laporan, False
+
+
+def recent_months(count: int = 24, today=None):
+    """
+    Daftar (tahun, bulan) dari bulan berjalan mundur sebanyak `count` bulan.
+    Tidak membaca log, supaya membuka laporan historis tetap instan.
+    """
+    today = today or datetime.now()
+    months = [(today.year, today.month)]
+    while len(months) < count:
+        months.append(previous_month(*months[-1]))
+    return months
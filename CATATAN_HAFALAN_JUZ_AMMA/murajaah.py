@@ -0,0 +1,174 @@
+import heapq
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from curriculum import CURRICULUM_COLUMN, DEFAULT_CURRICULUM, get_curriculum
+from juz_amma_data import unpack_status_column
+from log_engine import ayat_index
+
+# =============================
+# JADWAL MURAJAAH (PENGULANGAN BERJARAK)
+# =============================
+# Ayat yang sudah Lulus perlu diulang (murajaah) dengan jarak yang makin
+# panjang setiap kali berhasil disetor ulang: 1, 3, 7, 14, ... hari.
+# Riwayat diambil dari log setoran: tanggal Lulus terakhir dan berapa kali
+# ayat itu sudah Lulus sejak Mengulang terakhir (Mengulang mengembalikan
+# jarak ke awal). Murajaah yang disetor lewat formulir biasa (Lulus)
+# otomatis memperpanjang jarak berikutnya.
+#
+# Semua murid satu kelas dihitung sekaligus di atas matriks
+# (murid x ayat kurikulum); ayat jatuh tempo yang berurutan dalam satu
+# surah digabung menjadi satu rentang yang bisa dibaca sekali jalan.
+
+INTERVAL_HARI = np.array([1, 3, 7, 14, 30, 60, 120], dtype=np.int64)
+MAKS_AYAT_HARIAN = 20
+
+SEGMENT_COLUMNS = ["ID_Murid", "Surah", "Ayat_Dari", "Ayat_Sampai", "Jumlah_Ayat", "Jatuh_Tempo", "Terlambat_Hari"]
+
+
+def _day(when) -> int:
+    return int(np.datetime64(pd.Timestamp(when).date(), "D").astype(np.int64))
+
+
+def review_history(df_log: pd.DataFrame, student_ids, kurikulum) -> tuple:
+    """
+    Riwayat Lulus per ayat untuk `student_ids` dari log setoran:
+    (hari Lulus terakhir, jumlah Lulus sejak Mengulang terakhir), masing-masing
+    matriks (murid x ayat kurikulum). Hari = nomor hari epoch; 0 = belum pernah.
+    """
+    ids = pd.Index(np.asarray(student_ids, dtype=np.int64))
+    n, total = len(ids), kurikulum.total_ayat
+    last = np.zeros(n * total, dtype=np.int64)
+    count = np.zeros(n * total, dtype=np.int64)
+
+    log = df_log[df_log["Status"].isin(["Lulus", "Mengulang"])]
+    row = ids.get_indexer(log["ID_Murid"].to_numpy(dtype=np.int64))
+    log, row = log[row >= 0], row[row >= 0]
+    baris, posisi = ayat_index(log, kurikulum)
+    if len(baris):
+        flat = row[baris] * total + posisi
+        waktu = log["Timestamp"].to_numpy(dtype="datetime64[ns]")[baris]
+        lulus = (log["Status"].to_numpy() == "Lulus")[baris]
+
+        # waktu Mengulang terakhir per ayat; Lulus sebelum itu tidak dihitung
+        ulang = np.full(n * total, np.iinfo(np.int64).min, dtype=np.int64)
+        np.maximum.at(ulang, flat[~lulus], waktu[~lulus].astype(np.int64))
+        hitung = lulus & (waktu.astype(np.int64) > ulang[flat])
+
+        np.maximum.at(last, flat[lulus], waktu[lulus].astype("datetime64[D]").astype(np.int64))
+        count += np.bincount(flat[hitung], minlength=n * total)
+    return last.reshape(n, total), count.reshape(n, total)
+
+
+def due_segments(student_ids, status2d, last, count, kurikulum, today=None) -> pd.DataFrame:
+    """
+    Rentang ayat yang jatuh tempo murajaah pada `today`, untuk semua murid
+    sekaligus. Ayat Lulus tanpa riwayat di log dianggap jatuh tempo (tanpa
+    tanggal). Terlambat_Hari = keterlambatan terbesar dalam rentang.
+    """
+    today = _day(today or pd.Timestamp.now())
+    total = kurikulum.total_ayat
+    interval = INTERVAL_HARI[np.clip(count, 1, len(INTERVAL_HARI)) - 1]
+    tempo = np.where(last > 0, last + interval, today)
+    mask = ((status2d == 1) & (tempo <= today)).ravel()
+
+    pos = np.flatnonzero(mask)
+    if not len(pos):
+        return pd.DataFrame(columns=SEGMENT_COLUMNS)
+
+    # rentang baru dimulai jika ayat sebelumnya tidak jatuh tempo, atau di awal surah/baris
+    kolom = pos % total
+    awal_surah = np.zeros(total, dtype=bool)
+    awal_surah[kurikulum.starts] = True
+    mulai = awal_surah[kolom] | ~mask[pos - 1]
+    idx_mulai = np.flatnonzero(mulai)
+    idx_akhir = np.append(idx_mulai[1:], len(pos)) - 1
+
+    tempo_flat = tempo.ravel()[pos]
+    terlambat = np.maximum.reduceat(today - tempo_flat, idx_mulai)
+    tempo_awal = np.minimum.reduceat(tempo_flat, idx_mulai)
+    punya_riwayat = np.maximum.reduceat(last.ravel()[pos], idx_mulai) > 0
+
+    kolom_awal, kolom_akhir = kolom[idx_mulai], kolom[idx_akhir]
+    surah_idx = np.searchsorted(kurikulum.starts, kolom_awal, side="right") - 1
+    ayat_awal = kolom_awal - kurikulum.starts[surah_idx] + 1
+    return pd.DataFrame(
+        {
+            "ID_Murid": np.asarray(student_ids, dtype=np.int64)[pos[idx_mulai] // total],
+            "Surah": np.asarray(kurikulum.surah_names, dtype=object)[surah_idx],
+            "Ayat_Dari": ayat_awal,
+            "Ayat_Sampai": ayat_awal + (kolom_akhir - kolom_awal),
+            "Jumlah_Ayat": kolom_akhir - kolom_awal + 1,
+            "Jatuh_Tempo": pd.to_datetime(
+                np.where(punya_riwayat, tempo_awal.astype("datetime64[D]"), np.datetime64("NaT", "D"))
+            ),
+            "Terlambat_Hari": np.where(punya_riwayat, terlambat, 0),
+        },
+        columns=SEGMENT_COLUMNS,
+    )
+
+
+def class_murajaah(df_students: pd.DataFrame, df_log: pd.DataFrame, today=None, maks_ayat=MAKS_AYAT_HARIAN) -> pd.DataFrame:
+    """
+    Daftar murajaah hari ini untuk semua murid `df_students` (mis. satu kelas),
+    per kurikulum dalam satu operasi vektor. Setiap murid mendapat rentang
+    paling terlambat lebih dulu sampai kira-kira `maks_ayat` ayat (rentang
+    pertama selalu ikut walau lebih panjang); None berarti tanpa batas.
+    """
+    if df_students.empty:
+        return pd.DataFrame(columns=SEGMENT_COLUMNS)
+    if CURRICULUM_COLUMN in df_students.columns:
+        kode = df_students[CURRICULUM_COLUMN].fillna(DEFAULT_CURRICULUM)
+    else:
+        kode = pd.Series(DEFAULT_CURRICULUM, index=df_students.index)
+
+    parts = []
+    for k in kode.unique():
+        kurikulum = get_curriculum(k)
+        murid = df_students[kode == k]
+        last, count = review_history(df_log, murid["ID_Murid"], kurikulum)
+        status2d = unpack_status_column(murid["Status_Hafalan"], kurikulum)
+        parts.append(due_segments(murid["ID_Murid"], status2d, last, count, kurikulum, today))
+    segments = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=SEGMENT_COLUMNS)
+    if segments.empty:
+        return segments
+
+    segments = segments.sort_values(["ID_Murid", "Terlambat_Hari"], ascending=[True, False], kind="stable")
+    if maks_ayat is not None:
+        sebelumnya = segments.groupby("ID_Murid")["Jumlah_Ayat"].cumsum() - segments["Jumlah_Ayat"]
+        segments = segments[sebelumnya < maks_ayat]
+    return segments.reset_index(drop=True)
+
+
+class MurajaahQueue:
+    """
+    Antrian prioritas rentang murajaah satu murid: rentang paling terlambat
+    keluar lebih dulu, lalu mengikuti urutan surah dan ayat.
+    """
+
+    def __init__(self, segments: pd.DataFrame = None, kurikulum=None):
+        self._urutan = {s: i for i, s in enumerate(kurikulum.surah_names)} if kurikulum else {}
+        self._heap = []
+        self._nomor = itertools.count()  # pemecah seri agar dict segmen tidak pernah dibandingkan
+        if segments is not None:
+            for seg in segments.to_dict("records"):
+                self.push(seg)
+
+    def push(self, segment: dict):
+        kunci = (-int(segment["Terlambat_Hari"]), self._urutan.get(segment["Surah"], 0), int(segment["Ayat_Dari"]))
+        heapq.heappush(self._heap, (kunci, next(self._nomor), segment))
+
+    def pop(self) -> dict:
+        return heapq.heappop(self._heap)[2]
+
+    def peek(self) -> dict:
+        return self._heap[0][2]
+
+    def take(self, k: int) -> list:
+        """Hingga `k` rentang teratas tanpa mengubah antrian."""
+        return [item[2] for item in heapq.nsmallest(k, self._heap)]
+
+    def __len__(self):
+        return len(self._heap)
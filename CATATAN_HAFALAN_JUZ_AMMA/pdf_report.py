@@ -0,0 +1,337 @@
+import multiprocessing
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from io import BytesIO
+
+import pandas as pd
+
+from curriculum import CURRICULUM_COLUMN, DEFAULT_CURRICULUM, curriculum_of
+from juz_amma_data import build_rekap_per_surah, format_nis, surah_summary
+
+# =============================
+# RENDER LAPORAN PDF
+# =============================
+# PDF dibuat dengan fpdf2: kop sekolah (logo.png), tabel, dan grafik batang
+# yang digambar langsung sebagai vektor di halaman PDF. Mode massal membagi
+# pekerjaan per kelas / per murid ke process pool lalu mengemas hasilnya
+# dalam satu file ZIP.
+
+SCHOOL_NAME = "SMP Negeri 9 Banjar"
+APP_TITLE = "Aplikasi Catatan Hafalan Juz Amma"
+
+BATCH_REKAP_KELAS = "rekap_kelas"
+BATCH_PROFIL_MURID = "profil_murid"
+
+_BAR_COLOR = (46, 139, 87)
+_GRID_COLOR = (220, 220, 220)
+_HEADER_FILL = (230, 240, 234)
+
+
+def _txt(value) -> str:
+    """Font bawaan PDF hanya mendukung Latin-1; karakter lain diganti '?'."""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    return str(value).encode("latin-1", "replace").decode("latin-1")
+
+
+def safe_filename(name) -> str:
+    return re.sub(r"[^A-Za-z0-9._ -]+", "_", str(name)).strip() or "tanpa_nama"
+
+
+def _new_pdf(title: str, subtitle: str = "", logo_path: str = None, orientation: str = "P"):
+    """Dokumen baru dengan kop sekolah (logo, nama sekolah, judul) dan nomor halaman."""
+    from fpdf import FPDF
+
+    class _ReportPDF(FPDF):
+        def header(self):
+            top = self.t_margin
+            if logo_path and os.path.exists(logo_path):
+                self.image(logo_path, x=self.l_margin, y=top, h=18)
+            self.set_xy(self.l_margin + 22, top)
+            self.set_font("Helvetica", "B", 14)
+            self.cell(0, 7, _txt(SCHOOL_NAME), new_x="LMARGIN", new_y="NEXT")
+            self.set_x(self.l_margin + 22)
+            self.set_font("Helvetica", "B", 11)
+            self.cell(0, 6, _txt(title), new_x="LMARGIN", new_y="NEXT")
+            if subtitle:
+                self.set_x(self.l_margin + 22)
+                self.set_font("Helvetica", "", 9)
+                self.cell(0, 5, _txt(subtitle), new_x="LMARGIN", new_y="NEXT")
+            y_line = top + 20
+            self.set_draw_color(0, 0, 0)
+            self.line(self.l_margin, y_line, self.w - self.r_margin, y_line)
+            self.set_y(y_line + 4)
+
+        def footer(self):
+            self.set_y(-12)
+            self.set_font("Helvetica", "I", 8)
+            self.cell(
+                0,
+                6,
+                _txt(f"{APP_TITLE} - dicetak {datetime.now():%Y-%m-%d %H:%M} - hal. {self.page_no()}/{{nb}}"),
+                align="C",
+            )
+
+    pdf = _ReportPDF(orientation=orientation, unit="mm", format="A4")
+    pdf.set_margins(12, 12, 12)
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.alias_nb_pages()
+    pdf.add_page()
+    return pdf
+
+
+def _section(pdf, text: str):
+    pdf.ln(2)
+    pdf.set_font("Helvetica", "B", 11)
+    pdf.cell(0, 7, _txt(text), new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("Helvetica", "", 9)
+
+
+def _fit(pdf, text: str, width: float) -> str:
+    """Potong teks yang lebih lebar dari sel (satu baris per sel)."""
+    if pdf.get_string_width(text) <= width - 1.5:
+        return text
+    while text and pdf.get_string_width(text + "...") > width - 1.5:
+        text = text[:-1]
+    return text + "..."
+
+
+def add_table(pdf, df: pd.DataFrame, col_widths=None, font_size: int = 8):
+    """
+    Tabel DataFrame satu baris per sel dengan header berwarna; header
+    diulang otomatis di halaman baru. Sengaja memakai cell() biasa
+    (bukan multi_cell) agar render ratusan kartu tetap cepat.
+    """
+    pdf.set_font("Helvetica", "", font_size)
+    if df.empty:
+        pdf.cell(0, 6, "(tidak ada data)", new_x="LMARGIN", new_y="NEXT")
+        return
+
+    usable = pdf.w - pdf.l_margin - pdf.r_margin
+    if col_widths is None:
+        col_widths = [usable / len(df.columns)] * len(df.columns)
+    else:
+        scale = min(1.0, usable / sum(col_widths))
+        col_widths = [w * scale for w in col_widths]
+    row_h = font_size * 0.55
+
+    def header_row():
+        pdf.set_font("Helvetica", "B", font_size)
+        pdf.set_fill_color(*_HEADER_FILL)
+        for col, w in zip(df.columns, col_widths):
+            pdf.cell(w, row_h, _fit(pdf, _txt(col), w), border=1, fill=True)
+        pdf.ln(row_h)
+        pdf.set_font("Helvetica", "", font_size)
+
+    header_row()
+    for values in df.itertuples(index=False, name=None):
+        if pdf.get_y() + row_h > pdf.page_break_trigger:
+            pdf.add_page()
+            header_row()
+        for value, w in zip(values, col_widths):
+            pdf.cell(w, row_h, _fit(pdf, _txt(value), w), border=1)
+        pdf.ln(row_h)
+    pdf.ln(2)
+
+
+def add_bar_chart(pdf, labels, values, title: str, max_value: float = 100.0, unit: str = "%"):
+    """
+    Grafik batang horizontal (label di kiri, batang di kanan) digambar
+    langsung sebagai persegi panjang vektor.
+    """
+    _section(pdf, title)
+    bar_h = 3.6
+    label_w = 32
+    chart_w = pdf.w - pdf.l_margin - pdf.r_margin - label_w - 14
+    max_value = max_value or 1
+
+    for label, value in zip(labels, values):
+        if pdf.get_y() + bar_h + 1 > pdf.page_break_trigger:
+            pdf.add_page()
+        y = pdf.get_y()
+        x0 = pdf.l_margin + label_w
+        pdf.set_font("Helvetica", "", 7)
+        pdf.set_xy(pdf.l_margin, y)
+        pdf.cell(label_w - 1, bar_h, _txt(label), align="R")
+        pdf.set_fill_color(*_GRID_COLOR)
+        pdf.rect(x0, y + 0.4, chart_w, bar_h - 0.8, style="F")
+        ratio = max(0.0, min(1.0, float(value) / max_value))
+        if ratio > 0:
+            pdf.set_fill_color(*_BAR_COLOR)
+            pdf.rect(x0, y + 0.4, chart_w * ratio, bar_h - 0.8, style="F")
+        pdf.set_xy(x0 + chart_w + 1, y)
+        pdf.cell(13, bar_h, _txt(f"{value:g}{unit}"))
+        pdf.set_y(y + bar_h)
+    pdf.ln(2)
+
+
+def _output(pdf) -> bytes:
+    return bytes(pdf.output())
+
+
+# =============================
+# JENIS LAPORAN
+# =============================
+
+def render_rekap_surah_pdf(rekap_df: pd.DataFrame, kelas: str, logo_path: str = None) -> bytes:
+    """PDF rekap hafalan per surah satu kelas: grafik persentase lulus + tabel rekap."""
+    pdf = _new_pdf("Rekap Hafalan per Surah", f"Kelas {kelas}", logo_path)
+    add_bar_chart(
+        pdf,
+        rekap_df["Surah"],
+        rekap_df["Persentase Lulus (%)"],
+        f"Persentase Ayat Lulus per Surah - Kelas {kelas}",
+    )
+    pdf.add_page()
+    _section(pdf, f"Tabel Rekap Kelas {kelas}")
+    add_table(pdf, rekap_df, col_widths=(40, 20, 20, 20, 30))
+    return _output(pdf)
+
+
+def render_student_profile_pdf(student: dict, df_murid_log: pd.DataFrame, logo_path: str = None) -> bytes:
+    """
+    PDF profil / kartu progres satu murid: identitas, progres per surah
+    (dari Status_Hafalan) dan riwayat setoran (dari log).
+    """
+    kurikulum = curriculum_of(student)
+    ringkasan = surah_summary(student.get("Status_Hafalan", "{}"), kurikulum)
+    total_lulus = int(ringkasan["Lulus"].sum())
+    persen = round(total_lulus / kurikulum.total_ayat * 100, 2) if kurikulum.total_ayat else 0
+
+    pdf = _new_pdf(f"Kartu Progres Hafalan {kurikulum.nama}", f"Kelas {student.get('Kelas', '')}", logo_path)
+    pdf.set_font("Helvetica", "", 10)
+    for label, value in [
+        ("Nama", student.get("Nama_Murid", "")),
+        ("NIS", format_nis(student.get("NIS", ""))),
+        ("Kelas", student.get("Kelas", "")),
+        ("Total Ayat Lulus", f"{total_lulus} dari {kurikulum.total_ayat} ayat ({persen}%)"),
+        ("Update Terakhir", student.get("Update_Terakhir", "")),
+    ]:
+        pdf.cell(35, 6, _txt(label))
+        pdf.cell(0, 6, _txt(f": {value}"), new_x="LMARGIN", new_y="NEXT")
+
+    persen_surah = (ringkasan["Lulus"] / ringkasan["Jumlah Ayat"] * 100).round(1)
+    add_bar_chart(pdf, ringkasan["Surah"], persen_surah, "Progres Lulus per Surah")
+
+    pdf.add_page()
+    _section(pdf, "Status per Surah")
+    add_table(pdf, ringkasan, col_widths=(50, 25, 25, 25, 25))
+
+    _section(pdf, "Riwayat Setoran")
+    if df_murid_log is None or df_murid_log.empty:
+        pdf.cell(0, 6, "Belum ada histori setoran.", new_x="LMARGIN", new_y="NEXT")
+    else:
+        riwayat = df_murid_log[["Timestamp", "Surah", "Ayat_Dari", "Ayat_Sampai", "Status", "Guru_Pencatat"]].copy()
+        riwayat["Timestamp"] = pd.to_datetime(riwayat["Timestamp"]).dt.strftime("%Y-%m-%d %H:%M")
+        riwayat.columns = ["Waktu", "Surah", "Dari", "Sampai", "Status", "Guru"]
+        add_table(pdf, riwayat, col_widths=(32, 34, 14, 14, 24, 48))
+    return _output(pdf)
+
+
+def render_annual_pdf(laporan_df: pd.DataFrame, tahun: int, logo_path: str = None) -> bytes:
+    """PDF laporan tahunan (lanskap) berisi tabel rekap setoran seluruh murid."""
+    pdf = _new_pdf("Laporan Tahunan Hafalan Juz Amma", f"Tahun {tahun}", logo_path, orientation="L")
+    _section(pdf, f"Rekap Setoran Tahun {tahun} ({len(laporan_df)} murid)")
+    add_table(pdf, laporan_df, col_widths=(22, 45, 16, 20, 16, 20, 20, 114), font_size=7)
+    return _output(pdf)
+
+
+# =============================
+# MODE MASSAL (PROCESS POOL -> ZIP)
+# =============================
+
+_worker_logo_path = None
+
+
+def _init_worker(logo_path):
+    global _worker_logo_path
+    _worker_logo_path = logo_path
+
+
+def _render_task(task):
+    """Dijalankan di proses pekerja; mengembalikan (nama file di ZIP, bytes PDF)."""
+    kind, arcname, payload = task
+    if kind == BATCH_REKAP_KELAS:
+        kelas, records = payload
+        rekap_df = build_rekap_per_surah(pd.DataFrame(records), kelas, curriculum_of(records[0]))
+        return arcname, render_rekap_surah_pdf(rekap_df, kelas, _worker_logo_path)
+    student, log_records = payload
+    return arcname, render_student_profile_pdf(student, pd.DataFrame(log_records), _worker_logo_path)
+
+
+def batch_tasks(df_data: pd.DataFrame, df_log: pd.DataFrame, mode: str, kelas=None):
+    """
+    Menyusun daftar tugas render. Data dikirim ke pekerja hanya sebatas
+    yang dibutuhkan (baris kelas / baris murid + log murid tersebut).
+    """
+    if kelas:
+        df_data = df_data[df_data["Kelas"].isin(kelas if isinstance(kelas, (list, tuple)) else [kelas])]
+
+    if CURRICULUM_COLUMN not in df_data.columns:
+        df_data = df_data.assign(**{CURRICULUM_COLUMN: DEFAULT_CURRICULUM})
+
+    tasks = []
+    if mode == BATCH_REKAP_KELAS:
+        # satu rekap per (kelas, kurikulum); kurikulum selain bawaan diberi akhiran nama file
+        for (nama_kelas, kode), group in df_data.groupby(["Kelas", CURRICULUM_COLUMN], sort=True):
+            records = group[["ID_Murid", "Kelas", "Status_Hafalan", CURRICULUM_COLUMN]].to_dict("records")
+            akhiran = "" if kode == DEFAULT_CURRICULUM else f"_{kode}"
+            arcname = f"{safe_filename(nama_kelas)}/Rekap_{safe_filename(nama_kelas)}{akhiran}.pdf"
+            tasks.append((mode, arcname, (nama_kelas, records)))
+        return tasks
+
+    log_cols = ["Timestamp", "Surah", "Ayat_Dari", "Ayat_Sampai", "Status", "Guru_Pencatat"]
+    log_per_murid = {mid: g[log_cols] for mid, g in df_log.groupby("ID_Murid")} if not df_log.empty else {}
+    student_cols = [
+        c
+        for c in ["ID_Murid", "Nama_Murid", "NIS", "Kelas", "Status_Hafalan", "Update_Terakhir", CURRICULUM_COLUMN]
+        if c in df_data.columns
+    ]
+    for student in df_data[student_cols].to_dict("records"):
+        murid_log = log_per_murid.get(student["ID_Murid"])
+        log_records = murid_log.to_dict("records") if murid_log is not None else []
+        arcname = (
+            f"{safe_filename(student['Kelas'])}/"
+            f"{safe_filename(student['Nama_Murid'])}_{student['ID_Murid']}.pdf"
+        )
+        tasks.append((mode, arcname, (student, log_records)))
+    return tasks
+
+
+def render_batch_zip(
+    df_data: pd.DataFrame,
+    df_log: pd.DataFrame,
+    mode: str,
+    logo_path: str = None,
+    kelas=None,
+    processes: int = None,
+    progress=None,
+) -> bytes:
+    """
+    Render semua PDF (per kelas atau per murid) di process pool dan
+    mengemasnya dalam satu ZIP ber-folder per kelas.
+    """
+    progress = progress or (lambda fraction: None)
+    tasks = batch_tasks(df_data, df_log, mode, kelas)
+    output = BytesIO()
+    if not tasks:
+        with zipfile.ZipFile(output, "w"):
+            pass
+        return output.getvalue()
+
+    processes = processes or os.cpu_count() or 1
+    chunksize = max(1, len(tasks) // (processes * 4))
+    # "spawn" agar aman dipanggil dari thread (Streamlit / antrian ekspor)
+    ctx = multiprocessing.get_context("spawn")
+
+    with ProcessPoolExecutor(
+        max_workers=processes, mp_context=ctx, initializer=_init_worker, initargs=(logo_path,)
+    ) as pool, zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for i, (arcname, data) in enumerate(pool.map(_render_task, tasks, chunksize=chunksize), start=1):
+            zf.writestr(arcname, data)
+            progress(i / len(tasks))
+
+    return output.getvalue()
@@ -0,0 +1,226 @@
+"""
+Cetak kartu progres hafalan per murid untuk satu kelas atau seluruh sekolah.
+
+Contoh:
+    python report_cards.py --out rapor                       # seluruh sekolah, HTML + PDF
+    python report_cards.py --kelas "VII A" --format html     # satu kelas, HTML saja
+    python report_cards.py --jobs 4                          # batasi 4 proses
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from curriculum import curriculum_of
+from juz_amma_data import format_nis, surah_summary
+from log_engine import read_log
+from pdf_report import BATCH_PROFIL_MURID, SCHOOL_NAME, batch_tasks, render_student_profile_pdf
+from status_matrix import load_students
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_FILE = os.path.join(BASE_DIR, "data_hafalan.csv")
+LOG_FILE = os.path.join(BASE_DIR, "log_hafalan.bin")
+LOGO_FILE = os.path.join(BASE_DIR, "logo.png")
+
+FORMATS = ("html", "pdf")
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="id">
+<head>
+<meta charset="utf-8">
+<title>Kartu Progres - {{ murid.Nama_Murid }}</title>
+<style>
+  body { font-family: Arial, sans-serif; margin: 24px; color: #222; }
+  h1 { font-size: 18px; margin: 0; } h2 { font-size: 15px; margin: 18px 0 6px; }
+  table { border-collapse: collapse; width: 100%; font-size: 12px; }
+  th, td { border: 1px solid #bbb; padding: 3px 6px; text-align: left; }
+  th { background: #e6f0ea; }
+  .bar { background: #ddd; height: 10px; width: 160px; }
+  .bar > div { background: #2e8b57; height: 10px; }
+  .info td { border: none; padding: 1px 8px 1px 0; }
+</style>
+</head>
+<body>
+<h1>{{ sekolah }}</h1>
+<div>Kartu Progres Hafalan {{ kurikulum }} &middot; dicetak {{ dicetak }}</div>
+<hr>
+<table class="info">
+  <tr><td>Nama</td><td>: {{ murid.Nama_Murid }}</td></tr>
+  <tr><td>NIS</td><td>: {{ murid.NIS }}</td></tr>
+  <tr><td>Kelas</td><td>: {{ murid.Kelas }}</td></tr>
+  <tr><td>Total Ayat Lulus</td><td>: {{ total_lulus }} dari {{ total_ayat }} ayat ({{ persen }}%)</td></tr>
+</table>
+
+<h2>Status per Surah</h2>
+<table>
+  <tr><th>Surah</th><th>Jumlah Ayat</th><th>Lulus</th><th>Mengulang</th><th>Belum</th><th>Progres</th></tr>
+  {% for r in ringkasan %}
+  <tr>
+    <td>{{ r.Surah }}</td><td>{{ r["Jumlah Ayat"] }}</td><td>{{ r.Lulus }}</td>
+    <td>{{ r.Mengulang }}</td><td>{{ r.Belum }}</td>
+    <td><div class="bar"><div style="width: {{ (100 * r.Lulus / r["Jumlah Ayat"]) | round(1) }}%"></div></div></td>
+  </tr>
+  {% endfor %}
+</table>
+
+<h2>Riwayat Setoran</h2>
+{% if riwayat %}
+<table>
+  <tr><th>Waktu</th><th>Surah</th><th>Ayat</th><th>Status</th><th>Guru</th></tr>
+  {% for r in riwayat %}
+  <tr><td>{{ r.Timestamp }}</td><td>{{ r.Surah }}</td><td>{{ r.Ayat_Dari }}-{{ r.Ayat_Sampai }}</td>
+      <td>{{ r.Status }}</td><td>{{ r.Guru_Pencatat }}</td></tr>
+  {% endfor %}
+</table>
+{% else %}
+<p>Belum ada histori setoran.</p>
+{% endif %}
+</body>
+</html>
+"""
+
+_template = None
+_worker_config = {}
+
+
+def render_student_html(student: dict, log_records) -> str:
+    """Kartu progres satu murid dalam bentuk HTML (template jinja2)."""
+    global _template
+    if _template is None:
+        from jinja2 import Environment
+
+        _template = Environment(autoescape=True).from_string(HTML_TEMPLATE)
+
+    kurikulum = curriculum_of(student)
+    ringkasan = surah_summary(student.get("Status_Hafalan", "{}"), kurikulum)
+    total_lulus = int(ringkasan["Lulus"].sum())
+    riwayat = [
+        dict(r, Timestamp=pd.Timestamp(r["Timestamp"]).strftime("%Y-%m-%d %H:%M")) for r in log_records
+    ]
+    return _template.render(
+        sekolah=SCHOOL_NAME,
+        dicetak=datetime.now().strftime("%Y-%m-%d %H:%M"),
+        murid=dict(student, NIS=format_nis(student.get("NIS", ""))),
+        total_lulus=total_lulus,
+        kurikulum=kurikulum.nama,
+        total_ayat=kurikulum.total_ayat,
+        persen=round(total_lulus / kurikulum.total_ayat * 100, 2) if kurikulum.total_ayat else 0,
+        ringkasan=ringkasan.to_dict("records"),
+        riwayat=riwayat,
+    )
+
+
+def _init_worker(out_dir, formats, logo_path):
+    _worker_config.update(out_dir=out_dir, formats=formats, logo_path=logo_path)
+
+
+def _write_card(task):
+    """Dijalankan di proses pekerja: tulis kartu satu murid ke disk, kembalikan jumlah file."""
+    _, arcname, (student, log_records) = task
+    base = os.path.join(_worker_config["out_dir"], os.path.splitext(arcname)[0])
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+
+    written = 0
+    if "html" in _worker_config["formats"]:
+        with open(base + ".html", "w", encoding="utf-8") as f:
+            f.write(render_student_html(student, log_records))
+        written += 1
+    if "pdf" in _worker_config["formats"]:
+        pdf_bytes = render_student_profile_pdf(student, pd.DataFrame(log_records), _worker_config["logo_path"])
+        with open(base + ".pdf", "wb") as f:
+            f.write(pdf_bytes)
+        written += 1
+    return written
+
+
+def _progress_bar(done, total, started, width=30):
+    ratio = done / total if total else 1
+    filled = int(width * ratio)
+    elapsed = time.perf_counter() - started
+    sys.stderr.write(
+        f"\r[{'#' * filled}{'.' * (width - filled)}] {done}/{total} murid  {elapsed:6.1f} dtk"
+    )
+    sys.stderr.flush()
+
+
+def generate_report_cards(df_data, df_log, out_dir, kelas=None, formats=FORMATS, jobs=None, logo_path=LOGO_FILE, show_progress=True):
+    """
+    Membuat kartu progres semua murid (atau kelas terpilih) secara paralel.
+    Struktur hasil: <out_dir>/<Kelas>/<Nama>_<ID>.html|pdf
+    Mengembalikan ringkasan waktu (dict).
+    """
+    started = time.perf_counter()
+    tasks = batch_tasks(df_data, df_log, BATCH_PROFIL_MURID, kelas)
+    prepared = time.perf_counter()
+
+    jobs = jobs or os.cpu_count() or 1
+    chunksize = max(1, len(tasks) // (jobs * 4))
+    files = 0
+    redraw_every = max(1, len(tasks) // 100)
+    if tasks:
+        with ProcessPoolExecutor(
+            max_workers=jobs, initializer=_init_worker, initargs=(out_dir, tuple(formats), logo_path)
+        ) as pool:
+            for i, written in enumerate(pool.map(_write_card, tasks, chunksize=chunksize), start=1):
+                files += written
+                if show_progress and (i % redraw_every == 0 or i == len(tasks)):
+                    _progress_bar(i, len(tasks), started)
+        if show_progress:
+            sys.stderr.write("\n")
+
+    finished = time.perf_counter()
+    return {
+        "murid": len(tasks),
+        "file": files,
+        "proses": jobs,
+        "detik_persiapan": prepared - started,
+        "detik_render": finished - prepared,
+        "detik_total": finished - started,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cetak kartu progres hafalan per murid (HTML/PDF).")
+    parser.add_argument("--kelas", action="append", help="Kelas yang dicetak (boleh diulang). Default: seluruh sekolah.")
+    parser.add_argument("--out", default="kartu_progres", help="Folder tujuan (default: kartu_progres).")
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=list(FORMATS), help="Format keluaran.")
+    parser.add_argument("--jobs", type=int, default=None, help="Jumlah proses paralel (default: jumlah core).")
+    parser.add_argument("--data", default=DB_FILE, help="File database murid (atau folder data_hafalan_kelas/).")
+    parser.add_argument("--log", default=LOG_FILE, help="File log setoran.")
+    parser.add_argument("--logo", default=LOGO_FILE, help="Logo sekolah untuk kop PDF.")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.data):
+        parser.error(f"File database '{args.data}' tidak ditemukan.")
+
+    # data dimuat satu kali di proses utama, lalu dibagi per murid ke pekerja
+    df_data = load_students(args.data, kelas=args.kelas)
+    if "NIS" not in df_data.columns:
+        df_data["NIS"] = ""
+    df_log = read_log(args.log)
+
+    if args.kelas:
+        unknown = sorted(set(args.kelas) - set(df_data["Kelas"].astype(str)))
+        if unknown:
+            parser.error(f"Kelas tidak ditemukan: {', '.join(unknown)}")
+
+    ringkasan = generate_report_cards(
+        df_data, df_log, args.out, kelas=args.kelas, formats=args.format, jobs=args.jobs, logo_path=args.logo
+    )
+
+    murid = ringkasan["murid"]
+    print(f"Selesai: {murid} murid, {ringkasan['file']} file di '{args.out}' ({ringkasan['proses']} proses).")
+    print(
+        f"Waktu: persiapan {ringkasan['detik_persiapan']:.2f} dtk, render {ringkasan['detik_render']:.2f} dtk, "
+        f"total {ringkasan['detik_total']:.2f} dtk"
+        + (f" ({ringkasan['detik_render'] / murid * 1000:.0f} ms/murid)" if murid else "")
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
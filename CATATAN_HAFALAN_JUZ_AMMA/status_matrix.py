@@ -0,0 +1,345 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from curriculum import CURRICULUM_COLUMN, CURRICULUM_DIRNAME, DEFAULT_CURRICULUM, assign_curricula, get_curriculum
+from data_store import read_data
+from juz_amma_data import (
+    JUZ_AMMA,
+    pack_status,
+    pack_status_rows,
+    unpack_status_column,
+)
+from log_store import dictionary_codes, load_dictionary, save_dictionary
+
+# =============================
+# MATRIKS STATUS HAFALAN (FILE BINER, MEMORY-MAPPED)
+# =============================
+# Status setiap ayat disimpan di satu file berisi baris-baris berukuran tetap:
+#   id_murid (4 byte) | waktu update (4 byte) | kode guru (2 byte) | 564 byte status ayat
+# Posisi ayat dalam baris mengikuti offset kurikulum. File dibuka dengan
+# numpy.memmap sehingga setoran cukup menulis byte ayat yang berubah di
+# tempat, dan semua proses (app, CLI, pekerja) berbagi page cache yang sama.
+# Kolom Status_Hafalan di data_hafalan tetap ditulis saat database disimpan,
+# tetapi nilai di matriks ini yang berlaku (lihat overlay).
+#
+# Lebar baris bergantung pada kurikulum, jadi setiap kurikulum punya file
+# sendiri: status_hafalan.mat (Juz Amma), status_hafalan.quran.mat (30 juz,
+# 6236 byte per murid), dst. StatusMatrices mengelola semuanya sekaligus.
+
+MATRIX_FILENAME = "status_hafalan.mat"
+FREE_ID = 0  # baris murid yang sudah dihapus
+
+# =============================
+# NILAI PER AYAT (FILE PENDAMPING <matriks>.nilai)
+# =============================
+# Selain status, tiap ayat menyimpan nilai tajwid/kelancaran terakhir dan
+# tanggal penilaiannya dalam satu uint16:
+#   4 bit atas  = nilai (1-5; 0 = belum pernah dinilai)
+#   12 bit bawah = nomor hari sejak HARI_DASAR (cukup sampai Maret 2035)
+# Baris file pendamping sejajar dengan baris matriks status (nomor baris sama),
+# jadi 564 ayat Juz Amma = 1128 byte per murid (30 juz = 12,5 KB).
+NILAI_SUFFIX = ".nilai"
+NILAI_MIN, NILAI_MAX = 1, 5
+HARI_DASAR = np.datetime64("2024-01-01", "D")
+_HARI_MAKS = (1 << 12) - 1
+
+
+def row_dtype(total_ayat: int) -> np.dtype:
+    return np.dtype(
+        [
+            ("id_murid", "<u4"),
+            ("waktu", "<u4"),
+            ("guru", "<u2"),
+            ("status", "u1", (total_ayat,)),
+        ]
+    )
+
+
+def matrix_path_for(matrix_path: str, kode: str) -> str:
+    """File matriks kurikulum `kode`; Juz Amma memakai `matrix_path` apa adanya."""
+    if kode == DEFAULT_CURRICULUM:
+        return matrix_path
+    root, ext = os.path.splitext(matrix_path)
+    return f"{root}.{kode}{ext}"
+
+
+def _epoch(when) -> int:
+    return int(pd.Timestamp(when).value // 10**9)
+
+
+def day_number(when) -> int:
+    """Nomor hari penilaian (1 = HARI_DASAR) untuk disimpan di 12 bit bawah nilai ayat."""
+    hari = int((np.datetime64(pd.Timestamp(when).date(), "D") - HARI_DASAR).astype(int)) + 1
+    return min(max(hari, 1), _HARI_MAKS)
+
+
+def decode_grades(nilai) -> tuple:
+    """Array uint16 nilai ayat -> (nilai 0-15, tanggal datetime64[D]; NaT jika belum dinilai)."""
+    nilai = np.asarray(nilai)
+    hari = (nilai & _HARI_MAKS).astype(np.int64)
+    tanggal = np.where(hari > 0, HARI_DASAR + (hari - 1), np.datetime64("NaT"))
+    return (nilai >> 12).astype(np.uint8), tanggal.astype("datetime64[D]")
+
+
+class StatusMatrix:
+    """Akses baca/tulis ke file matriks status; baris dicari lewat peta ID_Murid -> nomor baris."""
+
+    def __init__(self, path: str, kurikulum=JUZ_AMMA):
+        self.path = path
+        self.kurikulum = kurikulum
+        self.dtype = row_dtype(kurikulum.total_ayat)
+        self._open()
+
+    def _open(self):
+        if os.path.exists(self.path) and os.path.getsize(self.path) >= self.dtype.itemsize:
+            self.rows = np.memmap(self.path, dtype=self.dtype, mode="r+")
+        else:
+            self.rows = np.zeros(0, dtype=self.dtype)
+        ids = self.rows["id_murid"]
+        self._index = pd.Index(ids[ids != FREE_ID])
+        self._positions = np.flatnonzero(ids != FREE_ID)
+        self.kamus = load_dictionary(self.path)
+        self._open_grades()
+
+    def _open_grades(self):
+        """Memetakan file nilai; diperpanjang (berisi nol) agar barisnya sama banyak dengan matriks status."""
+        nilai_path = self.path + NILAI_SUFFIX
+        ukuran = len(self.rows) * self.kurikulum.total_ayat * 2
+        if ukuran == 0:
+            self.grades = np.zeros((0, self.kurikulum.total_ayat), dtype="<u2")
+            return
+        if not os.path.exists(nilai_path) or os.path.getsize(nilai_path) < ukuran:
+            with open(nilai_path, "ab") as f:
+                f.truncate(ukuran)
+        self.grades = np.memmap(
+            nilai_path, dtype="<u2", mode="r+", shape=(len(self.rows), self.kurikulum.total_ayat)
+        )
+
+    def __len__(self):
+        return len(self._index)
+
+    def _positions_of(self, student_ids) -> np.ndarray:
+        """Nomor baris untuk setiap ID (-1 jika belum terdaftar)."""
+        found = self._index.get_indexer(np.asarray(student_ids, dtype=np.int64))
+        return np.append(self._positions, -1)[found]
+
+    def _row_of(self, student_id) -> int:
+        row = self._positions_of([student_id])[0]
+        if row < 0:
+            self._open()  # mungkin baru ditambahkan oleh proses lain
+            row = self._positions_of([student_id])[0]
+        if row < 0:
+            raise KeyError(f"Murid {student_id} belum terdaftar di matriks status.")
+        return int(row)
+
+    def sync_students(self, df: pd.DataFrame):
+        """
+        Menyamakan daftar murid dengan `df`: murid yang sudah tidak ada
+        dikosongkan barisnya, murid baru (status awal dari kolom Status_Hafalan)
+        mengisi baris kosong lebih dulu lalu sisanya ditambahkan di akhir file,
+        sehingga file matriks dan nilai tidak terus membesar.
+        """
+        self._open()
+        ids = df["ID_Murid"].astype(np.int64).to_numpy()
+
+        removed = self._positions[~self._index.isin(ids)]
+        if len(removed):
+            self.rows[removed] = np.zeros(len(removed), dtype=self.dtype)
+            self.rows.flush()
+            self.grades[removed] = 0
+            self.grades.flush()
+
+        new = df[self._positions_of(ids) < 0]
+        if len(new):
+            rows = np.zeros(len(new), dtype=self.dtype)
+            rows["id_murid"] = new["ID_Murid"].astype(np.int64).to_numpy()
+            rows["status"] = unpack_status_column(new["Status_Hafalan"], self.kurikulum)
+            # baris kosong nilainya sudah nol (dikosongkan bersama barisnya)
+            free = np.flatnonzero(self.rows["id_murid"] == FREE_ID)[:len(rows)]
+            if len(free):
+                self.rows[free] = rows[:len(free)]
+                self.rows.flush()
+            with open(self.path, "ab") as f:
+                f.write(rows[len(free):].tobytes())
+        if len(removed) or len(new):
+            self._open()
+
+    def update_range(
+        self, student_id, surah: str, start_ayat: int, end_ayat: int, status_code: int, guru: str, when=None, grade=None
+    ) -> int:
+        """
+        Menulis status ayat start..end satu surah langsung ke file (hanya byte
+        yang berubah) beserta waktu dan guru. Jika `grade` (NILAI_MIN-NILAI_MAX)
+        diisi, nilai dan tanggal penilaian ayat-ayat itu ikut diperbarui.
+        Mengembalikan total ayat Lulus murid.
+        """
+        row = self._row_of(student_id)
+        offset = self.kurikulum.offsets[surah]
+        when = when or datetime.now()
+
+        if guru not in self.kamus["guru"]:
+            self.kamus = load_dictionary(self.path)  # proses lain mungkin sudah menambah guru ini
+        jumlah_guru = len(self.kamus["guru"])
+        kode_guru = dictionary_codes(pd.Series([guru]), self.kamus["guru"])[0]
+        if len(self.kamus["guru"]) != jumlah_guru:
+            save_dictionary(self.path, self.kamus)
+
+        status = self.rows["status"]
+        status[row, offset + start_ayat - 1:offset + end_ayat] = status_code
+        self.rows["waktu"][row] = _epoch(when)
+        self.rows["guru"][row] = kode_guru
+        self.rows.flush()
+        if grade is not None:
+            if not NILAI_MIN <= int(grade) <= NILAI_MAX:
+                raise ValueError(f"Nilai harus {NILAI_MIN}-{NILAI_MAX}.")
+            self.grades[row, offset + start_ayat - 1:offset + end_ayat] = (int(grade) << 12) | day_number(when)
+            self.grades.flush()
+        return int((status[row] == 1).sum())
+
+    def low_grades(self, student_ids, below: int, since) -> pd.DataFrame:
+        """
+        Ayat milik `student_ids` yang nilai terakhirnya < `below` dan dinilai
+        sejak tanggal `since`. Satu operasi vektor atas blok baris murid.
+        Kolom: ID_Murid, Surah, Ayat, Nilai, Tanggal_Nilai.
+        """
+        ids = np.asarray(student_ids, dtype=np.int64)
+        pos = self._positions_of(ids)
+        ids, pos = ids[pos >= 0], pos[pos >= 0]
+        nilai, tanggal = decode_grades(self.grades[pos]) if len(pos) else decode_grades(np.zeros((0, 0), "<u2"))
+        batas = np.datetime64(pd.Timestamp(since).date(), "D")
+        murid, ayat = np.nonzero((nilai > 0) & (nilai < below) & (tanggal >= batas))
+
+        surah_idx = np.searchsorted(self.kurikulum.starts, ayat, side="right") - 1
+        return pd.DataFrame(
+            {
+                "ID_Murid": ids[murid],
+                "Surah": np.asarray(self.kurikulum.surah_names, dtype=object)[surah_idx],
+                "Ayat": ayat - self.kurikulum.starts[surah_idx] + 1,
+                "Nilai": nilai[murid, ayat],
+                "Tanggal_Nilai": pd.to_datetime(tanggal[murid, ayat]),
+            }
+        )
+
+    def status_value(self, student_id) -> str:
+        """Status_Hafalan murid (format v1) dari baris matriks."""
+        return pack_status(self.rows["status"][self._row_of(student_id)], self.kurikulum)
+
+    def overlay(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Salinan `df` dengan Status_Hafalan dan Total_Ayat_Lulus dari matriks,
+        serta Update_Terakhir/Guru_Pencatat jika setoran di matriks lebih baru.
+        """
+        df = df.copy()
+        pos = self._positions_of(df["ID_Murid"])
+        found = pos >= 0
+        if not found.any():
+            return df
+        rows = np.asarray(self.rows[pos[found]])
+        idx = df.index[found]
+
+        for col in ("Status_Hafalan", "Update_Terakhir", "Guru_Pencatat"):
+            df[col] = df[col].astype(object) if col in df.columns else ""
+        df.loc[idx, "Status_Hafalan"] = pack_status_rows(rows["status"], self.kurikulum)
+        df.loc[idx, "Total_Ayat_Lulus"] = (rows["status"] == 1).sum(axis=1)
+
+        waktu = pd.Series(
+            pd.to_datetime(rows["waktu"].astype(np.int64), unit="s").strftime("%Y-%m-%d %H:%M:%S"), index=idx
+        )
+        guru = pd.Series(np.asarray(self.kamus["guru"] + [""], dtype=object)[rows["guru"]], index=idx)
+        lebih_baru = (rows["waktu"] > 0) & (waktu > df.loc[idx, "Update_Terakhir"].fillna("").astype(str)).to_numpy()
+        df.loc[idx[lebih_baru], "Update_Terakhir"] = waktu[lebih_baru]
+        df.loc[idx[lebih_baru], "Guru_Pencatat"] = guru[lebih_baru]
+        return df
+
+
+class StatusMatrices:
+    """
+    Matriks status semua kurikulum. Murid dipetakan ke matriks kurikulumnya
+    lewat kolom Kurikulum (lihat curriculum.assign_curricula).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._matrices = {}
+
+    def get(self, kode: str) -> StatusMatrix:
+        if kode not in self._matrices:
+            self._matrices[kode] = StatusMatrix(matrix_path_for(self.path, kode), get_curriculum(kode))
+        return self._matrices[kode]
+
+    def _existing_codes(self):
+        """Kode kurikulum yang file matriksnya sudah ada di disk."""
+        folder = os.path.dirname(os.path.abspath(self.path))
+        root, ext = os.path.splitext(os.path.basename(self.path))
+        codes = {DEFAULT_CURRICULUM} if os.path.exists(self.path) else set()
+        for name in os.listdir(folder):
+            if name.startswith(root + ".") and name.endswith(ext) and name != root + ext:
+                codes.add(name[len(root) + 1:-len(ext)])
+        return codes
+
+    @staticmethod
+    def _codes(df: pd.DataFrame) -> pd.Series:
+        if CURRICULUM_COLUMN in df.columns:
+            return df[CURRICULUM_COLUMN].fillna(DEFAULT_CURRICULUM)
+        return pd.Series(DEFAULT_CURRICULUM, index=df.index)
+
+    def sync_students(self, df: pd.DataFrame):
+        """
+        StatusMatrix.sync_students per kurikulum. Murid yang pindah kurikulum
+        dikosongkan dari matriks lama dan ditambahkan ke matriks baru; status
+        awalnya dipetakan per surah dari Status_Hafalan.
+        """
+        codes = self._codes(df)
+        matrices = {}
+        for kode in sorted(set(codes) | self._existing_codes() | set(self._matrices)):
+            try:
+                matrices[kode] = self.get(kode)
+            except KeyError:
+                continue  # kurikulum sudah dihapus dari daftar
+
+        # Status_Hafalan di database bisa tertinggal dari matriks; murid yang pindah
+        # kurikulum membawa status terakhir dari matriks lama sebelum barisnya dikosongkan
+        df = df.copy()
+        for kode, matrix in matrices.items():
+            pindah = (codes != kode).to_numpy() & (matrix._positions_of(df["ID_Murid"]) >= 0)
+            if pindah.any():
+                df["Status_Hafalan"] = df["Status_Hafalan"].astype(object)
+                df.loc[pindah, "Status_Hafalan"] = matrix.overlay(df[pindah])["Status_Hafalan"]
+
+        for kode, matrix in matrices.items():
+            matrix.sync_students(df[codes == kode])
+
+    def overlay(self, df: pd.DataFrame) -> pd.DataFrame:
+        codes = self._codes(df)
+        parts = [self.get(kode).overlay(df[codes == kode]) for kode in codes.unique()]
+        if not parts:
+            return df.copy()
+        return pd.concat(parts).loc[df.index]
+
+    def update_range(
+        self, student_id, kode: str, surah: str, start_ayat: int, end_ayat: int, status_code: int, guru: str, when=None, grade=None
+    ) -> int:
+        return self.get(kode).update_range(student_id, surah, start_ayat, end_ayat, status_code, guru, when, grade)
+
+    def low_grades(self, df: pd.DataFrame, below: int, since) -> pd.DataFrame:
+        """StatusMatrix.low_grades untuk semua murid `df` (mis. satu kelas), lintas kurikulum."""
+        codes = self._codes(df)
+        parts = [self.get(kode).low_grades(df.loc[codes == kode, "ID_Murid"], below, since) for kode in codes.unique()]
+        if not parts:
+            return pd.DataFrame(columns=["ID_Murid", "Surah", "Ayat", "Nilai", "Tanggal_Nilai"])
+        return pd.concat(parts, ignore_index=True)
+
+
+def load_students(db_path: str, matrix_path: str = None, kelas=None) -> pd.DataFrame:
+    """
+    Membaca database murid, menetapkan kurikulum tiap murid, lalu menerapkan
+    matriks status di folder yang sama (jika ada). Dipakai oleh proses di luar
+    aplikasi Streamlit (CLI, pekerja). `kelas` membatasi kelas yang dibaca (lihat read_data).
+    """
+    df = read_data(db_path, kelas=kelas)
+    folder = os.path.dirname(os.path.abspath(db_path))
+    df[CURRICULUM_COLUMN] = assign_curricula(df, os.path.join(folder, CURRICULUM_DIRNAME))
+    return StatusMatrices(matrix_path or os.path.join(folder, MATRIX_FILENAME)).overlay(df)
@@ -0,0 +1,61 @@
+import os
+import threading
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+# =============================
+# KUNCI PENYIMPANAN BERSAMA (ANTAR THREAD DAN PROSES)
+# =============================
+# Aplikasi Streamlit dan server API (api_server.py) menulis ke berkas yang
+# sama: matriks status, log setoran, rollup harian dan database murid.
+# Setiap penulisan dibungkus StoreLock: kunci thread (RLock) untuk sesi /
+# permintaan dalam satu proses, ditambah kunci berkas eksklusif
+# (flock / msvcrt.locking) pada LOCK_FILENAME agar proses lain menunggu.
+# Kunci bisa dimasuki ulang oleh thread yang sama (mis. batch setoran yang
+# memanggil fungsi setoran tunggal).
+
+LOCK_FILENAME = ".hafalan.lock"
+
+
+class StoreLock:
+    """Kunci eksklusif reentrant untuk satu folder data, berlaku lintas thread dan proses."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        try:
+            if self._depth == 0:
+                self._file = open(self.path, "a+b")
+                if os.name == "nt":
+                    self._file.seek(0)
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                else:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            try:
+                if os.name == "nt":
+                    self._file.seek(0)
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            finally:
+                self._file.close()
+                self._file = None
+        self._thread_lock.release()
+        return False
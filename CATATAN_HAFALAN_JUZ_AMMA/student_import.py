@@ -0,0 +1,282 @@
+from datetime import datetime
+
+import re
+
+import pandas as pd
+
+from juz_amma_data import create_initial_data_structure
+
+# =============================
+# IMPOR MASSAL MURID (UPSERT BERDASARKAN NIS)
+# =============================
+# File dibaca per potongan (chunk), divalidasi secara vektor, lalu digabung
+# ke database dengan aturan upsert:
+#   - NIS sudah ada  -> Nama_Murid / Kelas diperbarui, progres hafalan tetap
+#   - NIS belum ada  -> dicocokkan dengan (Nama_Murid, Kelas) murid lama tanpa NIS
+#                       (NIS-nya diisi), selain itu murid baru dengan status hafalan kosong
+#   - tanpa NIS      -> dicocokkan dengan (Nama_Murid, Kelas) murid lama yang juga tanpa NIS
+# Database hanya ditulis satu kali oleh pemanggil setelah semua chunk selesai.
+
+REQUIRED_COLS = ["Nama_Murid", "Kelas"]
+CHUNK_SIZE = 5000
+HEADER_SCAN_ROWS = 20
+ROW_COLUMN = "Baris"  # nomor baris asli di file, diisi oleh pembaca chunk
+
+# Nama kolom lain yang dipetakan ke kolom standar (mis. ekspor Dapodik).
+# Dibandingkan setelah huruf kecil dan tanpa spasi/tanda baca.
+COLUMN_ALIASES = {
+    "Nama_Murid": ["nama", "namasiswa", "namapesertadidik", "namalengkap", "namamurid"],
+    "Kelas": ["kelas", "rombel", "rombonganbelajar", "rombelsaatini", "namarombel"],
+    "NIS": ["nis", "nipd", "noinduk", "nomorinduk", "nomorinduksiswa"],
+}
+_ALIAS_LOOKUP = {alias: col for col, aliases in COLUMN_ALIASES.items() for alias in aliases}
+
+
+def canonical_column(name) -> str:
+    """Memetakan judul kolom (mis. 'Nama Peserta Didik', 'Rombel', 'NIPD') ke kolom standar."""
+    key = re.sub(r"[^0-9a-z]", "", str(name).strip().lower())
+    return _ALIAS_LOOKUP.get(key, str(name).strip())
+
+
+def normalize_nis(series: pd.Series) -> pd.Series:
+    """NIS sebagai teks bersih: tanpa spasi, tanpa akhiran '.0' dari CSV/Excel, kosong jika NaN."""
+    s = series.astype("string").fillna("").str.strip()
+    return s.str.replace(r"\.0+$", "", regex=True)
+
+
+def _name_key(nama: pd.Series, kelas: pd.Series) -> pd.Series:
+    return nama.astype("string").str.strip().str.casefold() + "|" + kelas.astype("string").str.strip().str.casefold()
+
+
+def iter_csv_chunks(uploaded_file, chunksize: int = CHUNK_SIZE, sep: str = ";"):
+    """
+    Membaca CSV (pemisah ;) per potongan; semua kolom dibaca sebagai teks.
+    Baris kosong ikut dibaca lalu dibuang agar kolom Baris tetap nomor baris di file.
+    """
+    reader = pd.read_csv(
+        uploaded_file, sep=sep, dtype=str, chunksize=chunksize, skipinitialspace=True, skip_blank_lines=False
+    )
+    for chunk in reader:
+        chunk = chunk.dropna(how="all")
+        chunk.insert(0, ROW_COLUMN, chunk.index + 2)  # +2: header & 1-based
+        yield chunk
+
+
+def _find_header(rows):
+    """
+    Mencari baris judul kolom di beberapa baris pertama (file Dapodik biasanya
+    diawali judul laporan). Mengembalikan (index_baris, daftar_kolom) atau None.
+    """
+    for i, row in enumerate(rows):
+        names = [canonical_column(v) if v is not None else "" for v in row]
+        if all(col in names for col in REQUIRED_COLS):
+            return i, names
+    return None
+
+
+def iter_xlsx_chunks(uploaded_file, chunksize: int = CHUNK_SIZE, sheet_name: str = None):
+    """
+    Membaca XLSX dengan mode read-only openpyxl: baris dialirkan satu per satu
+    dan dikumpulkan per `chunksize` baris menjadi DataFrame teks, tanpa
+    memuat seluruh workbook ke memori.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(uploaded_file, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet_name] if sheet_name else wb.worksheets[0]
+        rows = ws.iter_rows(values_only=True)
+
+        head = []
+        for row in rows:
+            head.append(row)
+            if len(head) >= HEADER_SCAN_ROWS:
+                break
+        found = _find_header(head)
+        if found is None:
+            raise ValueError(f"Kolom wajib tidak ditemukan: {', '.join(REQUIRED_COLS)}")
+        header_idx, columns = found
+        wanted = [i for i, c in enumerate(columns) if c in REQUIRED_COLS + ["NIS"]]
+        names = [columns[i] for i in wanted]
+
+        def to_text(value):
+            if value is None:
+                return None
+            if isinstance(value, float) and value.is_integer():
+                return str(int(value))
+            return str(value)
+
+        def pending_rows():
+            yield from head[header_idx + 1:]
+            yield from rows
+
+        def to_frame(buffer, nomor):
+            chunk = pd.DataFrame(buffer, columns=names, dtype="string")
+            chunk.insert(0, ROW_COLUMN, nomor)
+            return chunk
+
+        buffer, nomor = [], []
+        # nomor baris sheet (1-based) dihitung termasuk judul laporan dan baris kosong
+        for sheet_row, row in enumerate(pending_rows(), start=header_idx + 2):
+            if row is None or all(v is None for v in row):
+                continue
+            buffer.append([to_text(row[i]) if i < len(row) else None for i in wanted])
+            nomor.append(sheet_row)
+            if len(buffer) >= chunksize:
+                yield to_frame(buffer, nomor)
+                buffer, nomor = [], []
+        if buffer:
+            yield to_frame(buffer, nomor)
+    finally:
+        wb.close()
+
+
+def iter_upload_chunks(uploaded_file, filename: str = None, chunksize: int = CHUNK_SIZE):
+    """Memilih pembaca sesuai ekstensi file: .xlsx (openpyxl read-only) atau CSV (pemisah ;)."""
+    filename = filename or getattr(uploaded_file, "name", "") or ""
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        return iter_xlsx_chunks(uploaded_file, chunksize)
+    return iter_csv_chunks(uploaded_file, chunksize)
+
+
+def validate_chunk(chunk: pd.DataFrame, row_offset: int = 0):
+    """
+    Memisahkan baris valid dan baris yang ditolak (beserta alasannya).
+    Nomor baris di laporan diambil dari kolom Baris pembaca chunk; jika tidak
+    ada, dihitung dari `row_offset` dengan anggapan header di baris pertama.
+    Mengembalikan (valid_df, rejected_df).
+    """
+    chunk = chunk.rename(columns=canonical_column)
+    chunk = chunk.loc[:, ~chunk.columns.duplicated()]
+    missing = [c for c in REQUIRED_COLS if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"Kolom wajib tidak ditemukan: {', '.join(missing)}")
+
+    out = pd.DataFrame(index=chunk.index)
+    if ROW_COLUMN in chunk.columns:
+        out["Baris"] = chunk[ROW_COLUMN].astype(int).to_numpy()
+    else:
+        out["Baris"] = pd.RangeIndex(row_offset + 2, row_offset + 2 + len(chunk))  # +2: header & 1-based
+    out["Nama_Murid"] = chunk["Nama_Murid"].astype("string").str.strip().fillna("")
+    out["Kelas"] = chunk["Kelas"].astype("string").str.strip().fillna("")
+    out["NIS"] = normalize_nis(chunk["NIS"]) if "NIS" in chunk.columns else ""
+
+    alasan = pd.Series("", index=chunk.index, dtype="string")
+    alasan = alasan.mask(out["Nama_Murid"] == "", "Nama_Murid kosong")
+    alasan = alasan.mask((alasan == "") & (out["Kelas"] == ""), "Kelas kosong")
+    alasan = alasan.mask(
+        (alasan == "") & (out["NIS"] != "") & ~out["NIS"].str.fullmatch(r"[0-9A-Za-z./-]+"),
+        "Format NIS tidak valid",
+    )
+
+    rejected = out[alasan != ""].assign(Alasan=alasan[alasan != ""])
+    return out[alasan == ""], rejected
+
+
+def import_students(df: pd.DataFrame, chunks, now: str = None):
+    """
+    Menggabungkan hasil impor ke `df` (database murid saat ini).
+    `chunks` adalah iterable DataFrame (mis. dari iter_csv_chunks / iter_xlsx_chunks).
+    Mengembalikan (df_baru, laporan) dengan laporan berisi jumlah
+    inserted/updated/unchanged/duplikat dan DataFrame baris yang ditolak.
+    """
+    now = now or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    valid_parts, rejected_parts = [], []
+    offset = 0
+    for chunk in chunks:
+        valid, rejected = validate_chunk(chunk, offset)
+        offset += len(chunk)
+        valid_parts.append(valid)
+        rejected_parts.append(rejected)
+
+    rejected = (
+        pd.concat(rejected_parts, ignore_index=True)
+        if rejected_parts
+        else pd.DataFrame(columns=["Baris", "Nama_Murid", "Kelas", "NIS", "Alasan"])
+    )
+    incoming = (
+        pd.concat(valid_parts, ignore_index=True)
+        if valid_parts
+        else pd.DataFrame(columns=["Baris", "Nama_Murid", "Kelas", "NIS"])
+    )
+
+    # kunci upsert: NIS jika ada, selain itu nama+kelas
+    incoming["Kunci"] = incoming["NIS"].where(
+        incoming["NIS"] != "", "nama:" + _name_key(incoming["Nama_Murid"], incoming["Kelas"])
+    )
+    sebelum = len(incoming)
+    incoming = incoming.drop_duplicates("Kunci", keep="last")
+    duplikat = sebelum - len(incoming)
+
+    df = df.copy()
+    existing_nis = normalize_nis(df["NIS"]) if "NIS" in df.columns else pd.Series("", index=df.index, dtype="string")
+    df["NIS"] = existing_nis
+    existing_key = existing_nis.where(
+        existing_nis != "", "nama:" + _name_key(df["Nama_Murid"], df["Kelas"])
+    )
+    key_to_index = pd.Series(df.index, index=existing_key.to_numpy())
+    key_to_index = key_to_index[~key_to_index.index.duplicated(keep="first")]
+
+    target_idx = key_to_index.reindex(incoming["Kunci"].to_numpy()).to_numpy(dtype=float, copy=True)
+
+    # NIS baru yang tidak cocok: coba nama+kelas murid lama yang belum punya NIS
+    # (NIS-nya diisi saat update), masing-masing paling banyak satu kali
+    fallback = pd.isna(target_idx) & (incoming["NIS"] != "").to_numpy()
+    if fallback.any():
+        tanpa_nis = existing_key[existing_nis == ""]
+        name_to_index = pd.Series(tanpa_nis.index, index=tanpa_nis.to_numpy())
+        name_to_index = name_to_index[~name_to_index.index.duplicated(keep="first")]
+        kandidat = name_to_index.reindex(
+            ("nama:" + _name_key(incoming["Nama_Murid"], incoming["Kelas"]))[fallback].to_numpy()
+        ).astype(float)
+        kandidat = kandidat.mask(kandidat.duplicated() | kandidat.isin(target_idx))
+        target_idx[fallback] = kandidat.to_numpy()
+
+    is_update = pd.notna(target_idx)
+    upd = incoming[is_update]
+    upd_idx = target_idx[is_update].astype(int)
+
+    # --- update: Nama/Kelas (dan NIS yang masih kosong); progres hafalan tetap ---
+    # nilai lama yang hilang (NA) diisi "" agar perbandingan tetap boolean
+    old_nis = df.loc[upd_idx, "NIS"].to_numpy()
+    fill_nis = (old_nis == "") & (upd["NIS"].to_numpy() != "")
+    changed = (
+        (df.loc[upd_idx, "Nama_Murid"].astype("string").fillna("").to_numpy() != upd["Nama_Murid"].to_numpy())
+        | (df.loc[upd_idx, "Kelas"].astype("string").fillna("").to_numpy() != upd["Kelas"].to_numpy())
+        | fill_nis
+    )
+    changed_idx = upd_idx[changed]
+    if len(changed_idx):
+        df.loc[changed_idx, "Nama_Murid"] = upd["Nama_Murid"].to_numpy()[changed]
+        df.loc[changed_idx, "Kelas"] = upd["Kelas"].to_numpy()[changed]
+        df.loc[upd_idx[fill_nis], "NIS"] = upd["NIS"].to_numpy()[fill_nis]
+        df.loc[changed_idx, "Update_Terakhir"] = now
+
+    # --- insert: ID baru berurutan, struktur hafalan kosong yang sama untuk semua ---
+    ins = incoming[~is_update]
+    if len(ins):
+        current_max_id = int(df["ID_Murid"].max()) if not df.empty else 1000
+        initial_status = create_initial_data_structure()
+        new_rows = pd.DataFrame(
+            {
+                "ID_Murid": range(current_max_id + 1, current_max_id + 1 + len(ins)),
+                "Nama_Murid": ins["Nama_Murid"].to_numpy(),
+                "NIS": ins["NIS"].to_numpy(),
+                "Kelas": ins["Kelas"].to_numpy(),
+                "Status_Hafalan": initial_status,
+                "Total_Ayat_Lulus": 0,
+                "Update_Terakhir": now,
+                "Guru_Pencatat": "",
+            }
+        )
+        df = pd.concat([df, new_rows], ignore_index=True)
+
+    laporan = {
+        "inserted": len(ins),
+        "updated": int(changed.sum()),
+        "unchanged": int(len(upd) - changed.sum()),
+        "duplicates": duplikat,
+        "rejected": rejected[["Baris", "Nama_Murid", "Kelas", "NIS", "Alasan"]],
+    }
+    return df, laporan
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+# =============================
+# ANALITIK AKTIVITAS GURU PENCATAT
+# =============================
+# Semua perhitungan memakai rollup harian per (guru, kelas) dari
+# daily_rollup (DailyRollups.teacher_daily), yang ikut diperbarui setiap
+# setoran dicatat. Ukurannya sebanding jumlah hari aktif x guru x kelas,
+# bukan jumlah baris log, sehingga tetap cepat walau log berumur bertahun-tahun.
+# Jendela berjalan dihitung mundur dari hari ini: 7 hari = hari ini dan
+# 6 hari sebelumnya.
+
+JENDELA_HARI = (7, 30)
+
+
+def _window_start(today, hari: int) -> pd.Timestamp:
+    return pd.Timestamp(today or pd.Timestamp.now()).normalize() - pd.Timedelta(days=hari - 1)
+
+
+def teacher_summary(daily: pd.DataFrame, today=None, windows=JENDELA_HARI) -> pd.DataFrame:
+    """
+    Satu baris per guru: setoran, ayat lulus dan jumlah kelas yang dilayani
+    dalam tiap jendela `windows`, ditambah total sepanjang log, rata-rata ayat
+    lulus per setoran, jumlah hari aktif dan tanggal setoran terakhir.
+    """
+    per_guru = daily.groupby("Guru_Pencatat", sort=True)
+    out = pd.DataFrame(
+        {
+            "Setoran_Total": per_guru["Setoran"].sum(),
+            "Ayat_Lulus_Total": per_guru["Ayat_Lulus"].sum(),
+            "Hari_Aktif": per_guru["Tanggal"].nunique(),
+            "Terakhir_Aktif": per_guru["Tanggal"].max().dt.date,
+        }
+    )
+    out["Rata_Ayat_Lulus_per_Setoran"] = np.round(out["Ayat_Lulus_Total"] / out["Setoran_Total"], 2)
+
+    for hari in windows:
+        dalam = daily[daily["Tanggal"] >= _window_start(today, hari)].groupby("Guru_Pencatat")
+        out[f"Setoran_{hari}_Hari"] = dalam["Setoran"].sum().reindex(out.index, fill_value=0)
+        out[f"Ayat_Lulus_{hari}_Hari"] = dalam["Ayat_Lulus"].sum().reindex(out.index, fill_value=0)
+        out[f"Kelas_{hari}_Hari"] = dalam["Kelas"].nunique().reindex(out.index, fill_value=0)
+
+    urut = f"Setoran_{max(windows)}_Hari" if windows else "Setoran_Total"
+    return out.sort_values([urut, "Setoran_Total"], ascending=False).reset_index()
+
+
+def teacher_timeline(daily: pd.DataFrame, guru: str, freq: str = "D", windows=JENDELA_HARI) -> pd.DataFrame:
+    """
+    Deret waktu satu guru (semua kelas dijumlah) per hari ("D") atau per
+    minggu ("W"). Untuk deret harian ditambahkan jumlah setoran berjalan
+    `windows` hari (hari tanpa setoran dihitung 0).
+    """
+    milik = daily[daily["Guru_Pencatat"] == guru]
+    harian = milik.groupby("Tanggal")[["Setoran", "Ayat_Lulus", "Mengulang"]].sum()
+    if harian.empty:
+        return harian.reset_index()
+    harian = harian.asfreq("D", fill_value=0)
+    if freq == "W":
+        return harian.resample("W-SUN").sum().reset_index()
+    for hari in windows:
+        harian[f"Setoran_{hari}_Hari"] = harian["Setoran"].rolling(hari, min_periods=1).sum().astype(np.int64)
+    return harian.reset_index()
+
+
+def teacher_classes(daily: pd.DataFrame, guru: str, today=None, hari: int = max(JENDELA_HARI)) -> pd.DataFrame:
+    """Kelas yang dilayani satu guru dalam `hari` terakhir beserta jumlah setoran dan ayat lulusnya."""
+    milik = daily[(daily["Guru_Pencatat"] == guru) & (daily["Tanggal"] >= _window_start(today, hari))]
+    return (
+        milik.groupby("Kelas")[["Setoran", "Ayat_Lulus", "Mengulang"]]
+        .sum()
+        .sort_values("Setoran", ascending=False)
+        .reset_index()
+    )
+
+
+def class_teacher_counts(daily: pd.DataFrame, kelas: str) -> pd.DataFrame:
+    """Jumlah setoran Lulus per guru untuk satu kelas (Lulus = setoran - mengulang)."""
+    milik = daily[daily["Kelas"] == kelas]
+    lulus = (milik["Setoran"] - milik["Mengulang"]).groupby(milik["Guru_Pencatat"]).sum()
+    lulus = lulus[lulus > 0]
+    return lulus.rename("Jumlah_Setoran_Lulus").sort_values(ascending=False).reset_index()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# modul aplikasi berada langsung di folder induk (tanpa paket)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
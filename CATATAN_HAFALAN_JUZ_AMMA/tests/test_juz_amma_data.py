@@ -0,0 +1,81 @@
+import json
+
+import numpy as np
+import pytest
+
+from juz_amma_data import (
+    JUZ_AMMA,
+    SURAH_NAMES,
+    create_initial_data_structure,
+    pack_status,
+    pack_status_rows,
+    patch_surah,
+    status_counts,
+    surah_status,
+    unpack_status,
+    unpack_status_column,
+)
+
+
+def random_status(seed=0, n=1):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 3, size=(n, JUZ_AMMA.total_ayat), dtype=np.uint8)
+
+
+def test_pack_unpack_round_trip():
+    arr = random_status()[0]
+    packed = pack_status(arr)
+    assert packed.startswith("v1:")
+    assert "=" not in packed
+    np.testing.assert_array_equal(unpack_status(packed), arr)
+
+
+def test_pack_rows_matches_single_pack_and_column_unpack():
+    arr2d = random_status(seed=1, n=5)
+    rows = pack_status_rows(arr2d)
+    assert rows == [pack_status(row) for row in arr2d]
+    np.testing.assert_array_equal(unpack_status_column(rows), arr2d)
+
+
+def test_initial_structure_is_all_belum():
+    kosong = create_initial_data_structure()
+    assert not unpack_status(kosong).any()
+    assert status_counts(kosong).tolist() == [JUZ_AMMA.total_ayat, 0, 0]
+
+
+def test_unpack_legacy_json():
+    legacy = json.dumps({SURAH_NAMES[0]: [1, 2, 0], "Bukan Surah": [1]})
+    arr = unpack_status(legacy)
+    assert arr[:3].tolist() == [1, 2, 0]
+    assert arr[3:].sum() == 0
+
+
+def test_unpack_broken_value_is_all_belum():
+    assert not unpack_status("v1:rusak").any()
+    assert not unpack_status(None).any()
+
+
+@pytest.mark.parametrize("surah", [SURAH_NAMES[0], SURAH_NAMES[5], SURAH_NAMES[-1]])
+def test_patch_surah_only_touches_requested_range(surah):
+    arr = random_status(seed=2)[0]
+    value = pack_status(arr)
+    n = JUZ_AMMA.surah_map[surah]
+    end = min(3, n)
+
+    patched = patch_surah(value, surah, 1, end, 1)
+
+    expected = arr.copy()
+    offset = JUZ_AMMA.offsets[surah]
+    expected[offset:offset + end] = 1
+    np.testing.assert_array_equal(unpack_status(patched), expected)
+    np.testing.assert_array_equal(surah_status(patched, surah), expected[offset:offset + n])
+    assert status_counts(patched).tolist() == np.bincount(expected, minlength=3).tolist()
+
+
+def test_patch_surah_converts_legacy_json_to_v1():
+    legacy = json.dumps({SURAH_NAMES[1]: [2]})
+    patched = patch_surah(legacy, SURAH_NAMES[0], 1, 2, 1)
+    arr = unpack_status(patched)
+    assert patched.startswith("v1:")
+    assert arr[:2].tolist() == [1, 1]
+    assert arr[JUZ_AMMA.offsets[SURAH_NAMES[1]]] == 2
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from juz_amma_data import SURAH_NAMES
+from log_store import (
+    LOG_COLUMNS,
+    RECORD_DTYPE,
+    append_log,
+    decode_log,
+    empty_dictionary,
+    encode_log,
+    read_log_frame,
+    write_log_frame,
+)
+
+STUDENTS = pd.DataFrame({"ID_Murid": [1001, 1002], "Nama_Murid": ["Ali", "Budi"], "Kelas": ["VII A", "VII B"]})
+
+
+def sample_log():
+    return pd.DataFrame(
+        {
+            "Timestamp": pd.to_datetime(["2025-08-01 07:00:00", "2025-08-02 08:30:15", "2025-08-03 09:00:00"]),
+            "ID_Murid": [1001, 1002, 1001],
+            "Nama_Murid": ["Ali", "Budi", "Ali"],
+            "Kelas": ["VII A", "VII B", "VII A"],
+            "Surah": [SURAH_NAMES[0], SURAH_NAMES[1], SURAH_NAMES[0]],
+            "Ayat_Dari": [1, 5, 3],
+            "Ayat_Sampai": [2, 9, 3],
+            "Status": ["Lulus", "Mengulang", "Lulus"],
+            "Guru_Pencatat": ["Ust. A", "Ust. B", "Ust. A"],
+        },
+        columns=LOG_COLUMNS,
+    )
+
+
+def test_encode_decode_round_trip():
+    kamus = empty_dictionary()
+    records = encode_log(sample_log(), kamus)
+    assert records.dtype == RECORD_DTYPE
+    assert kamus["surah"] == [SURAH_NAMES[0], SURAH_NAMES[1]]
+    pd.testing.assert_frame_equal(decode_log(records, kamus, STUDENTS), sample_log(), check_dtype=False)
+
+
+def test_encode_drops_rows_without_timestamp():
+    df = sample_log().astype({"Timestamp": str})
+    df.loc[1, "Timestamp"] = "bukan tanggal"
+    assert len(encode_log(df, empty_dictionary())) == 2
+
+
+def test_dictionary_overflow_raises_and_keeps_dictionary():
+    kamus = {"surah": [f"S{i}" for i in range(256)], "guru": []}
+    df = sample_log().assign(Surah="Surah Baru")
+    with pytest.raises(ValueError):
+        encode_log(df, kamus)
+    assert len(kamus["surah"]) == 256
+
+
+@pytest.mark.parametrize("suffix", [".bin", ".npz", ".csv"])
+def test_write_read_log_frame_round_trip(tmp_path, suffix):
+    path = str(tmp_path / f"log{suffix}")
+    write_log_frame(path, sample_log())
+    df = read_log_frame(path, STUDENTS)
+    df["Timestamp"] = pd.to_datetime(df["Timestamp"])
+    pd.testing.assert_frame_equal(df, sample_log(), check_dtype=False)
+
+
+@pytest.mark.parametrize("suffix", [".bin", ".csv"])
+def test_read_log_frame_filters_students_and_columns(tmp_path, suffix):
+    path = str(tmp_path / f"log{suffix}")
+    write_log_frame(path, sample_log())
+    df = read_log_frame(path, STUDENTS, columns=["Timestamp", "Surah", "Ayat_Dari"], student_ids=[1001])
+    assert list(df.columns) == ["Timestamp", "Surah", "Ayat_Dari"]
+    assert df["Ayat_Dari"].tolist() == [1, 3]
+
+
+def test_append_log_extends_compact_log(tmp_path):
+    path = str(tmp_path / "log.bin")
+    df = sample_log()
+    append_log(path, df.iloc[:2])
+    append_log(path, df.iloc[2:])
+    assert np.fromfile(path, dtype=RECORD_DTYPE).shape == (3,)
+    pd.testing.assert_frame_equal(read_log_frame(path, STUDENTS), df, check_dtype=False)
@@ -0,0 +1,24 @@
+import pandas as pd
+
+from juz_amma_data import JUZ_AMMA, SURAH_NAMES
+from murajaah import review_history
+
+
+def test_review_history_counts_lulus_since_last_mengulang():
+    surah = SURAH_NAMES[0]
+    df_log = pd.DataFrame(
+        {
+            "Timestamp": pd.to_datetime(["2025-08-01", "2025-08-05", "2025-08-06", "2025-08-10", "2025-08-12"]),
+            "ID_Murid": [1001] * 5,
+            "Surah": [surah] * 5,
+            "Ayat_Dari": [1, 1, 1, 1, 2],
+            "Ayat_Sampai": [2, 2, 1, 1, 2],
+            "Status": ["Lulus", "Lulus", "Mengulang", "Lulus", "Lulus"],
+        }
+    )
+    last, count = review_history(df_log, [1001, 1002], JUZ_AMMA)
+    hari = pd.to_datetime(["2025-08-10", "2025-08-12"]).to_numpy(dtype="datetime64[D]").astype(int)
+    assert last[0, :3].tolist() == [hari[0], hari[1], 0]
+    # ayat 1: Mengulang 6 Agustus mengulang hitungan; ayat 2: tiga kali Lulus
+    assert count[0, :3].tolist() == [1, 3, 0]
+    assert not count[1].any()
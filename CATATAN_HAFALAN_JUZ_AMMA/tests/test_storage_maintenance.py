@@ -0,0 +1,83 @@
+import os
+import time
+
+import pandas as pd
+
+from export_jobs import JOB_DONE, JOB_IDLE, ExportJobManager
+from juz_amma_data import SURAH_NAMES, create_initial_data_structure
+from log_archive import needs_rotation, rotate_log
+from log_store import LOG_COLUMNS, write_log_frame
+from status_matrix import StatusMatrix
+
+
+def write_log(path, timestamps):
+    n = len(timestamps)
+    df = pd.DataFrame(
+        {
+            "Timestamp": pd.to_datetime(timestamps),
+            "ID_Murid": [1001] * n,
+            "Nama_Murid": [""] * n,
+            "Kelas": [""] * n,
+            "Surah": [SURAH_NAMES[0]] * n,
+            "Ayat_Dari": [1] * n,
+            "Ayat_Sampai": [1] * n,
+            "Status": ["Lulus"] * n,
+            "Guru_Pencatat": ["Ust. A"] * n,
+        },
+        columns=LOG_COLUMNS,
+    )
+    write_log_frame(path, df)
+
+
+def test_oversized_log_of_current_month_does_not_rotate(tmp_path):
+    path = str(tmp_path / "log.bin")
+    write_log(path, ["2025-10-02", "2025-10-03"])
+    assert not needs_rotation(path, max_bytes=1, now="2025-10-20")
+
+
+def test_oversized_log_with_older_month_rotates(tmp_path):
+    path = str(tmp_path / "log.bin")
+    write_log(path, ["2025-09-02", "2025-10-03"])
+    assert needs_rotation(path, max_bytes=1, now="2025-10-20")
+    hasil = rotate_log(path, max_bytes=1, now="2025-10-20")
+    assert (hasil["baris_diarsipkan"], hasil["baris_tersisa"]) == (1, 1)
+    assert not needs_rotation(path, max_bytes=1, now="2025-10-20")
+
+
+def wait(job):
+    while job.status not in (JOB_DONE, "gagal"):
+        time.sleep(0.01)
+
+
+def test_export_manager_evicts_older_versions(tmp_path):
+    manager = ExportJobManager(str(tmp_path), max_workers=1)
+    lama = manager.submit("rekap", {"kelas": "VII A"}, "v1", "rekap.xlsx", lambda progress: b"lama")
+    wait(lama)
+    lain = manager.submit("rekap", {"kelas": "VII B"}, "v1", "rekap.xlsx", lambda progress: b"lain")
+    wait(lain)
+    baru = manager.submit("rekap", {"kelas": "VII A"}, "v2", "rekap.xlsx", lambda progress: b"baru")
+    wait(baru)
+    for _ in range(100):  # eviksi berjalan tepat setelah status selesai
+        if not os.path.exists(lama.path):
+            break
+        time.sleep(0.01)
+
+    assert lama.status == JOB_IDLE and not os.path.exists(lama.path)
+    assert baru.read_bytes() == b"baru"
+    assert lain.read_bytes() == b"lain"
+
+
+def test_status_matrix_reuses_freed_rows(tmp_path):
+    path = str(tmp_path / "status.mat")
+
+    def murid(ids):
+        return pd.DataFrame({"ID_Murid": ids, "Status_Hafalan": create_initial_data_structure()})
+
+    matrix = StatusMatrix(path)
+    matrix.sync_students(murid([1, 2, 3]))
+    ukuran = os.path.getsize(path)
+    matrix.sync_students(murid([1, 3, 4]))
+    assert os.path.getsize(path) == ukuran
+    assert sorted(matrix._index) == [1, 3, 4]
+    matrix.sync_students(murid([1, 3, 4, 5]))
+    assert os.path.getsize(path) == ukuran * 4 // 3
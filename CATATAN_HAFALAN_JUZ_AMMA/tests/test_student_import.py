@@ -0,0 +1,101 @@
+import io
+
+import pandas as pd
+
+from juz_amma_data import create_initial_data_structure, pack_status
+from student_import import import_students, iter_csv_chunks, iter_xlsx_chunks
+
+
+def students(rows):
+    """rows: (ID_Murid, Nama_Murid, Kelas, NIS)."""
+    df = pd.DataFrame(rows, columns=["ID_Murid", "Nama_Murid", "Kelas", "NIS"])
+    df["Status_Hafalan"] = create_initial_data_structure()
+    df["Total_Ayat_Lulus"] = 0
+    df["Update_Terakhir"] = ""
+    df["Guru_Pencatat"] = ""
+    return df
+
+
+def run_csv(df, text):
+    return import_students(df, iter_csv_chunks(io.StringIO(text)), now="2025-08-01 07:00:00")
+
+
+def test_new_nis_inserts_student():
+    new, laporan = run_csv(students([(1001, "Ali", "VII A", "111")]), "Nama_Murid;Kelas;NIS\nBudi;VII B;222\n")
+    assert laporan["inserted"] == 1
+    assert new.loc[new["NIS"] == "222", "ID_Murid"].tolist() == [1002]
+
+
+def test_known_nis_updates_name_and_class_but_keeps_progress():
+    df = students([(1001, "Ali", "VII A", "111")])
+    df.loc[0, "Status_Hafalan"] = pack_status([1] * 564)
+    new, laporan = run_csv(df, "Nama_Murid;Kelas;NIS\nAli Akbar;VIII A;111\n")
+    assert (laporan["inserted"], laporan["updated"]) == (0, 1)
+    assert new.loc[0, ["Nama_Murid", "Kelas"]].tolist() == ["Ali Akbar", "VIII A"]
+    assert new.loc[0, "Status_Hafalan"] == df.loc[0, "Status_Hafalan"]
+
+
+def test_unchanged_row_is_reported_unchanged():
+    _, laporan = run_csv(students([(1001, "Ali", "VII A", "111")]), "Nama_Murid;Kelas;NIS\nAli;VII A;111.0\n")
+    assert (laporan["updated"], laporan["unchanged"]) == (0, 1)
+
+
+def test_row_without_nis_matches_name_and_class():
+    new, laporan = run_csv(students([(1001, "Ali", "VII A", "")]), "Nama_Murid;Kelas;NIS\n ali ;vii a;\n")
+    assert laporan["inserted"] == 0
+    assert len(new) == 1
+
+
+def test_new_nis_fills_existing_student_without_nis():
+    new, laporan = run_csv(students([(1001, "Ali", "1A", "")]), "Nama_Murid;Kelas;NIS\nAli;1A;123\n")
+    assert (laporan["inserted"], laporan["updated"]) == (0, 1)
+    assert new[["ID_Murid", "NIS"]].values.tolist() == [[1001, "123"]]
+
+
+def test_student_without_nis_is_claimed_once():
+    df = students([(1001, "Ali", "1A", "")])
+    new, laporan = run_csv(df, "Nama_Murid;Kelas;NIS\nAli;1A;123\nAli;1A;456\n")
+    assert laporan["inserted"] == 1
+    assert sorted(new["NIS"].tolist()) == ["123", "456"]
+
+
+def test_existing_student_with_missing_name_or_class():
+    df = students([(1001, pd.NA, pd.NA, "111")])
+    new, laporan = run_csv(df, "Nama_Murid;Kelas;NIS\nAli;VII A;111\n")
+    assert laporan["updated"] == 1
+    assert new.loc[0, ["Nama_Murid", "Kelas"]].tolist() == ["Ali", "VII A"]
+
+
+def test_duplicates_in_file_keep_last():
+    new, laporan = run_csv(students([]), "Nama_Murid;Kelas;NIS\nAli;VII A;111\nAli K;VII A;111\n")
+    assert (laporan["inserted"], laporan["duplicates"]) == (1, 1)
+    assert new["Nama_Murid"].tolist() == ["Ali K"]
+
+
+def test_rejected_rows_report_csv_line_numbers():
+    _, laporan = run_csv(students([]), "Nama_Murid;Kelas;NIS\nAli;VII A;1\n\n;VII A;2\nBudi;;3\nCici;VII A;1 2\n")
+    assert laporan["rejected"][["Baris", "Alasan"]].values.tolist() == [
+        [4, "Nama_Murid kosong"],
+        [5, "Kelas kosong"],
+        [6, "Format NIS tidak valid"],
+    ]
+
+
+def test_rejected_rows_report_sheet_row_numbers():
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Daftar Peserta Didik"])
+    ws.append([])
+    ws.append(["Nama Peserta Didik", "Rombel", "NIPD"])
+    ws.append(["Ali", "VII A", 111])
+    ws.append([])
+    ws.append([None, "VII A", 222])
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+
+    new, laporan = import_students(students([]), iter_xlsx_chunks(buffer, chunksize=1))
+    assert new["NIS"].tolist() == ["111"]
+    assert laporan["rejected"]["Baris"].tolist() == [6]